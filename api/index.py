@@ -1,7 +1,17 @@
+import time
+
+_import_start = time.perf_counter()
 from app import create_app
+from app.utils import startup
+from app.utils.structured_logging import configure_logging
+_import_seconds = time.perf_counter() - _import_start
+
+# Request threads only enqueue records; a background thread formats and writes them
+configure_logging()
+startup.record('import', _import_seconds)
 
 # Create Flask application instance
 app = create_app()
 
 # This is required for Vercel serverless deployment
-# The variable name "app" is what Vercel looks for
\ No newline at end of file
+# The variable name "app" is what Vercel looks for
@@ -1,38 +1,50 @@
-import logging
-from flask import Flask, jsonify
+import time
+from flask import Flask
 from flask_cors import CORS
-from flask import Blueprint
 
 def create_app(config_name='development'):
+    start_time = time.perf_counter()
     app = Flask(__name__)
     # Add this line to enable CORS
     CORS(app)
     
-    from app.config.config import ENV
+    from app.config.config import ENV, STARTUP_PROFILE
+    from app.utils import startup
     app.config.update(
         ENV=ENV,
         DEBUG=ENV == 'development',
         JSON_SORT_KEYS=False,
         MAX_CONTENT_LENGTH=1 * 1024 * 1024
     )
+    if STARTUP_PROFILE:
+        startup.install_first_request_timer(app)
     
-    from app.utils.middleware import setup_middleware
-    setup_middleware(app)
+    with startup.timed('middleware'):
+        from app.utils.middleware import setup_middleware
+        setup_middleware(app)
+        from app.utils.http_cache import setup_http_cache
+        setup_http_cache(app)
     
-    from app.api.roadmap_generator import roadmap_bp
-    from app.api.content_generator import content_bp
-    from app.api.quiz_generator import quiz_bp
+    from app.config.config import GEMINI_WARMUP
+    if GEMINI_WARMUP:
+        with startup.timed('gemini_warmup'):
+            from app.models.gemini_model import warm_up
+            warm_up()
     
-    app.register_blueprint(roadmap_bp, url_prefix='/api')
-    app.register_blueprint(content_bp, url_prefix='/api')
-    app.register_blueprint(quiz_bp, url_prefix='/api')
+    with startup.timed('blueprints'):
+        from app.api.roadmap_generator import roadmap_bp
+        from app.api.content_generator import content_bp
+        from app.api.quiz_generator import quiz_bp
+        
+        app.register_blueprint(roadmap_bp, url_prefix='/api')
+        app.register_blueprint(content_bp, url_prefix='/api')
+        app.register_blueprint(quiz_bp, url_prefix='/api')
+        
+        from app.api.jobs import jobs_bp
+        app.register_blueprint(jobs_bp, url_prefix='/api')
+        
+        from app.api.health import health_bp
+        app.register_blueprint(health_bp)
     
-    health_bp = Blueprint('health', __name__)
-
-    @health_bp.route('/health', methods=['GET'])
-    def health_check():
-        return jsonify({"status": "ok", "message": "API is running"}), 200
-
-    app.register_blueprint(health_bp)
-
+    startup.record('create_app', time.perf_counter() - start_time)
     return app
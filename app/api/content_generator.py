@@ -1,91 +1,62 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 import logging
 import time
-import traceback
-import requests
-from app.models.gemini_model import generate_content
-from app.utils.helpers import parse_ai_json, validate_tutorial_content, retry_on_exception
-from app.config.config import ERROR_MESSAGES, YOUTUBE_API_KEY
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from app.models.gemini_model import generate_content, generate_content_stream
+from app.models.generation_profiles import generation_config_for
+from app.models.schemas import TUTORIAL_OUTLINE_SCHEMA
+from app.utils import metrics
+from app.utils.helpers import (
+    parse_ai_json, validate_tutorial_content, sse_event, wants_event_stream, circuit_open_response,
+    resolve_level
+)
+from app.utils.http_cache import mark_cacheable
+from app.utils.resilience import CircuitOpenError
+from app.utils.concurrency import get_executor, timed_call, remaining_time
+from app.utils.cache import get_cache, make_cache_key
+from app.utils.prefetch import prefetcher, register_prefetch_handler
+from app.utils.topics import canonicalize_topic, lookup_topic, remember_topic
+from app.utils.youtube import youtube_client
+from app.config.config import (
+    ERROR_MESSAGES, IO_POOL_WORKERS, CONTENT_GENERATION_DEADLINE, YOUTUBE_FETCH_DEADLINE, CONTENT_DEFAULT_MODE,
+    CONTENT_MAX_SECTIONS, CONTENT_SECTION_CONCURRENCY
+)
 
 content_bp = Blueprint('content', __name__)
 logger = logging.getLogger(__name__)
+content_cache = get_cache('content')
 
-def fetch_youtube_videos(topic, max_results=2):
-    """Fetch relevant YouTube videos for a given topic - simplified version"""
-    try:
-        if not YOUTUBE_API_KEY:
-            logger.warning("YouTube API key not configured")
-            return []
-            
-        search_query = f"{topic} tutorial"
-        url = "https://www.googleapis.com/youtube/v3/search"
-        params = {
-            "part": "snippet",
-            "q": search_query,
-            "type": "video",
-            "maxResults": max_results,
-            "key": YOUTUBE_API_KEY
-        }
-        
-        response = requests.get(url, params=params, timeout=3)  # Add timeout
-        if response.status_code != 200:
-            logger.error(f"YouTube API error: {response.status_code}")
-            return []
-            
-        data = response.json()
-        videos = []
-        for item in data.get("items", []):
-            video_id = item["id"]["videoId"]
-            title = item["snippet"]["title"]
-            videos.append({
-                "title": title,
-                "url": f"https://www.youtube.com/watch?v={video_id}"
-            })
-            
-        return videos
-    except Exception as e:
-        logger.error(f"Error fetching YouTube videos: {str(e)}")
-        return []  
+# Requested depth -> (token budget units, number of key sections asked for)
+CONTENT_DEPTHS = {
+    'brief': (1, '2-3'),
+    'standard': (2, '3-5'),
+    'detailed': (3, '5-7'),
+}
+CONTENT_MODES = ('single', 'sections')
 
-@content_bp.route('/generate-content', methods=['POST'])
-def generate_tutorial_content():
-    start_time = time.time()
-    
+def start_youtube_lookup(topic):
+    """Start fetching YouTube links in the background; returns (future, started_at)."""
+    executor = get_executor('content-io', IO_POOL_WORKERS)
+    return executor.submit(timed_call, youtube_client.search, topic, max_results=2), time.perf_counter()
+
+def collect_youtube_links(youtube_future, started_at):
+    """Wait for the YouTube lookup until its deadline; a late lookup yields no links."""
     try:
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
-        except Exception:
-            return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
-        
-        if 'topic' in data:
-            topic = data['topic'].strip()
-        else:
-            return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
-            
-        if 'level' in data:
-            level = data['level'].strip()
-        elif 'user_profile' in data and isinstance(data['user_profile'], dict):
-            user_profile = data['user_profile']
-            if 'education_level' in user_profile:
-                education = user_profile['education_level'].lower()
-                if 'phd' in education or 'doctorate' in education:
-                    level = "Advanced"
-                elif 'master' in education or 'be' in education or 'btech' in education:
-                    level = "Intermediate"
-                else:
-                    level = "Beginner"
-            else:
-                level = "Intermediate"
-        else:
-            level = "Intermediate"
-            
-        format_type = data.get('format', 'tutorial').strip()
-        
-        logger.info(f"Generating {format_type} content for topic: '{topic}', level: '{level}'")
-        
-        prompt = f"""
+        youtube_links, youtube_time = youtube_future.result(
+            timeout=remaining_time(started_at, YOUTUBE_FETCH_DEADLINE)
+        )
+    except FuturesTimeoutError:
+        youtube_future.cancel()
+        logger.warning("YouTube lookup exceeded its %ss deadline, returning no links", YOUTUBE_FETCH_DEADLINE)
+        metrics.increment('upstream_errors', upstream='youtube', error='deadline_exceeded')
+        metrics.observe_stage('content', 'youtube_fetch', time.perf_counter() - started_at)
+        return [], None
+    metrics.observe_stage('content', 'youtube_fetch', youtube_time)
+    return youtube_links, youtube_time
+
+def build_tutorial_prompt(topic, level, format_type, depth='standard'):
+    section_count = CONTENT_DEPTHS[depth][1]
+    return f"""
         Create a comprehensive {format_type} about "{topic}" for {level} level learners.
         
         Structure your response with:
@@ -99,7 +70,7 @@ def generate_tutorial_content():
         Provide context and background information.
         
         ## Key Sections
-        Include 3-5 sections with clear headings, explanations, and simple code examples where relevant.
+        Include {section_count} sections with clear headings, explanations, and simple code examples where relevant.
         
         ## Practice Exercises
         Suggest 2-3 exercises for the learner.
@@ -111,32 +82,404 @@ def generate_tutorial_content():
         Keep code examples simple, avoiding complex syntax or multi-line examples if possible.
         Tailor the content to be appropriate for {level} level learners.
         """
+
+def build_outline_prompt(topic, level, format_type, depth='standard'):
+    section_count = CONTENT_DEPTHS[depth][1]
+    return f"""
+        Plan a comprehensive {format_type} about "{topic}" for {level} level learners as a compact tutorial outline.
+        
+        Return a JSON object with:
+        - "title": the {format_type} title
+        - "estimated_time": how long it takes to work through, e.g. "2 hours"
+        - "overview": 2-3 sentences on what it covers
+        - "about": 2-3 sentences of context and background on {topic}
+        - "sections": {section_count} key sections in teaching order, each with a "section_title" and a one-sentence "summary"
+        - "practice_exercises": 2-3 exercises for the learner
+        - "additional_resources": 2-4 helpful resources for further learning
+        
+        Do not write the sections themselves; only plan them.
+        """
+
+def build_section_prompt(topic, level, format_type, outline, index):
+    section = outline['sections'][index]
+    plan = '\n'.join(
+        f"        {number}. {item['section_title']}" for number, item in enumerate(outline['sections'], 1)
+    )
+    return f"""
+        You are writing one section of a {format_type} titled "{outline['title']}" about "{topic}" for {level} level learners.
         
+        The {format_type} has these sections:
+{plan}
+        
+        Write only the body of section {index + 1}, "{section['section_title']}": {section['summary']}
+        
+        Explain it clearly with simple code examples where relevant, using markdown lists and code blocks (```language).
+        Do not repeat the section heading, and do not cover the other sections' material.
+        Tailor the content to be appropriate for {level} level learners.
+        """
+
+def _strip_section_heading(text, section_title):
+    """Drop a heading the model may open the section with despite being told not to."""
+    first_line, _, rest = text.strip().partition('\n')
+    if first_line.startswith('#') and first_line.lstrip('#').strip().lower() == section_title.strip().lower():
+        return rest.strip()
+    return text.strip()
+
+def _markdown_list(items):
+    return '\n'.join(f"- {item}" for item in items)
+
+def render_tutorial_head(topic, outline):
+    head = f"# {outline['title']}\n\n## Overview\n{outline['overview']}\n\n"
+    if outline.get('about'):
+        head += f"## About {topic}\n{outline['about']}\n\n"
+    return head
+
+def render_tutorial_section(section):
+    return f"## {section['section_title']}\n{section['content']}\n\n"
+
+def render_tutorial_tail(outline):
+    return (
+        f"## Practice Exercises\n{_markdown_list(outline['practice_exercises'])}\n\n"
+        f"## Additional Resources\n{_markdown_list(outline['additional_resources'])}"
+    )
+
+def generate_outline(topic, level, format_type, depth):
+    """Ask for the tutorial's outline (title, section plan, exercises, resources)."""
+    response_text = generate_content(
+        build_outline_prompt(topic, level, format_type, depth), response_schema=TUTORIAL_OUTLINE_SCHEMA,
+        generation_config=generation_config_for('content_outline', CONTENT_DEPTHS[depth][0]), route='content'
+    )
+    outline = parse_ai_json(response_text)
+    sections = outline.get('sections') if isinstance(outline, dict) else None
+    if not isinstance(sections, list):
+        raise ValueError("Outline has no sections")
+    outline['sections'] = [
+        section for section in sections
+        if isinstance(section, dict) and section.get('section_title')
+    ][:CONTENT_MAX_SECTIONS]
+    if not outline['sections']:
+        raise ValueError("Outline has no sections")
+    for section in outline['sections']:
+        section.setdefault('summary', '')
+    return outline
+
+def start_section_generation(topic, level, format_type, depth, outline):
+    """Submit one generation per outline section; returns their futures in outline order."""
+    executor = get_executor('content-sections', CONTENT_SECTION_CONCURRENCY)
+    generation_config = generation_config_for('content_section', CONTENT_DEPTHS[depth][0])
+    return [
+        executor.submit(
+            generate_content, build_section_prompt(topic, level, format_type, outline, index),
+            format_type='markdown', generation_config=generation_config, route='content'
+        )
+        for index in range(len(outline['sections']))
+    ]
+
+def collect_section(outline, futures, index, started_at):
+    """Wait (within the content deadline) for one section and return it with its content."""
+    section = outline['sections'][index]
+    text = futures[index].result(timeout=remaining_time(started_at, CONTENT_GENERATION_DEADLINE))
+    return {"section_title": section['section_title'], "content": _strip_section_heading(text, section['section_title'])}
+
+def validated_tutorial(outline, sections):
+    """The outline with written sections, checked by validate_tutorial_content; raises ValueError."""
+    tutorial = {**outline, "sections": sections}
+    valid, message = validate_tutorial_content(tutorial)
+    if not valid:
+        raise ValueError(f"Sectioned content failed validation: {message}")
+    return tutorial
+
+def generate_sectioned_content(topic, level, format_type='tutorial', depth='standard'):
+    """Outline first, then every section in parallel; returns the assembled markdown.
+
+    Wall-clock time is the outline plus the slowest section, and each section gets its own
+    output budget, so long tutorials neither wait on one long call nor hit one token limit.
+    """
+    started_at = time.perf_counter()
+    outline = generate_outline(topic, level, format_type, depth)
+    outline_time = time.perf_counter() - started_at
+    futures = start_section_generation(topic, level, format_type, depth, outline)
+    try:
+        sections = [collect_section(outline, futures, index, started_at) for index in range(len(futures))]
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+    tutorial = validated_tutorial(outline, sections)
+    metrics.increment('content_sections_generated', len(sections))
+    logger.info(
+        "Generated %s sections for '%s' in %.2fs (outline: %.2fs)",
+        len(sections), topic, time.perf_counter() - started_at, outline_time
+    )
+    return (
+        render_tutorial_head(topic, tutorial)
+        + ''.join(render_tutorial_section(section) for section in tutorial['sections'])
+        + render_tutorial_tail(tutorial)
+    )
+
+def content_cache_key(topic, level, format_type='tutorial', depth='standard', mode='single'):
+    # Single-call keys predate modes, so only other modes add a key part
+    parts = (level, format_type, depth) if mode == 'single' else (level, format_type, depth, mode)
+    return make_cache_key('content', canonicalize_topic(topic), *parts)
+
+def lookup_cached_content(topic, level, format_type='tutorial', depth='standard', mode='single'):
+    """Cached content for the topic (or a near-duplicate topic); returns (content or None, cache_key)."""
+    return lookup_topic(
+        content_cache, 'content', topic,
+        lambda candidate: content_cache_key(candidate, level, format_type, depth, mode)
+    )
+
+def content_generation_config(depth):
+    return generation_config_for('content', CONTENT_DEPTHS[depth][0])
+
+def create_tutorial_content(topic, level, format_type='tutorial', depth='standard', mode='single'):
+    """Generate markdown and YouTube links concurrently; returns (response, llm_time, youtube_time)."""
+    # Gemini and YouTube are independent: the lookup runs in the background while this
+    # thread generates, so long generations never hold up the I/O pool
+    youtube_future, youtube_started = start_youtube_lookup(topic)
+    try:
+        if mode == 'sections':
+            content, llm_time = timed_call(generate_sectioned_content, topic, level, format_type, depth)
+        else:
+            stage_start = time.perf_counter()
+            prompt = build_tutorial_prompt(topic, level, format_type, depth)
+            metrics.observe_stage('content', 'prompt_build', time.perf_counter() - stage_start)
+            content, llm_time = timed_call(
+                generate_content, prompt, format_type='markdown',
+                generation_config=content_generation_config(depth), route='content'
+            )
+    except Exception:
+        youtube_future.cancel()
+        raise
+    metrics.observe_stage('content', 'gemini_call', llm_time)
+    
+    youtube_links, youtube_time = collect_youtube_links(youtube_future, youtube_started)
+    
+    response = {
+        "content": content,  
+        "youtube_links": youtube_links  
+    }
+    return response, llm_time, youtube_time
+
+def stream_tutorial_content(prompt, topic, start_time, cache_key, generation_config=None):
+    """Relay markdown chunks as SSE events, then finish with the YouTube links."""
+    youtube_future, youtube_started = start_youtube_lookup(topic)
+    stream_started = time.perf_counter()
+    first_chunk_time = None
+    chunks = []
+    try:
+        for chunk in generate_content_stream(
+            prompt, format_type='markdown', generation_config=generation_config, route='content'
+        ):
+            if first_chunk_time is None:
+                first_chunk_time = time.time() - start_time
+                logger.info("First content chunk streamed after %.2fs", first_chunk_time)
+            chunks.append(chunk)
+            yield sse_event('chunk', {"content": chunk})
+    except Exception as e:
+        logger.error("Content streaming error: %s", e)
+        youtube_future.cancel()
+        yield sse_event('error', {
+            "error": "Failed to generate content",
+            "message": "We encountered an issue generating content. Please try again."
+        })
+        return
+    metrics.observe_stage('content', 'gemini_call', time.perf_counter() - stream_started)
+    
+    youtube_links, _ = collect_youtube_links(youtube_future, youtube_started)
+    yield sse_event('done', {"youtube_links": youtube_links})
+    
+    content_cache.set(cache_key, {"content": ''.join(chunks).strip(), "youtube_links": youtube_links})
+    remember_topic('content', topic)
+    
+    processing_time = time.time() - start_time
+    logger.info("Successfully streamed content in %.2fs", processing_time)
+
+def stream_sectioned_content(topic, level, format_type, depth, start_time, cache_key):
+    """Stream sectioned content: the outline's head, then each section in order as it is written."""
+    youtube_future, youtube_started = start_youtube_lookup(topic)
+    started_at = time.perf_counter()
+    chunks = []
+    try:
+        outline = generate_outline(topic, level, format_type, depth)
+        futures = start_section_generation(topic, level, format_type, depth, outline)
+        head = render_tutorial_head(topic, outline)
+        chunks.append(head)
+        yield sse_event('chunk', {"content": head})
+        logger.info("First content chunk streamed after %.2fs", time.time() - start_time)
+        sections = []
+        try:
+            for index in range(len(futures)):
+                sections.append(collect_section(outline, futures, index, started_at))
+                chunk = render_tutorial_section(sections[-1])
+                chunks.append(chunk)
+                yield sse_event('chunk', {"content": chunk})
+        finally:
+            # Also runs when the client disconnects mid-stream
+            for future in futures:
+                future.cancel()
+        tail = render_tutorial_tail(validated_tutorial(outline, sections))
+        chunks.append(tail)
+        yield sse_event('chunk', {"content": tail})
+    except Exception as e:
+        logger.error("Content streaming error: %s", e)
+        youtube_future.cancel()
+        yield sse_event('error', {
+            "error": "Failed to generate content",
+            "message": "We encountered an issue generating content. Please try again."
+        })
+        return
+    metrics.observe_stage('content', 'gemini_call', time.perf_counter() - started_at)
+    
+    youtube_links, _ = collect_youtube_links(youtube_future, youtube_started)
+    yield sse_event('done', {"youtube_links": youtube_links})
+    
+    content_cache.set(cache_key, {"content": ''.join(chunks).strip(), "youtube_links": youtube_links})
+    remember_topic('content', topic)
+    logger.info("Successfully streamed sectioned content in %.2fs", time.time() - start_time)
+
+def stream_cached_content(cached):
+    yield sse_event('chunk', {"content": cached["content"]})
+    yield sse_event('done', {"youtube_links": cached["youtube_links"]})
+
+def event_stream_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def prefetch_cache_key(topic, level):
+    # Prefetched content must land where a default POST for the topic looks it up
+    return content_cache_key(topic, level, mode=CONTENT_DEFAULT_MODE)
+
+def prefetch_tutorial_content(topic, level, cache_key):
+    if content_cache.peek(cache_key):
+        return False
+    response, _, _ = create_tutorial_content(topic, level, mode=CONTENT_DEFAULT_MODE)
+    content_cache.set(cache_key, response)
+    remember_topic('content', topic)
+    return True
+
+register_prefetch_handler('content', prefetch_cache_key, prefetch_tutorial_content)
+
+def invalid_content_options(depth, mode):
+    """A 400 response for an unknown depth or mode, or None if both are valid."""
+    for name, value, choices in (('depth', depth, CONTENT_DEPTHS), ('mode', mode, CONTENT_MODES)):
+        if value not in choices:
+            return jsonify({
+                "error": f"Invalid {name}: use one of {', '.join(choices)}",
+                "message": "Please check the request and try again."
+            }), 400
+    return None
+
+@content_bp.route('/generate-content', methods=['POST'])
+def generate_tutorial_content():
+    start_time = time.time()
+    stage_start = time.perf_counter()
+    
+    try:
         try:
-            content = generate_content(prompt, format_type='markdown')
+            data = request.get_json()
+            if not data:
+                return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+        except Exception:
+            return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+        
+        if 'topic' in data:
+            topic = data['topic'].strip()
+        else:
+            return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
             
-            youtube_links = fetch_youtube_videos(topic, max_results=2)
+        level = resolve_level(data)
             
-            response = {
-                "content": content,  
-                "youtube_links": youtube_links  
-            }
+        format_type = data.get('format', 'tutorial').strip()
+        depth = str(data.get('depth', 'standard')).strip().lower()
+        mode = str(data.get('mode', CONTENT_DEFAULT_MODE)).strip().lower()
+        invalid = invalid_content_options(depth, mode)
+        if invalid is not None:
+            return invalid
+        metrics.observe_stage('content', 'request_parse', time.perf_counter() - stage_start)
+        
+        cached_content, cache_key = lookup_cached_content(topic, level, format_type, depth, mode)
+        if cached_content is not None:
+            prefetcher.mark_used(cache_key)
+            logger.info("Serving cached %s content for topic: '%s', level: '%s'", format_type, topic, level)
+            if wants_event_stream(request):
+                return event_stream_response(stream_cached_content(cached_content))
+            mark_cacheable(cache_key)
+            return jsonify(cached_content), 200
+        
+        logger.info("Generating %s content for topic: '%s', level: '%s'", format_type, topic, level)
+        
+        if wants_event_stream(request) and mode == 'sections':
+            return event_stream_response(stream_sectioned_content(
+                topic, level, format_type, depth, start_time, cache_key
+            ))
+        if wants_event_stream(request):
+            prompt = build_tutorial_prompt(topic, level, format_type, depth)
+            return event_stream_response(stream_tutorial_content(
+                prompt, topic, start_time, cache_key, content_generation_config(depth)
+            ))
+        
+        try:
+            response, llm_time, youtube_time = create_tutorial_content(topic, level, format_type, depth, mode)
+            content_cache.set(cache_key, response)
+            remember_topic('content', topic)
             
             processing_time = time.time() - start_time
-            logger.info(f"Successfully generated content in {processing_time:.2f}s")
+            youtube_timing = f"{youtube_time:.2f}s" if youtube_time is not None else "timed out"
+            logger.info(
+                "Successfully generated content in %.2fs (llm: %.2fs, youtube: %s)",
+                processing_time, llm_time, youtube_timing
+            )
             
+            mark_cacheable(cache_key)
             return jsonify(response), 200
             
+        except FuturesTimeoutError:
+            logger.error("Content generation exceeded its %ss deadline", CONTENT_GENERATION_DEADLINE)
+            return jsonify({
+                "error": ERROR_MESSAGES['service_unavailable'],
+                "message": "Content generation is taking longer than expected. Please try again."
+            }), 504
+            
+        except CircuitOpenError as e:
+            return circuit_open_response(e)
+            
         except Exception as e:
-            logger.error(f"Content generation error: {str(e)}")
+            logger.error("Content generation error: %s", e)
             return jsonify({
                 "error": "Failed to generate content",
                 "message": "We encountered an issue generating content. Please try again."
             }), 500
             
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Unexpected error: %s", e, exc_info=True)
         return jsonify({
             "error": ERROR_MESSAGES['server_error'],
             "message": "An unexpected error occurred. Please try again later."
-        }), 500
\ No newline at end of file
+        }), 500
+
+@content_bp.route('/generate-content', methods=['GET'])
+def get_cached_tutorial_content():
+    """Cache-only lookup of content generated earlier; answers If-None-Match with 304."""
+    topic = request.args.get('topic', '').strip()
+    if not topic:
+        return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
+    level = resolve_level(request.args)
+    format_type = request.args.get('format', 'tutorial').strip()
+    depth = request.args.get('depth', 'standard').strip().lower()
+    mode = request.args.get('mode', CONTENT_DEFAULT_MODE).strip().lower()
+    invalid = invalid_content_options(depth, mode)
+    if invalid is not None:
+        return invalid
+    
+    cached_content, cache_key = lookup_cached_content(topic, level, format_type, depth, mode)
+    if cached_content is None:
+        return jsonify({
+            "error": "Content not found",
+            "message": "No content has been generated for these parameters yet. Generate it with POST first."
+        }), 404
+    mark_cacheable(cache_key)
+    return jsonify(cached_content), 200
@@ -1,7 +1,41 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify
+from app.utils import metrics
+from app.utils.cache import get_cache_stats
+from app.utils.concurrency import live_requests
+from app.utils.metrics import get_counters
+from app.utils.resilience import CircuitBreaker, gemini_breaker
+from app.utils.startup import get_startup_timings
 
 health_bp = Blueprint('health', __name__)
 
+_BREAKER_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+_CACHE_COUNTERS = ('hits', 'misses', 'sets', 'evictions', 'errors')
+
+metrics.register_gauge('live_requests', lambda: live_requests.value)
+metrics.register_gauge('circuit_breaker_state', lambda: _BREAKER_STATES[gemini_breaker.state], breaker=gemini_breaker.name)
+
 @health_bp.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "ok", "message": "API is running"}), 200
\ No newline at end of file
+    return jsonify({"status": "ok", "message": "API is running"}), 200
+
+@health_bp.route('/health/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(get_cache_stats()), 200
+
+
+@health_bp.route('/health/counters', methods=['GET'])
+def counters():
+    return jsonify(get_counters()), 200
+
+@health_bp.route('/health/startup', methods=['GET'])
+def startup_timings():
+    return jsonify(get_startup_timings()), 200
+
+@health_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    cache_counters = [
+        (f"cache_{field}", {"namespace": namespace}, stats[field])
+        for namespace, stats in get_cache_stats().items()
+        for field in _CACHE_COUNTERS
+    ]
+    return Response(metrics.render_prometheus(cache_counters), mimetype='text/plain; version=0.0.4')
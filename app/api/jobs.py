@@ -0,0 +1,76 @@
+import logging
+from flask import Blueprint, current_app, jsonify, request
+from app.config.config import JOBS_ENABLED, ERROR_MESSAGES
+from app.utils import metrics
+from app.utils.jobs import job_runner, valid_callback_url
+
+jobs_bp = Blueprint('jobs', __name__)
+logger = logging.getLogger(__name__)
+
+# Blueprints whose POST endpoints can run as jobs
+ASYNC_BLUEPRINTS = ('roadmap', 'content', 'quiz')
+
+# Streaming makes no sense for a job, and the job's own context shouldn't re-enter async mode
+_DROPPED_ARGS = ('async', 'stream')
+_DROPPED_HEADERS = ('Accept', 'Content-Length', 'Host')
+
+metrics.register_gauge('jobs_pending', lambda: job_runner.pending.value)
+
+def wants_async(req):
+    return req.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def _replayable_request(req):
+    """Arguments for app.test_request_context that rebuild this request without async or streaming."""
+    return {
+        "path": req.path,
+        "method": req.method,
+        "query_string": [(key, value) for key, value in req.args.items(multi=True) if key not in _DROPPED_ARGS],
+        "headers": [(key, value) for key, value in req.headers.items() if key not in _DROPPED_HEADERS],
+        "data": req.get_data(),
+        "environ_base": {"REMOTE_ADDR": req.remote_addr},
+    }
+
+@jobs_bp.before_app_request
+def start_async_job():
+    """Answer ?async=1 generation requests with 202 and run them as a background job.
+
+    Registered after the rate limiter, so a job costs the same request budget as a
+    synchronous call.
+    """
+    if not JOBS_ENABLED or request.method != 'POST' or request.blueprint not in ASYNC_BLUEPRINTS:
+        return
+    if not wants_async(request):
+        return
+    
+    data = request.get_json(silent=True)
+    callback_url = data.get('callback_url') if isinstance(data, dict) else None
+    if callback_url is not None and (not isinstance(callback_url, str) or not valid_callback_url(callback_url)):
+        return jsonify({
+            "error": ERROR_MESSAGES['missing_fields'],
+            "message": "callback_url must be an http(s) URL on a public host"
+        }), 400
+    
+    job = job_runner.submit(
+        current_app._get_current_object(), request.endpoint, request.view_args or {},
+        _replayable_request(request), callback_url
+    )
+    if job is None:
+        response = jsonify({
+            "error": ERROR_MESSAGES['service_unavailable'],
+            "message": "Too many jobs are queued. Please try again shortly."
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    status_url = f"/api/jobs/{job['job_id']}"
+    logger.info("Queued job %s for %s", job['job_id'], request.endpoint)
+    response = jsonify({"job_id": job['job_id'], "status": job['status'], "status_url": status_url})
+    response.headers['Location'] = status_url
+    return response, 202
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "message": "Unknown or expired job id"}), 404
+    return jsonify(job), 200
@@ -1,62 +1,70 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
 import logging
 import time
-import traceback
+from concurrent.futures import as_completed
 from app.models.gemini_model import generate_content
-from app.utils.helpers import parse_ai_json, retry_on_exception
-from app.config.config import ERROR_MESSAGES
+from app.models.schemas import QUIZ_SCHEMA
+from app.models.generation_profiles import generation_config_for
+from app.utils import metrics
+from app.utils.helpers import parse_ai_json, circuit_open_response, resolve_level
+from app.utils.resilience import CircuitOpenError
+from app.utils.concurrency import get_executor
+from app.utils.structured_logging import log_payload
+from app.utils.cache import get_cache, make_cache_key
+from app.utils.prefetch import prefetcher, register_prefetch_handler
+from app.utils.topics import canonicalize_topic, lookup_topic, remember_topic
+from app.utils.question_bank import question_bank, remove_near_duplicates
+from app.config.config import (
+    ERROR_MESSAGES, QUIZ_BATCH_MAX_TOPICS, QUIZ_BATCH_CONCURRENCY, PREFETCH_ENABLED, PREFETCH_QUIZZES,
+    QUIZ_CHUNKING_ENABLED, QUIZ_CHUNK_SIZE, QUIZ_CHUNK_SPARE, QUIZ_CHUNK_ATTEMPTS, QUIZ_CHUNK_CONCURRENCY,
+    QUIZ_DUPLICATE_THRESHOLD
+)
 
 quiz_bp = Blueprint('quiz', __name__)
 logger = logging.getLogger(__name__)
+# Holds prefetched quizzes only; each one is handed out once so learners still get fresh quizzes
+quiz_cache = get_cache('quiz')
 
-@quiz_bp.route('/generate-quiz', methods=['POST'])
-def generate_quiz():
-    start_time = time.time()
-    
-    try:
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
-        except Exception:
-            return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
-        
-        # Extract topic from request
-        if 'topic' in data:
-            topic = data['topic'].strip()
-        else:
-            return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
-        
-        # Extract question count or set default
-        question_count = int(data.get('count', 5))
-        if question_count < 1:
-            question_count = 5
-        elif question_count > 20:
-            question_count = 20  # Limit maximum questions
-        
-        # Determine difficulty level from user profile or default
-        if 'level' in data:
-            level = data['level'].strip()
-        elif 'user_profile' in data and isinstance(data['user_profile'], dict):
-            user_profile = data['user_profile']
-            if 'education_level' in user_profile:
-                education = user_profile['education_level'].lower()
-                if 'phd' in education or 'doctorate' in education:
-                    level = "Advanced"
-                elif 'master' in education or 'be' in education or 'btech' in education:
-                    level = "Intermediate"
-                else:
-                    level = "Beginner"
-            else:
-                level = "Intermediate"
-        else:
-            level = "Intermediate"
-            
-        logger.info(f"Generating quiz on '{topic}', level: '{level}', questions: {question_count}")
-        
-        prompt = f"""
-        Generate a quiz about "{topic}" for a {level} level learner with {question_count} multiple-choice questions.
+PREFETCH_QUESTION_COUNT = 5
 
+QUESTION_FIELDS = ('question', 'options', 'correct_answer')
+
+# Sub-focus for each chunk of a chunked quiz, so the chunks don't all ask the same questions
+QUIZ_CHUNK_FOCUSES = (
+    "core concepts and definitions",
+    "practical usage and examples",
+    "common mistakes and misconceptions",
+    "how its parts work together",
+    "best practices and trade-offs",
+    "advanced details and edge cases",
+)
+
+class QuizGenerationError(Exception):
+    """A quiz could not be produced; carries the HTTP status and client-facing error body."""
+
+    def __init__(self, status_code, error, message):
+        super().__init__(error)
+        self.status_code = status_code
+        self.error = error
+        self.message = message
+
+    def to_dict(self):
+        return {"error": self.error, "message": self.message}
+
+def parse_question_count(value):
+    question_count = int(value)
+    if question_count < 1:
+        question_count = 5
+    elif question_count > 20:
+        question_count = 20  # Limit maximum questions
+    return question_count
+
+def build_quiz_prompt(topic, level, question_count, focus=None):
+    focus_line = f"\n        Focus the questions on {focus}.\n" if focus else ''
+    return f"""
+        Generate a quiz about "{topic}" for a {level} level learner with {question_count} multiple-choice questions.
+{focus_line}
         The response should be in valid JSON format with the following structure:
         {{
           "title": "Quiz on JavaScript Promises",
@@ -91,35 +99,12 @@ def generate_quiz():
         - Avoid using special characters or symbols
         - Return ONLY the JSON object with no explanations outside the JSON
         """
-        
-        # Use retry mechanism for AI generation
-        @retry_on_exception(max_retries=3, delay=2)
-        def get_ai_content(prompt_text):
-            return generate_content(prompt_text)
-        
-        try:
-            response_text = get_ai_content(prompt)
-            logger.debug(f"AI response excerpt (first 200 chars): {response_text[:200] if response_text else 'Empty response'}")
-        except Exception as e:
-            logger.error(f"AI generation failed after retries: {str(e)}")
-            return jsonify({
-                "error": ERROR_MESSAGES['ai_generation_failed'],
-                "message": "Our AI service is currently experiencing issues. Please try again in a few minutes."
-            }), 503
-        
-        try:
-            # Parse the AI response to JSON
-            quiz_content = parse_ai_json(response_text)
-            logger.debug(f"Successfully parsed JSON with keys: {list(quiz_content.keys())}")
-            
-        except Exception as e:
-            logger.error(f"JSON parsing error: {str(e)}")
-            logger.error(f"Response excerpt: {response_text[:500] if response_text else 'None'}")
-            
-            # Try again with a simplified prompt
-            retry_prompt = f"""
+
+def build_retry_prompt(topic, level, question_count, focus=None):
+    focus_line = f"\n            Focus the questions on {focus}.\n" if focus else ''
+    return f"""
             Generate a simple quiz about "{topic}" with {question_count} multiple-choice questions.
-            
+{focus_line}            
             Return ONLY a valid JSON object with this structure:
             {{
               "title": "Quiz on {topic}",
@@ -137,53 +122,396 @@ def generate_quiz():
             
             CRITICAL: Ensure all JSON is properly formatted with all quotes, brackets, and commas.
             """
+
+def create_quiz(topic, level, question_count):
+    """Generate, parse and validate a quiz. Raises QuizGenerationError or CircuitOpenError."""
+    if QUIZ_CHUNKING_ENABLED and question_count > QUIZ_CHUNK_SIZE:
+        return create_chunked_quiz(topic, level, question_count)
+    return create_single_quiz(topic, level, question_count)
+
+def create_single_quiz(topic, level, question_count, focus=None):
+    """Generate a quiz in one call (re-prompting once if it can't be parsed)."""
+    stage_start = time.perf_counter()
+    prompt = build_quiz_prompt(topic, level, question_count, focus)
+    generation_config = generation_config_for('quiz', question_count)
+    metrics.observe_stage('quiz', 'prompt_build', time.perf_counter() - stage_start)
+    
+    # generate_content retries transient failures with backoff and honours the circuit breaker
+    stage_start = time.perf_counter()
+    try:
+        response_text = generate_content(
+            prompt, response_schema=QUIZ_SCHEMA, generation_config=generation_config, route='quiz'
+        )
+        log_payload(logger, logging.DEBUG, "AI response excerpt", response_text or 'Empty response')
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error("AI generation failed after retries: %s", e)
+        raise QuizGenerationError(
+            503,
+            ERROR_MESSAGES['ai_generation_failed'],
+            "Our AI service is currently experiencing issues. Please try again in a few minutes."
+        )
+    finally:
+        metrics.observe_stage('quiz', 'gemini_call', time.perf_counter() - stage_start)
+    
+    try:
+        # Parse the AI response to JSON
+        stage_start = time.perf_counter()
+        quiz_content = parse_ai_json(response_text)
+        metrics.observe_stage('quiz', 'json_parse', time.perf_counter() - stage_start)
+        logger.debug("Successfully parsed JSON with keys: %s", list(quiz_content))
+        
+    except Exception as e:
+        logger.error("JSON parsing error: %s", e)
+        log_payload(logger, logging.ERROR, "Response excerpt", response_text)
+        
+        # Try again with a simplified prompt
+        metrics.increment('quiz_reprompts')
+        try:
+            response_text = generate_content(
+                build_retry_prompt(topic, level, question_count, focus), generation_config=generation_config, route='quiz'
+            )
+            quiz_content = parse_ai_json(response_text)
+            logger.info("Successfully parsed JSON on second attempt with simplified prompt")
             
-            try:
-                response_text = get_ai_content(retry_prompt)
-                quiz_content = parse_ai_json(response_text)
-                logger.info("Successfully parsed JSON on second attempt with simplified prompt")
-                
-            except Exception as retry_error:
-                logger.error(f"JSON parsing retry failed: {str(retry_error)}")
-                return jsonify({
-                    "error": "Failed to parse AI response. Please try again later.",
-                    "message": "We encountered an issue processing the AI response. Please try again with a simpler topic."
-                }), 500
+        except CircuitOpenError:
+            raise
+        except Exception as retry_error:
+            logger.error("JSON parsing retry failed: %s", retry_error)
+            raise QuizGenerationError(
+                500,
+                "Failed to parse AI response. Please try again later.",
+                "We encountered an issue processing the AI response. Please try again with a simpler topic."
+            )
+    
+    # Validate quiz content
+    stage_start = time.perf_counter()
+    if not quiz_content or not isinstance(quiz_content, dict):
+        raise QuizGenerationError(
+            500, "Invalid quiz content structure", "Failed to generate a valid quiz. Please try again."
+        )
         
-        # Validate quiz content
-        if not quiz_content or not isinstance(quiz_content, dict):
-            return jsonify({
-                "error": "Invalid quiz content structure",
-                "message": "Failed to generate a valid quiz. Please try again."
-            }), 500
+    required_fields = ['title', 'description', 'questions']
+    for field in required_fields:
+        if field not in quiz_content:
+            raise QuizGenerationError(
+                500, f"Missing required field: {field}", "The generated quiz is incomplete. Please try again."
+            )
             
-        required_fields = ['title', 'description', 'questions']
-        for field in required_fields:
-            if field not in quiz_content:
-                return jsonify({
-                    "error": f"Missing required field: {field}",
-                    "message": "The generated quiz is incomplete. Please try again."
-                }), 500
-                
-        if not isinstance(quiz_content['questions'], list) or not quiz_content['questions']:
-            return jsonify({
-                "error": "No questions generated",
-                "message": "Failed to generate quiz questions. Please try again."
-            }), 500
+    if isinstance(quiz_content['questions'], list):
+        # A repaired, truncated response can end with a partially written question
+        quiz_content['questions'] = [
+            question for question in quiz_content['questions']
+            if isinstance(question, dict) and all(key in question for key in QUESTION_FIELDS)
+        ]
+    
+    if not isinstance(quiz_content['questions'], list) or not quiz_content['questions']:
+        raise QuizGenerationError(
+            500, "No questions generated", "Failed to generate quiz questions. Please try again."
+        )
+        
+    # Remove level field from response if present
+    if 'level' in quiz_content:
+        del quiz_content['level']
+    metrics.observe_stage('quiz', 'validation', time.perf_counter() - stage_start)
+    
+    return quiz_content
+
+def chunk_sizes(question_count, chunk_size=QUIZ_CHUNK_SIZE):
+    """Split a question count into near-equal chunks of at most chunk_size, e.g. 12 -> [4, 4, 4]."""
+    chunks = -(-question_count // chunk_size)
+    return [question_count // chunks + (index < question_count % chunks) for index in range(chunks)]
+
+def create_chunked_quiz(topic, level, question_count):
+    """Generate a large quiz as several small ones at once and merge them.
+
+    Each chunk asks for a few spare questions and gets its own focus, so chunks cover
+    different ground; near-duplicates across chunks are dropped. Chunks that fail are
+    generated again (up to QUIZ_CHUNK_ATTEMPTS rounds) without redoing the others. If
+    some still fail, the quiz is served with the questions that were generated.
+    """
+    sizes = chunk_sizes(question_count)
+    focuses = [QUIZ_CHUNK_FOCUSES[index % len(QUIZ_CHUNK_FOCUSES)] for index in range(len(sizes))]
+    executor = get_executor('quiz-chunks', QUIZ_CHUNK_CONCURRENCY)
+    results = {}
+    pending = list(range(len(sizes)))
+    error = None
+    for attempt in range(QUIZ_CHUNK_ATTEMPTS):
+        if attempt:
+            logger.warning("Regenerating %s/%s failed quiz chunks for '%s'", len(pending), len(sizes), topic)
+            metrics.increment('quiz_chunk_retries', len(pending))
+        futures = {
+            executor.submit(create_single_quiz, topic, level, sizes[index] + QUIZ_CHUNK_SPARE, focuses[index]): index
+            for index in pending
+        }
+        failed = []
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except CircuitOpenError:
+                raise
+            except QuizGenerationError as e:
+                error = e
+                failed.append(futures[future])
+        pending = sorted(failed)
+        if not pending:
+            break
+    
+    if not results:
+        raise error
+    if pending:
+        metrics.increment('quiz_chunks_failed', len(pending))
+    
+    merged = [question for index in sorted(results) for question in results[index]['questions']]
+    unique = remove_near_duplicates(merged, QUIZ_DUPLICATE_THRESHOLD)
+    if len(unique) < len(merged):
+        metrics.increment('quiz_duplicates_removed', len(merged) - len(unique))
+    questions = unique[:question_count]
+    logger.info(
+        "Merged %s/%s quiz chunks for '%s' into %s/%s questions",
+        len(results), len(sizes), topic, len(questions), question_count
+    )
+    return {
+        "title": f"Quiz on {topic}",
+        "description": f"Test your knowledge of {topic} with these multiple-choice questions.",
+        "questions": questions,
+    }
+
+def _bank_sample(topic, level, question_count, session_id):
+    try:
+        return question_bank.sample(topic, level, question_count, session_id)
+    except Exception as e:
+        logger.error("Question bank lookup failed: %s", e)
+        return []
+
+def _bank_store(topic, level, questions, session_id, served_ids):
+    """Store generated questions and record what the session was served.
+
+    Returns the generated questions that are new to the session, i.e. not among
+    served_ids and not served to it by an earlier quiz.
+    """
+    try:
+        ids = question_bank.add(topic, level, questions)
+        if len(ids) != len(questions):  # bank disabled
+            return questions
+        seen = set(served_ids) | question_bank.served(session_id, ids)
+        fresh = []
+        for question_id, question in zip(ids, questions):
+            if question_id not in seen:
+                seen.add(question_id)
+                fresh.append((question_id, question))
+        question_bank.mark_served(session_id, served_ids + [question_id for question_id, _ in fresh])
+        return [question for _, question in fresh]
+    except Exception as e:
+        logger.error("Question bank update failed: %s", e)
+        return questions
+
+def assemble_quiz(topic, level, question_count, session_id=None):
+    """Build a quiz from banked questions, generating only the ones the bank is short of.
+
+    Raises QuizGenerationError or CircuitOpenError only if no banked question is available.
+    """
+    banked = _bank_sample(topic, level, question_count, session_id)
+    banked_ids = [question_id for question_id, _ in banked]
+    questions = [question for _, question in banked]
+    shortfall = question_count - len(questions)
+    
+    quiz_content = {
+        "title": f"Quiz on {topic}",
+        "description": f"Test your knowledge of {topic} with these multiple-choice questions.",
+    }
+    if shortfall <= 0:
+        metrics.increment('question_bank_quizzes', source='bank')
+        _bank_store(topic, level, [], session_id, banked_ids)
+        logger.info("Assembled quiz on '%s' from %s banked questions", topic, len(questions))
+        return {**quiz_content, "questions": questions}
+    
+    try:
+        generated = create_quiz(topic, level, shortfall)
+    except (QuizGenerationError, CircuitOpenError) as e:
+        if not questions:
+            raise
+        logger.warning("Serving %s/%s banked questions, generation failed: %s", len(questions), question_count, e)
+        metrics.increment('question_bank_quizzes', source='bank_partial')
+        _bank_store(topic, level, [], session_id, banked_ids)
+        return {**quiz_content, "questions": questions}
+    
+    # Generated questions can repeat banked or already-served ones; if nothing else is
+    # left, a quiz of repeats is still better than an empty one
+    fresh = _bank_store(topic, level, generated['questions'], session_id, banked_ids)
+    questions.extend(fresh or ([] if questions else generated['questions']))
+    
+    metrics.increment('question_bank_quizzes', source='mixed' if banked else 'generated')
+    if banked:
+        logger.info("Assembled quiz on '%s' from %s banked and %s generated questions", topic, len(banked), shortfall)
+        return {**quiz_content, "questions": questions}
+    return {**generated, "questions": questions}
+
+def session_id_from(data, req):
+    """Session used to avoid repeating banked questions: a session_id field or X-Session-Id header."""
+    session_id = data.get('session_id') or req.headers.get('X-Session-Id')
+    if not session_id:
+        return None
+    return str(session_id).strip()[:128] or None
+
+def quiz_cache_key(topic, level, question_count=PREFETCH_QUESTION_COUNT):
+    return make_cache_key('quiz', canonicalize_topic(topic), level, question_count)
+
+def take_prefetched_quiz(topic, level, question_count):
+    if not (PREFETCH_ENABLED and PREFETCH_QUIZZES):
+        return None
+    quiz_content, cache_key = lookup_topic(
+        quiz_cache, 'quiz', topic, lambda candidate: quiz_cache_key(candidate, level, question_count)
+    )
+    if quiz_content is not None:
+        quiz_cache.delete(cache_key)
+        prefetcher.mark_used(cache_key)
+    return quiz_content
+
+def prefetch_quiz(topic, level, cache_key):
+    if quiz_cache.peek(cache_key):
+        return False
+    quiz_content = create_quiz(topic, level, PREFETCH_QUESTION_COUNT)
+    quiz_cache.set(cache_key, quiz_content)
+    remember_topic('quiz', topic)
+    _bank_store(topic, level, quiz_content['questions'], None, [])
+    return True
+
+register_prefetch_handler('quiz', quiz_cache_key, prefetch_quiz)
+
+@quiz_bp.route('/generate-quiz', methods=['POST'])
+def generate_quiz():
+    start_time = time.time()
+    stage_start = time.perf_counter()
+    
+    try:
+        try:
+            data = request.get_json()
+            if not data:
+                return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+        except Exception:
+            return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+        
+        # Extract topic from request
+        if 'topic' in data:
+            topic = data['topic'].strip()
+        else:
+            return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
+        
+        # Extract question count or set default
+        question_count = parse_question_count(data.get('count', 5))
+        
+        # Determine difficulty level from user profile or default
+        level = resolve_level(data)
+        session_id = session_id_from(data, request)
+        metrics.observe_stage('quiz', 'request_parse', time.perf_counter() - stage_start)
             
-        # Remove level field from response if present
-        if 'level' in quiz_content:
-            del quiz_content['level']
+        prefetched_quiz = take_prefetched_quiz(topic, level, question_count)
+        if prefetched_quiz is not None:
+            logger.info("Serving prefetched quiz on '%s', level: '%s'", topic, level)
+            return jsonify(prefetched_quiz), 200
+        
+        logger.info("Generating quiz on '%s', level: '%s', questions: %s", topic, level, question_count)
+        
+        try:
+            quiz_content = assemble_quiz(topic, level, question_count, session_id)
+        except CircuitOpenError as e:
+            return circuit_open_response(e)
+        except QuizGenerationError as e:
+            return jsonify(e.to_dict()), e.status_code
             
         processing_time = time.time() - start_time
-        logger.info(f"Successfully generated quiz in {processing_time:.2f}s")
+        logger.info("Successfully generated quiz in %.2fs", processing_time)
         
         return jsonify(quiz_content), 200
             
     except Exception as e:
-        logger.error(f"Unexpected error in generate_quiz: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Unexpected error in generate_quiz: %s", e, exc_info=True)
         
         return jsonify({
             "error": ERROR_MESSAGES['server_error'],
             "message": "An unexpected error occurred. Please try again later."
-        }), 500
\ No newline at end of file
+        }), 500
+
+def _batch_item(index, topic, level, question_count, session_id=None):
+    """Generate one topic of a batch; failures are reported in the item instead of raised."""
+    item = {"index": index, "topic": topic}
+    try:
+        item["quiz"] = assemble_quiz(topic, level, question_count, session_id)
+        item["status"] = "ok"
+    except CircuitOpenError as e:
+        item.update(status="error", error=ERROR_MESSAGES['service_unavailable'], message=str(e))
+    except QuizGenerationError as e:
+        item.update(status="error", **e.to_dict())
+    except Exception as e:
+        logger.error("Unexpected error generating batch quiz for '%s': %s", topic, e, exc_info=True)
+        item.update(status="error", error=ERROR_MESSAGES['server_error'],
+                    message="An unexpected error occurred. Please try again later.")
+    return item
+
+def _wants_ndjson(req):
+    if req.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'application/x-ndjson' in req.headers.get('Accept', '')
+
+@quiz_bp.route('/generate-quiz/batch', methods=['POST'])
+def generate_quiz_batch():
+    """Generate quizzes for many topics in one (singly rate-limited) request."""
+    start_time = time.time()
+    
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+    except Exception:
+        return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+    
+    topics = data.get('topics')
+    if not isinstance(topics, list) or not topics:
+        return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
+    topics = [str(topic).strip() for topic in topics if str(topic).strip()]
+    if not topics:
+        return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
+    if len(topics) > QUIZ_BATCH_MAX_TOPICS:
+        return jsonify({
+            "error": f"Too many topics: at most {QUIZ_BATCH_MAX_TOPICS} per batch",
+            "message": "Split the topics into several batches."
+        }), 400
+    
+    try:
+        question_count = parse_question_count(data.get('count', 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+    level = resolve_level(data)
+    session_id = session_id_from(data, request)
+    
+    logger.info("Generating quiz batch of %s topics, level: '%s', questions: %s", len(topics), level, question_count)
+    
+    # One shared pool bounds upstream concurrency across all batches in this process
+    executor = get_executor('quiz-batch', QUIZ_BATCH_CONCURRENCY)
+    futures = [
+        executor.submit(_batch_item, index, topic, level, question_count, session_id)
+        for index, topic in enumerate(topics)
+    ]
+    
+    if _wants_ndjson(request):
+        def stream_results():
+            for future in as_completed(futures):
+                yield json.dumps(future.result()) + "\n"
+            logger.info("Streamed quiz batch of %s topics in %.2fs", len(topics), time.time() - start_time)
+        
+        return Response(stream_with_context(stream_results()), mimetype='application/x-ndjson')
+    
+    results = [future.result() for future in futures]
+    succeeded = sum(1 for item in results if item["status"] == "ok")
+    
+    processing_time = time.time() - start_time
+    logger.info("Generated quiz batch: %s/%s topics succeeded in %.2fs", succeeded, len(results), processing_time)
+    
+    return jsonify({
+        "level": level,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }), 200
@@ -1,35 +1,63 @@
 from flask import Blueprint, request, jsonify
 import logging
 import time
-import traceback
 from app.models.gemini_model import generate_content
-from app.utils.helpers import parse_ai_json, validate_roadmap, retry_on_exception
-from app.config.config import ERROR_MESSAGES
+from app.models.schemas import ROADMAP_SCHEMA
+from app.models.generation_profiles import generation_config_for
+from app.utils import metrics
+from app.utils.helpers import parse_ai_json, validate_roadmap, circuit_open_response
+from app.utils.http_cache import mark_cacheable
+from app.utils.resilience import CircuitOpenError
+from app.utils.structured_logging import log_payload
+from app.utils.cache import get_cache, make_cache_key
+from app.utils.prefetch import prefetch_roadmap_topics
+from app.utils.topics import canonicalize_topic, lookup_topic, remember_topic
+from app.config.config import ERROR_MESSAGES, STRUCTURED_OUTPUT_ENABLED
 
 roadmap_bp = Blueprint('roadmap', __name__)
 logger = logging.getLogger(__name__)
+roadmap_cache = get_cache('roadmap')
 
-@roadmap_bp.route('/generate-roadmap', methods=['POST'])
-def generate_roadmap():
-    start_time = time.time()
+MIN_MODULES = 3
+MAX_MODULES = 12
+
+def parse_module_count(value):
+    return min(max(int(value), MIN_MODULES), MAX_MODULES)
+
+def lookup_cached_roadmap(course_title, level, module_count=None):
+    """Cached roadmap for the course (or a near-duplicate title); returns (roadmap or None, cache_key)."""
+    # Roadmaps without an explicit module count keep their original cache keys
+    key_parts = (level,) if module_count is None else (level, module_count)
+    return lookup_topic(
+        roadmap_cache, 'roadmap', course_title,
+        lambda topic: make_cache_key('roadmap', canonicalize_topic(topic), *key_parts)
+    )
+
+def build_roadmap_prompt(course_title, level, module_count=None):
+    if module_count:
+        module_instruction = f"Exactly {module_count} modules with relevant topics for each module"
+    else:
+        module_instruction = "At least 4-6 modules with relevant topics for each module"
     
-    try:
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
-        except Exception:
-            return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+    if STRUCTURED_OUTPUT_ENABLED:
+        # The response schema carries the structure, so no inline JSON example is needed
+        return f"""
+        Generate a structured course roadmap for a {level} level course titled "{course_title}".
         
-        if not data or 'course_title' not in data or 'level' not in data:
-            return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
-            
-        course_title = data['course_title'].strip()
-        level = data['level'].strip()
-
-        logger.info(f"Generating roadmap for course: '{course_title}', level: '{level}'")
+        Return a JSON object with the fields course_title, description, level, duration and modules,
+        where each module has a module_title and a list of topics.
+        
+        Make sure to include:
+        1. A descriptive title matching the input course_title
+        2. A concise but informative description
+        3. The correct level as provided in the input
+        4. A realistic duration (e.g., "3 months", "6 weeks")
+        5. {module_instruction}
         
-        prompt = f"""
+        The modules should follow a logical progression and cover all essential topics for a {level} level {course_title} course.
+        """
+    
+    return f"""
         Generate a structured course roadmap for a {level} level course titled "{course_title}".
         
         The response should be in valid JSON format with the following structure:
@@ -46,47 +74,128 @@ def generate_roadmap():
         2. A concise but informative description
         3. The correct level as provided in the input
         4. A realistic duration (e.g., "3 months", "6 weeks")
-        5. At least 4-6 modules with relevant topics for each module
+        5. {module_instruction}
         
         The modules should follow a logical progression and cover all essential topics for a {level} level {course_title} course.
         
         IMPORTANT: The response must be valid JSON without any markdown formatting, code blocks, or extra text.
         """
+
+@roadmap_bp.route('/generate-roadmap', methods=['POST'])
+def generate_roadmap():
+    start_time = time.time()
+    stage_start = time.perf_counter()
+    
+    try:
+        try:
+            data = request.get_json()
+            if not data:
+                return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+        except Exception:
+            return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+        
+        if not data or 'course_title' not in data or 'level' not in data:
+            return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
+            
+        course_title = data['course_title'].strip()
+        level = data['level'].strip()
+        module_count = None
+        if data.get('module_count') is not None:
+            try:
+                module_count = parse_module_count(data['module_count'])
+            except (TypeError, ValueError):
+                return jsonify({"error": ERROR_MESSAGES['invalid_json']}), 400
+        metrics.observe_stage('roadmap', 'request_parse', time.perf_counter() - stage_start)
+
+        cached_roadmap, cache_key = lookup_cached_roadmap(course_title, level, module_count)
+        if cached_roadmap is not None:
+            logger.info("Serving cached roadmap for course: '%s', level: '%s'", course_title, level)
+            mark_cacheable(cache_key)
+            return jsonify(cached_roadmap), 200
+
+        logger.info("Generating roadmap for course: '%s', level: '%s'", course_title, level)
         
+        stage_start = time.perf_counter()
+        prompt = build_roadmap_prompt(course_title, level, module_count)
+        metrics.observe_stage('roadmap', 'prompt_build', time.perf_counter() - stage_start)
+        
+        stage_start = time.perf_counter()
         try:
-            response_text = generate_content(prompt)
+            response_text = generate_content(
+                prompt, response_schema=ROADMAP_SCHEMA,
+                generation_config=generation_config_for('roadmap', module_count), route='roadmap'
+            )
+        except CircuitOpenError as e:
+            return circuit_open_response(e)
         except Exception:
             return jsonify({
                 "error": ERROR_MESSAGES['ai_generation_failed'],
                 "message": "Our AI service is currently experiencing issues. Please try again in a few minutes."
             }), 503
+        finally:
+            metrics.observe_stage('roadmap', 'gemini_call', time.perf_counter() - stage_start)
         
+        stage_start = time.perf_counter()
         try:
             roadmap = parse_ai_json(response_text)
         except Exception as e:
-            logger.error(f"JSON parsing error: {str(e)}\nResponse: {response_text}")
+            logger.error("JSON parsing error: %s", e)
+            log_payload(logger, logging.ERROR, "Response", response_text)
             return jsonify({
                 "error": ERROR_MESSAGES['json_parse_error'],
                 "message": "We encountered an issue processing the AI response. Please try again."
             }), 500
+        finally:
+            metrics.observe_stage('roadmap', 'json_parse', time.perf_counter() - stage_start)
         
+        stage_start = time.perf_counter()
         is_valid, validation_error = validate_roadmap(roadmap)
+        metrics.observe_stage('roadmap', 'validation', time.perf_counter() - stage_start)
         if not is_valid:
-            logger.warning(f"Invalid roadmap structure: {validation_error}\nRoadmap: {roadmap}")
+            logger.warning("Invalid roadmap structure: %s", validation_error)
+            log_payload(logger, logging.WARNING, "Roadmap", roadmap)
             return jsonify({
                 "error": "Generated roadmap is incomplete",
                 "message": "Please try again. If the issue persists, try with different input parameters."
             }), 500
         
+        roadmap_cache.set(cache_key, roadmap)
+        remember_topic('roadmap', course_title)
+        prefetch_roadmap_topics(roadmap, level)
+        
         processing_time = time.time() - start_time
-        logger.info(f"Successfully generated roadmap in {processing_time:.2f}s")
+        logger.info("Successfully generated roadmap in %.2fs", processing_time)
         
+        mark_cacheable(cache_key)
         return jsonify(roadmap), 200
             
     except Exception as e:
-        logger.error(f"Unexpected error in generate_roadmap: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Unexpected error in generate_roadmap: %s", e, exc_info=True)
         
         return jsonify({
             "error": ERROR_MESSAGES['server_error'],
             "message": "An unexpected error occurred. Please try again later."
         }), 500
+
+@roadmap_bp.route('/generate-roadmap', methods=['GET'])
+def get_cached_roadmap():
+    """Cache-only lookup of a roadmap generated earlier; answers If-None-Match with 304."""
+    course_title = request.args.get('course_title', '').strip()
+    level = request.args.get('level', '').strip()
+    if not course_title or not level:
+        return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
+    module_count = None
+    if request.args.get('module_count'):
+        try:
+            module_count = parse_module_count(request.args['module_count'])
+        except ValueError:
+            return jsonify({"error": ERROR_MESSAGES['missing_fields']}), 400
+    
+    cached_roadmap, cache_key = lookup_cached_roadmap(course_title, level, module_count)
+    if cached_roadmap is None:
+        return jsonify({
+            "error": "Roadmap not found",
+            "message": "No roadmap has been generated for these parameters yet. Generate one with POST first."
+        }), 404
+    mark_cacheable(cache_key)
+    return jsonify(cached_roadmap), 200
@@ -1,4 +1,6 @@
+import json
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,6 +9,32 @@ ENV = os.getenv('FLASK_ENV', 'development')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY", "")
 
+def _key_list(name, single_key):
+    keys = [key.strip() for key in os.getenv(name, '').split(',') if key.strip()]
+    return keys or ([single_key] if single_key else [])
+
+# Comma-separated key pools; calls are balanced across keys (least used first)
+GEMINI_API_KEYS = _key_list('GEMINI_API_KEYS', GEMINI_API_KEY)
+YOUTUBE_API_KEYS = _key_list('YOUTUBE_API_KEYS', YOUTUBE_API_KEY)
+# Per-key quotas, 0 for unlimited. Daily quotas roll over at UTC midnight
+GEMINI_KEY_RPM = int(os.getenv('GEMINI_KEY_RPM', 0))
+GEMINI_KEY_TPM = int(os.getenv('GEMINI_KEY_TPM', 0))
+GEMINI_KEY_RPD = int(os.getenv('GEMINI_KEY_RPD', 0))
+YOUTUBE_KEY_UNITS_PER_DAY = int(os.getenv('YOUTUBE_KEY_UNITS_PER_DAY', 10000))
+YOUTUBE_SEARCH_COST = 100  # quota units per search.list call
+KEY_COOLDOWN = float(os.getenv('KEY_COOLDOWN', 60))  # seconds a key is parked after a 429
+# Serve canned responses instead of calling Gemini (offline development and testing)
+GEMINI_FAKE_MODEL = os.getenv('GEMINI_FAKE_MODEL', 'false').lower() == 'true'
+
+DEFAULT_MODEL_NAME = 'gemini-2.0-flash'
+# Build the Gemini client while the app starts instead of on the first request
+GEMINI_WARMUP = os.getenv('GEMINI_WARMUP', 'false').lower() == 'true'
+# Log import, app creation and first-request timings, and serve them at /health/startup
+STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', 'false').lower() == 'true'
+
+# Ask Gemini for schema-constrained JSON on the quiz and roadmap endpoints
+STRUCTURED_OUTPUT_ENABLED = os.getenv('STRUCTURED_OUTPUT_ENABLED', 'true').lower() == 'true'
+
 GENERATION_CONFIG = {
     "temperature": 0.7,
     "top_p": 0.95,
@@ -14,8 +42,29 @@ GENERATION_CONFIG = {
     "max_output_tokens": 1024,
 }
 
+# Per-endpoint output budgets: max_output_tokens = base_tokens + tokens_per_unit * units, rounded
+# up to a multiple of 256 and capped at max_tokens. Units are modules for roadmaps, depth
+# (1 brief, 2 standard, 3 detailed) for content and questions for quizzes.
+GENERATION_PROFILES = {
+    'roadmap': {'base_tokens': 384, 'tokens_per_unit': 128, 'default_units': 6, 'max_tokens': 4096},
+    'content': {'base_tokens': 512, 'tokens_per_unit': 768, 'default_units': 2, 'max_tokens': 8192},
+    # Sectioned content: a compact outline, then one call per section
+    'content_outline': {'base_tokens': 384, 'tokens_per_unit': 128, 'default_units': 2, 'max_tokens': 2048},
+    'content_section': {'base_tokens': 256, 'tokens_per_unit': 384, 'default_units': 2, 'max_tokens': 4096},
+    'quiz': {'base_tokens': 256, 'tokens_per_unit': 192, 'default_units': 5, 'max_tokens': 8192},
+}
+# When a response stops at max_output_tokens, ask for the rest instead of regenerating it
+GENERATION_CONTINUATION_ENABLED = os.getenv('GENERATION_CONTINUATION_ENABLED', 'true').lower() == 'true'
+GENERATION_MAX_CONTINUATIONS = int(os.getenv('GENERATION_MAX_CONTINUATIONS', 2))
+
 MAX_RETRIES = 3
-RETRY_DELAY = 2
+RETRY_DELAY = 2  # base delay for exponential backoff with full jitter
+RETRY_MAX_DELAY = 8
+# Total time a request may spend on retries, measured from when it arrived
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', 25))
+
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5))
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_BREAKER_RECOVERY_TIMEOUT', 30))
 
 ERROR_MESSAGES = {
     'missing_fields': 'Missing required fields in request',
@@ -27,5 +76,150 @@ ERROR_MESSAGES = {
     'service_unavailable': 'Service temporarily unavailable. Please try again later.',
 }
 
-RATE_LIMIT_WINDOW = 60
-MAX_REQUESTS_PER_WINDOW = 10
+# Thread pool for the content endpoint's YouTube lookups, which run while the request thread generates
+IO_POOL_WORKERS = int(os.getenv('IO_POOL_WORKERS', 16))
+CONTENT_GENERATION_DEADLINE = float(os.getenv('CONTENT_GENERATION_DEADLINE', 60))
+YOUTUBE_FETCH_DEADLINE = float(os.getenv('YOUTUBE_FETCH_DEADLINE', 3))
+# 'single' asks for the whole tutorial in one call; 'sections' asks for an outline, then
+# writes its sections in parallel. Requests can pick either with "mode"
+CONTENT_DEFAULT_MODE = os.getenv('CONTENT_DEFAULT_MODE', 'single')
+CONTENT_MAX_SECTIONS = int(os.getenv('CONTENT_MAX_SECTIONS', 8))
+# One shared pool bounds concurrent section calls across all requests in this process
+CONTENT_SECTION_CONCURRENCY = int(os.getenv('CONTENT_SECTION_CONCURRENCY', 32))
+
+# YouTube Data API client: one keep-alive session, results cached per canonical topic
+YOUTUBE_API_URL = os.getenv('YOUTUBE_API_URL', 'https://www.googleapis.com/youtube/v3')
+YOUTUBE_POOL_SIZE = int(os.getenv('YOUTUBE_POOL_SIZE', 8))  # connections kept open, and batch lookups run at once
+YOUTUBE_RETRIES = int(os.getenv('YOUTUBE_RETRIES', 2))  # for connection errors and 5xx
+YOUTUBE_TIMEOUT = float(os.getenv('YOUTUBE_TIMEOUT', 3))
+YOUTUBE_CACHE_TTL = int(os.getenv('YOUTUBE_CACHE_TTL', 7 * 24 * 60 * 60))
+YOUTUBE_NEGATIVE_CACHE_TTL = int(os.getenv('YOUTUBE_NEGATIVE_CACHE_TTL', 60 * 60))  # for searches with no videos
+
+QUIZ_BATCH_MAX_TOPICS = int(os.getenv('QUIZ_BATCH_MAX_TOPICS', 30))
+QUIZ_BATCH_CONCURRENCY = int(os.getenv('QUIZ_BATCH_CONCURRENCY', 4))
+# Quizzes of more than QUIZ_CHUNK_SIZE questions are generated as several smaller quizzes at once
+QUIZ_CHUNKING_ENABLED = os.getenv('QUIZ_CHUNKING_ENABLED', 'true').lower() == 'true'
+QUIZ_CHUNK_SIZE = int(os.getenv('QUIZ_CHUNK_SIZE', 5))
+QUIZ_CHUNK_SPARE = int(os.getenv('QUIZ_CHUNK_SPARE', 1))  # extra questions per chunk, to make up for duplicates
+QUIZ_CHUNK_ATTEMPTS = int(os.getenv('QUIZ_CHUNK_ATTEMPTS', 2))  # rounds of generation for chunks that failed
+QUIZ_CHUNK_CONCURRENCY = int(os.getenv('QUIZ_CHUNK_CONCURRENCY', 32))  # shared by all requests in this process
+QUIZ_DUPLICATE_THRESHOLD = float(os.getenv('QUIZ_DUPLICATE_THRESHOLD', 0.7))  # trigram Jaccard similarity
+
+RATE_LIMIT_WINDOW = int(os.getenv('RATE_LIMIT_WINDOW', 60))
+MAX_REQUESTS_PER_WINDOW = int(os.getenv('MAX_REQUESTS_PER_WINDOW', 10))
+RATE_LIMIT_ALGORITHM = os.getenv('RATE_LIMIT_ALGORITHM', 'sliding_window')  # or 'token_bucket'
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # 'sqlite' shares limits across workers
+RATE_LIMIT_DB_PATH = os.getenv('RATE_LIMIT_DB_PATH', os.path.join(tempfile.gettempdir(), 'atomic_rate_limits.sqlite3'))
+# Proxies in front of the app that append to X-Forwarded-For (0 ignores the header)
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 1))
+
+CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', os.path.join(tempfile.gettempdir(), 'atomic_cache.sqlite3'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1000))
+CACHE_TTL = int(os.getenv('CACHE_TTL', 24 * 60 * 60))
+
+# Bump a version whenever the matching prompt changes so stale cache entries are ignored
+PROMPT_VERSIONS = {
+    'roadmap': 'v2',
+    'content': 'v1',
+    'quiz': 'v1',
+}
+
+# Validated quiz questions are kept in an SQLite question bank (with an FTS5 index) and reused;
+# Gemini only generates the questions the bank is short of
+QUESTION_BANK_ENABLED = os.getenv('QUESTION_BANK_ENABLED', 'true').lower() == 'true'
+QUESTION_BANK_DB_PATH = os.getenv('QUESTION_BANK_DB_PATH', os.path.join(tempfile.gettempdir(), 'atomic_questions.sqlite3'))
+QUESTION_BANK_SESSION_TTL = int(os.getenv('QUESTION_BANK_SESSION_TTL', 7 * 24 * 60 * 60))  # remember served questions
+
+# Topic canonicalization and near-duplicate matching for cache lookups. Aliases expand
+# abbreviations before filler words are dropped; TOPIC_ALIASES_FILE (JSON) adds to them.
+TOPIC_ALIASES = {
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'dl': 'deep learning',
+    'nlp': 'natural language processing',
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'k8s': 'kubernetes',
+    'dsa': 'data structures and algorithms',
+    'oop': 'object oriented programming',
+    'db': 'database',
+    'dbs': 'databases',
+}
+TOPIC_ALIASES_FILE = os.getenv('TOPIC_ALIASES_FILE')
+TOPIC_FILLER_WORDS = os.getenv(
+    'TOPIC_FILLER_WORDS',
+    'intro,introduction,to,basics,fundamentals,of,the,beginner,beginners,tutorial,course,101,getting,started,learn'
+).split(',')
+# Serve cached results to near-duplicate topics (opt-in: similar-looking titles can be different subjects)
+TOPIC_SIMILARITY_ENABLED = os.getenv('TOPIC_SIMILARITY_ENABLED', 'false').lower() == 'true'
+TOPIC_SIMILARITY_THRESHOLD = float(os.getenv('TOPIC_SIMILARITY_THRESHOLD', 0.8))  # trigram Jaccard
+TOPIC_INDEX_MAX_ENTRIES = int(os.getenv('TOPIC_INDEX_MAX_ENTRIES', 10000))
+
+# Background generation of content (and optionally quizzes) for a new roadmap's first topics.
+# Needs a long-lived process; serverless platforms freeze threads once the response is sent.
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'false').lower() == 'true'
+PREFETCH_TOPICS = int(os.getenv('PREFETCH_TOPICS', 3))
+PREFETCH_QUIZZES = os.getenv('PREFETCH_QUIZZES', 'false').lower() == 'true'
+PREFETCH_WORKERS = int(os.getenv('PREFETCH_WORKERS', 2))
+PREFETCH_MAX_PENDING = int(os.getenv('PREFETCH_MAX_PENDING', 100))
+PREFETCH_BUDGET_PER_HOUR = int(os.getenv('PREFETCH_BUDGET_PER_HOUR', 200))
+# Prefetch only runs while at most this many live requests are in flight...
+PREFETCH_MAX_LIVE_REQUESTS = int(os.getenv('PREFETCH_MAX_LIVE_REQUESTS', 1))
+# ...and is dropped if it has waited longer than this for live traffic to quiet down
+PREFETCH_MAX_DEFER = float(os.getenv('PREFETCH_MAX_DEFER', 30))
+
+# Asynchronous jobs: POST a generation endpoint with ?async=1 to get a 202 and a job id,
+# then poll /api/jobs/<id>. Like prefetching, jobs need a long-lived process: serverless
+# platforms such as Vercel freeze the worker threads once the 202 is sent, so this is opt-in.
+JOBS_ENABLED = os.getenv('JOBS_ENABLED', 'false').lower() == 'true'
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', 100))  # queued + running jobs per process
+JOB_STORE = os.getenv('JOB_STORE', 'memory')  # 'memory' or 'sqlite'
+JOB_DB_PATH = os.getenv('JOB_DB_PATH', os.path.join(tempfile.gettempdir(), 'atomic_jobs.sqlite3'))
+JOB_TTL = int(os.getenv('JOB_TTL', 60 * 60))  # how long finished jobs can be polled
+JOB_MAX_ENTRIES = int(os.getenv('JOB_MAX_ENTRIES', 10000))
+JOB_CALLBACK_TIMEOUT = float(os.getenv('JOB_CALLBACK_TIMEOUT', 5))
+JOB_CALLBACK_ATTEMPTS = int(os.getenv('JOB_CALLBACK_ATTEMPTS', 3))
+# Callbacks only go to hosts that resolve to public addresses; with an allowlist, only to those hosts
+JOB_CALLBACK_ALLOWED_HOSTS = [host.strip().lower() for host in os.getenv('JOB_CALLBACK_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+# Response compression (gzip, and brotli when the `brotli` package is installed)
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # bytes; smaller bodies are sent as-is
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))  # gzip 1-9
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))  # brotli 0-11
+# Compressed bodies of cached results, reused while the result (and its ETag) is unchanged
+COMPRESSION_CACHE_ENTRIES = int(os.getenv('COMPRESSION_CACHE_ENTRIES', 512))
+
+# Logging: records are queued by request threads and written by a background thread
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' (one object per line) or 'text'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))  # records beyond this are dropped, not waited on
+LOG_MAX_MESSAGE_CHARS = int(os.getenv('LOG_MAX_MESSAGE_CHARS', 4000))
+# Model output logged on parse/validation failures: truncated, and optionally only a sample of it
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv('LOG_PAYLOAD_MAX_CHARS', 500))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 1.0))
+
+# Model routing: each endpoint tries its models in order, skipping ones with a high recent
+# error rate. JSON, e.g. {"quiz": ["gemini-2.0-flash", "gemini-1.5-flash"]}; 'default' covers the rest.
+MODEL_ROUTES = {
+    'default': [DEFAULT_MODEL_NAME],
+    **json.loads(os.getenv('MODEL_ROUTES', '{}')),
+}
+MODEL_STATS_WINDOW = int(os.getenv('MODEL_STATS_WINDOW', 200))  # recent calls kept per route and model
+MODEL_MAX_ERROR_RATE = float(os.getenv('MODEL_MAX_ERROR_RATE', 0.5))  # above this a model is tried last
+# Hedging: if a call hasn't answered by the route's HEDGE_PERCENTILE latency, send a second one to the
+# route's next model and take whichever valid response comes first
+HEDGING_ENABLED = os.getenv('HEDGING_ENABLED', 'true').lower() == 'true'
+# Routes with a single model are only hedged (with a second call to that model) when this is set
+HEDGE_SAME_MODEL = os.getenv('HEDGE_SAME_MODEL', 'false').lower() == 'true'
+# Threads for calls that may be hedged; when all are busy, calls run unhedged on the request thread
+GEMINI_CALL_WORKERS = int(os.getenv('GEMINI_CALL_WORKERS', 64))
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 0.95))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', 20))  # before this, wait HEDGE_DEFAULT_DELAY
+HEDGE_DEFAULT_DELAY = float(os.getenv('HEDGE_DEFAULT_DELAY', 8.0))
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.5))
+HEDGE_MAX_RATIO = float(os.getenv('HEDGE_MAX_RATIO', 0.1))  # hedges per call, so slow upstreams aren't doubled
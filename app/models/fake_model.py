@@ -0,0 +1,269 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+
+FAKE_MARKDOWN = """# Introduction
+
+## Overview
+This tutorial walks through the fundamentals step by step.
+
+## Key Sections
+### Getting Started
+- Install the tooling
+- Run your first example
+
+```python
+print("hello")
+```
+
+## Practice Exercises
+- Build a small project
+
+## Additional Resources
+- Official documentation
+"""
+
+FAKE_SECTION = """This section explains the idea with a short example.
+
+```python
+print("section")
+```
+
+- Key point one
+- Key point two
+"""
+
+FAKE_OUTLINE = {
+    "title": "Sample Tutorial",
+    "estimated_time": "1 hour",
+    "overview": "A sample outline produced by the fake model.",
+    "about": "Background for the sample tutorial.",
+    "sections": [
+        {"section_title": "Getting Started", "summary": "Install the tooling and run a first example."},
+        {"section_title": "Core Concepts", "summary": "The main ideas, one at a time."},
+        {"section_title": "Putting It Together", "summary": "A small end-to-end example."},
+    ],
+    "practice_exercises": ["Build a small project"],
+    "additional_resources": ["Official documentation"],
+}
+
+FAKE_ROADMAP = {
+    "course_title": "Sample Course",
+    "description": "A sample roadmap produced by the fake model.",
+    "level": "Beginner",
+    "duration": "3 months",
+    "modules": [
+        {"module_title": "Foundations", "topics": ["Basics", "Tooling", "First Project"]},
+        {"module_title": "Next Steps", "topics": ["Patterns", "Testing", "Deployment"]},
+    ],
+}
+
+_QUESTION_COUNT = re.compile(r'with (\d+) multiple-choice questions')
+
+# Question wording for fake quizzes; random picks of a few words rarely look alike
+FAKE_WORDS = (
+    'arrays', 'buffers', 'caching', 'closures', 'compilers', 'concurrency', 'debugging', 'deployment',
+    'encoding', 'errors', 'events', 'functions', 'generics', 'hashing', 'indexes', 'inheritance',
+    'iterators', 'lambdas', 'logging', 'loops', 'memory', 'modules', 'networking', 'objects',
+    'packages', 'parsing', 'pointers', 'profiling', 'queues', 'recursion', 'references', 'scheduling',
+    'scopes', 'sorting', 'streams', 'strings', 'testing', 'threads', 'types', 'variables',
+)
+
+FAKE_QUIZ = {
+    "title": "Sample Quiz",
+    "description": "A sample quiz produced by the fake model.",
+    "level": "Beginner",
+    "questions": [
+        {
+            "question": "Which option is correct?",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "correct_answer": "Option B",
+            "explanation": "Option B is the canned answer.",
+        }
+    ],
+}
+
+def _fake_quiz(prompt):
+    """FAKE_QUIZ with as many questions as the prompt asks for, worded differently per prompt."""
+    match = _QUESTION_COUNT.search(prompt)
+    if not match:
+        return FAKE_QUIZ
+    rng = random.Random(prompt)
+    template = FAKE_QUIZ["questions"][0]
+    questions = [
+        {**template, "question": f"Which option is correct about {' '.join(rng.sample(FAKE_WORDS, 4))}?"}
+        for _ in range(int(match.group(1)))
+    ]
+    return {**FAKE_QUIZ, "questions": questions}
+
+def _malform(text, rng):
+    """Damage JSON the way LLMs do, so parse_ai_json's repair paths get exercised."""
+    fault = rng.choice(('trailing_comma', 'truncated', 'fenced', 'unescaped_quote'))
+    if fault == 'trailing_comma':
+        return text[:-1] + ',}'
+    if fault == 'truncated':
+        return text[:int(len(text) * 0.7)]
+    if fault == 'fenced':
+        return "Here is the JSON you asked for:\n```json\n" + text + "\n```"
+    return text.replace('sample', 'sample "quoted"', 1)
+
+class FakeBehaviour:
+    """Shared, seeded knobs for the fake model: latency distribution, failures and malformed JSON.
+
+    latency is one of ('constant', seconds), ('uniform', low, high),
+    ('lognormal', median_seconds, sigma) or ('tail', median_seconds, sigma, tail_probability,
+    tail_seconds), a lognormal body with rare very slow calls. model_latency maps a model
+    name to its own latency spec. fail_prompts maps a prompt substring to how many calls
+    whose prompt contains it fail before they start succeeding.
+    """
+
+    def __init__(self):
+        self.configure()
+
+    def configure(self, latency=('constant', 0.0), failure_rate=0.0, malformed_json_rate=0.0, seed=0,
+                  model_latency=None, seconds_per_token=0.0, malformed_per_1k_tokens=0.0, fail_prompts=None):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.failure_rate = failure_rate
+        self.malformed_json_rate = malformed_json_rate
+        self.seconds_per_token = seconds_per_token
+        self.malformed_per_1k_tokens = malformed_per_1k_tokens
+        self.fail_prompts = dict(fail_prompts or {})
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.malformed = 0
+
+    def _scripted_failure(self, prompt):
+        for text, remaining in self.fail_prompts.items():
+            if remaining and text in prompt:
+                self.fail_prompts[text] = remaining - 1
+                return True
+        return False
+
+    def draw(self, model_name=None, output_tokens=0, prompt=''):
+        """Return (delay_seconds, fail, malformed, rng) for one upstream call.
+
+        Longer outputs take longer (seconds_per_token) and are more likely to come back
+        malformed (malformed_per_1k_tokens), as long generations are in practice.
+        """
+        with self._lock:
+            self.calls += 1
+            latency = self.model_latency.get(model_name, self.latency)
+            kind = latency[0]
+            if kind == 'uniform':
+                delay = self._rng.uniform(latency[1], latency[2])
+            elif kind in ('lognormal', 'tail'):
+                delay = self._rng.lognormvariate(math.log(latency[1]), latency[2])
+                if kind == 'tail' and self._rng.random() < latency[3]:
+                    delay = latency[4]
+            else:
+                delay = latency[1]
+            delay += self.seconds_per_token * output_tokens
+            intact = (1 - self.malformed_json_rate) * (1 - self.malformed_per_1k_tokens) ** (output_tokens / 1000)
+            fail = self._rng.random() < self.failure_rate or self._scripted_failure(prompt)
+            malformed = not fail and self._rng.random() >= intact
+            self.failures += fail
+            self.malformed += malformed
+            return delay, fail, malformed, random.Random(self._rng.random())
+
+behaviour = FakeBehaviour()
+
+def configure_fake_model(**kwargs):
+    """Reconfigure (and reset the counters of) every FakeGenerativeModel."""
+    behaviour.configure(**kwargs)
+
+# Rough size of a token, used to apply max_output_tokens to canned responses
+CHARS_PER_TOKEN = 4
+
+class FakeCandidate:
+    def __init__(self, finish_reason):
+        self.finish_reason = finish_reason
+
+class FakeUsage:
+    def __init__(self, total_token_count):
+        self.total_token_count = total_token_count
+
+class FakeResponse:
+    def __init__(self, text, finish_reason='STOP', total_tokens=None):
+        self.text = text
+        self.candidates = [FakeCandidate(finish_reason)]
+        tokens = len(text) // CHARS_PER_TOKEN if total_tokens is None else total_tokens
+        self.usage_metadata = FakeUsage(tokens)
+
+class FakeGenerativeModel:
+    """Offline stand-in for genai.GenerativeModel that returns canned responses."""
+
+    chunk_size = 40
+    chunk_delay = 0.0
+
+    def __init__(self, model_name, generation_config=None):
+        self.model_name = model_name
+        self.generation_config = generation_config
+
+    def _respond(self, prompt):
+        if 'DO NOT return JSON' in prompt:
+            return FAKE_SECTION if 'Write only the body of' in prompt else FAKE_MARKDOWN
+        if 'roadmap' in prompt.lower():
+            return json.dumps(FAKE_ROADMAP)
+        if 'tutorial outline' in prompt.lower():
+            return json.dumps(FAKE_OUTLINE)
+        return json.dumps(_fake_quiz(prompt))
+
+    @staticmethod
+    def _prompt(contents):
+        return contents if isinstance(contents, str) else contents[0]['parts'][0]
+
+    def _respond_to_contents(self, contents):
+        """Plain prompts get the canned answer; a continuation gets the rest of it."""
+        if isinstance(contents, str):
+            return self._respond(contents)
+        prompt = self._prompt(contents)
+        already = ''.join(turn['parts'][0] for turn in contents if turn['role'] == 'model')
+        text = self._respond(prompt)
+        return text[len(already):] if text.startswith(already) else ''
+
+    def effective_config(self, generation_config=None):
+        """The config a call runs with: the per-call one merged over the model's, as the SDK does."""
+        return {**(self.generation_config or {}), **(generation_config or {})}
+
+    def _limit(self, text, generation_config):
+        config = self.effective_config(generation_config)
+        max_tokens = config.get('max_output_tokens')
+        if max_tokens and len(text) > max_tokens * CHARS_PER_TOKEN:
+            return text[:max_tokens * CHARS_PER_TOKEN], 'MAX_TOKENS'
+        return text, 'STOP'
+
+    def _stream(self, text, finish_reason, delay):
+        chunk_count = max(1, math.ceil(len(text) / self.chunk_size))
+        for start in range(0, len(text), self.chunk_size):
+            pause = self.chunk_delay or delay / chunk_count
+            if pause:
+                time.sleep(pause)
+            end = start + self.chunk_size
+            yield FakeResponse(
+                text[start:end], finish_reason if end >= len(text) else None, min(end, len(text)) // CHARS_PER_TOKEN
+            )
+
+    def generate_content(self, contents, stream=False, generation_config=None):
+        text, finish_reason = self._limit(self._respond_to_contents(contents), generation_config)
+        delay, fail, malformed, rng = behaviour.draw(
+            self.model_name, len(text) // CHARS_PER_TOKEN, self._prompt(contents)
+        )
+        if stream:
+            if fail:
+                raise ConnectionError("Fake upstream failure")
+            return self._stream(text, finish_reason, delay)
+        
+        if delay:
+            time.sleep(delay)
+        if fail:
+            from google.api_core.exceptions import ServiceUnavailable
+            raise ServiceUnavailable("Fake upstream failure")
+        if malformed and text.startswith('{'):
+            text = _malform(text, rng)
+        return FakeResponse(text, finish_reason)
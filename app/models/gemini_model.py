@@ -1,26 +1,215 @@
-import google.generativeai as genai
+import json
 import logging
-from app.config.config import GEMINI_API_KEY, GENERATION_CONFIG
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from app.config.config import (
+    GEMINI_API_KEYS, GENERATION_CONFIG, GEMINI_FAKE_MODEL, DEFAULT_MODEL_NAME, STRUCTURED_OUTPUT_ENABLED,
+    GENERATION_CONTINUATION_ENABLED, GENERATION_MAX_CONTINUATIONS, HEDGING_ENABLED, HEDGE_SAME_MODEL,
+    GEMINI_CALL_WORKERS
+)
+from app.models.routing import model_router
+from app.utils.helpers import retry_on_exception
+from app.utils.key_pool import gemini_keys
+from app.utils.resilience import gemini_breaker, classify_exception, is_quota_error, CircuitOpenError, KeysExhaustedError
+from app.utils import metrics, startup
+from app.utils.concurrency import get_executor
+from app.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
-if not GEMINI_API_KEY:
-    logger.error("GEMINI_API_KEY not found in environment variables")
-    raise ValueError("GEMINI_API_KEY not found in environment variables")
+CONTINUE_PROMPT = (
+    "Continue exactly where your previous response stopped. Output only the remaining text, "
+    "without repeating anything you already wrote and without any commentary."
+)
 
-genai.configure(api_key=GEMINI_API_KEY)
+_models = {}
+_models_lock = threading.Lock()
+_inflight = SingleFlight()
+_genai = None
+_genai_lock = threading.Lock()
+_clients = {}  # API key -> generative service client
+# Free workers of the call pool; a call only goes to the pool when it can start at once
+_call_slots = threading.BoundedSemaphore(GEMINI_CALL_WORKERS)
 
-def generate_content(prompt, model_name='gemini-2.0-flash', format_type='json'):
+if GEMINI_FAKE_MODEL:
+    from app.models.fake_model import FakeGenerativeModel
+    logger.warning("GEMINI_FAKE_MODEL is enabled - serving canned responses")
+elif not GEMINI_API_KEYS:
+    logger.error("GEMINI_API_KEY (or GEMINI_API_KEYS) not found in environment variables")
+    raise ValueError("GEMINI_API_KEY (or GEMINI_API_KEYS) not found in environment variables")
+
+def _load_genai():
+    """Import and configure the Gemini SDK on first use.
+
+    The import (with grpc and protobuf) is the bulk of a cold start, so it is kept out
+    of app startup and off requests that never call Gemini.
+    """
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                start_time = time.perf_counter()
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEYS[0])
+                startup.record('gemini_sdk_import', time.perf_counter() - start_time)
+                _genai = genai
+    return _genai
+
+def _client_for(api_key):
+    """The generative service client (and its channel) for one API key, created once.
+
+    genai.configure() sets a single process-wide key, so each pooled key gets a client
+    of its own built the same way the SDK builds its default one.
+    """
+    client = _clients.get(api_key)
+    if client is None:
+        _load_genai()
+        from google.generativeai import client as genai_client
+        with _genai_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                manager = genai_client._ClientManager()
+                manager.configure(api_key=api_key)
+                client = manager.make_client('generative')
+                _clients[api_key] = client
+    return client
+
+def _create_model(model_name, generation_config, api_key=None):
+    if GEMINI_FAKE_MODEL:
+        return FakeGenerativeModel(model_name, generation_config=generation_config)
+    # The SDK normalizes (and may rewrite) the config it is given, so hand it a copy
+    model = _load_genai().GenerativeModel(model_name, generation_config=dict(generation_config))
+    if api_key is not None:
+        model._client = _client_for(api_key)
+    return model
+
+def get_model(model_name=DEFAULT_MODEL_NAME, generation_config=None, api_key=None):
+    """Return the shared model client for (model_name, generation_config, api_key), creating it once."""
+    if generation_config is None:
+        key = (model_name, None, api_key)
+    else:
+        key = (model_name, json.dumps(generation_config, sort_keys=True, default=str), api_key)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                config = GENERATION_CONFIG if generation_config is None else generation_config
+                model = _create_model(model_name, config, api_key)
+                _models[key] = model
+    return model
+
+def warm_up(model_names=None):
+    """Build model clients and the underlying transport ahead of the first request.
+
+    By default every model that appears in MODEL_ROUTES is warmed up.
+    """
+    start_time = time.time()
+    if model_names is None:
+        model_names = sorted({model for models in model_router.routes.values() for model in models})
+    api_keys = gemini_keys.keys or [None]
+    for model_name in model_names:
+        for api_key in api_keys:
+            get_model(model_name, api_key=api_key)
+    if not GEMINI_FAKE_MODEL:
+        # Creates (and caches) the gRPC channel of every pooled key
+        for api_key in api_keys:
+            _client_for(api_key)
+    logger.info("Warmed up Gemini client for %s in %.2fs", ', '.join(model_names), time.time() - start_time)
+
+def _with_format_instructions(prompt, format_type):
+    if format_type == 'markdown':
+        return f"{prompt}\n\nIMPORTANT: Return your response as structured markdown with headings, bullet points, and code blocks where appropriate. DO NOT return JSON."
+    return f"{prompt}\n\nIMPORTANT: Return ONLY valid JSON without any additional text, markdown formatting, or code blocks."
+
+def _finish_reason(response):
     try:
-        model = genai.GenerativeModel(model_name, generation_config=GENERATION_CONFIG)
-        
-        if format_type == 'markdown':
-            prompt_with_instructions = f"{prompt}\n\nIMPORTANT: Return your response as structured markdown with headings, bullet points, and code blocks where appropriate. DO NOT return JSON."
-        else:
-            prompt_with_instructions = f"{prompt}\n\nIMPORTANT: Return ONLY valid JSON without any additional text, markdown formatting, or code blocks."
-        
-        response = model.generate_content(prompt_with_instructions)
-        response_text = response.text.strip()
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return None
+    return getattr(reason, 'name', reason)
+
+def _continuation_contents(prompt_with_instructions, text):
+    return [
+        {'role': 'user', 'parts': [prompt_with_instructions]},
+        {'role': 'model', 'parts': [text]},
+        {'role': 'user', 'parts': [CONTINUE_PROMPT]},
+    ]
+
+def _continuation_config(generation_config):
+    # A response schema would make the model start a fresh JSON object, so continue as plain text.
+    # The SDK merges a per-call config over the model's own, so this must be the model's config.
+    config = dict(GENERATION_CONFIG if generation_config is None else generation_config)
+    config.pop('response_mime_type', None)
+    config.pop('response_schema', None)
+    return config
+
+def _strip_continuation_fence(text):
+    """Drop a code fence the model may open its continuation with."""
+    if text.lstrip().startswith('```'):
+        first_newline = text.find('\n')
+        return text[first_newline + 1:] if first_newline >= 0 else ''
+    return text
+
+def _token_count(response):
+    usage = getattr(response, 'usage_metadata', None)
+    return getattr(usage, 'total_token_count', 0) or 0
+
+def _acquire_key():
+    """The least-used pooled API key; None when running on the fake model without keys."""
+    if not gemini_keys:
+        return None
+    api_key = gemini_keys.acquire()
+    if api_key is None:
+        raise KeysExhaustedError('Gemini', gemini_keys.retry_after())
+    return api_key
+
+def _complete_truncated(model_name, prompt_with_instructions, text, generation_config, api_key=None):
+    """Ask for the remainder of a response that stopped at max_output_tokens."""
+    metrics.increment('generation_truncated')
+    if not GENERATION_CONTINUATION_ENABLED:
+        return text
+    
+    model = get_model(model_name, _continuation_config(generation_config), api_key)
+    for continuation in range(1, GENERATION_MAX_CONTINUATIONS + 1):
+        logger.info("Response hit max_output_tokens after %s chars, requesting continuation %s", len(text), continuation)
+        metrics.increment('generation_continuations')
+        response = model.generate_content(_continuation_contents(prompt_with_instructions, text))
+        gemini_keys.record(api_key, _token_count(response), requests=1)
+        text += _strip_continuation_fence(response.text)
+        if _finish_reason(response) != 'MAX_TOKENS':
+            return text
+    
+    logger.warning("Response still truncated after %s continuations", GENERATION_MAX_CONTINUATIONS)
+    metrics.increment('generation_truncated_unrecovered')
+    return text
+
+def _call_with_key(prompt_with_instructions, model_name, generation_config):
+    """Generate on the least-used API key; a key that hits its quota is parked and the next one tried."""
+    for attempt in range(max(1, len(gemini_keys))):
+        api_key = _acquire_key()
+        model = get_model(model_name, generation_config, api_key)
+        try:
+            response = model.generate_content(prompt_with_instructions)
+            gemini_keys.record(api_key, _token_count(response))
+            response_text = response.text
+            if _finish_reason(response) == 'MAX_TOKENS':
+                response_text = _complete_truncated(
+                    model_name, prompt_with_instructions, response_text, generation_config, api_key
+                )
+            return response_text
+        except Exception as e:
+            if api_key is None or not is_quota_error(e):
+                raise
+            gemini_keys.park(api_key, classify_exception(e).retry_after)
+            if attempt + 1 == len(gemini_keys):
+                raise
+
+def _generate_once(prompt_with_instructions, model_name, format_type, generation_config, route):
+    start_time = time.perf_counter()
+    try:
+        response_text = _call_with_key(prompt_with_instructions, model_name, generation_config).strip()
         
         if format_type == 'json' and not response_text.startswith('{'):
             if '{' in response_text and '}' in response_text:
@@ -29,8 +218,191 @@ def generate_content(prompt, model_name='gemini-2.0-flash', format_type='json'):
                 response_text = response_text[start:end]
             else:
                 raise ValueError("Response does not contain valid JSON")
+    except Exception as e:
+        model_router.record(route, model_name, time.perf_counter() - start_time, ok=False)
+        logger.error("Gemini API error (%s): %s", model_name, e)
+        metrics.increment('upstream_errors', upstream='gemini', error=type(e).__name__)
+        raise
+    model_router.record(route, model_name, time.perf_counter() - start_time, ok=True)
+    return response_text
+
+def _start_call(*args):
+    """Run _generate_once on the bounded call pool; returns its Future, or None if no worker is free.
+
+    A hedged call that loses keeps its worker until the SDK returns, so the pool can fill
+    up with abandoned calls; callers then run unhedged rather than queue behind them.
+    """
+    if not _call_slots.acquire(blocking=False):
+        return None
+    try:
+        future = get_executor('gemini-calls', GEMINI_CALL_WORKERS).submit(_generate_once, *args)
+    except BaseException:
+        _call_slots.release()
+        raise
+    # Runs once the call finishes, or if it is cancelled before it starts
+    future.add_done_callback(lambda _: _call_slots.release())
+    return future
+
+def _hedge_model(models):
+    """The model to hedge a call to the route's first model with, or None if it isn't hedged."""
+    if not HEDGING_ENABLED:
+        return None
+    if len(models) > 1:
+        return models[1]
+    # A second call to the same model doubles quota use for no diversity unless asked for
+    return models[0] if HEDGE_SAME_MODEL else None
+
+def _generate_hedged(prompt_with_instructions, primary, alternate, format_type, generation_config, route):
+    """Call the primary model; if it is slower than usual, race a call to the alternate against it."""
+    model_router.start_call(route)
+    
+    primary_future = _start_call(prompt_with_instructions, primary, format_type, generation_config, route)
+    if primary_future is None:
+        metrics.increment('hedge_skipped', route=route)
+        return _generate_once(prompt_with_instructions, primary, format_type, generation_config, route)
+    pending = {primary_future}
+    hedge_future = None
+    done, _ = wait(pending, timeout=model_router.hedge_delay(route, primary))
+    if not done and model_router.try_hedge(route):
+        hedge_future = _start_call(prompt_with_instructions, alternate, format_type, generation_config, route)
+        if hedge_future is None:
+            metrics.increment('hedge_skipped', route=route)
+        else:
+            logger.info(
+                "%s is slower than its p%.0f on '%s', hedging with %s",
+                primary, model_router.hedge_percentile * 100, route, alternate
+            )
+            metrics.increment('hedged_requests', route=route)
+            pending.add(hedge_future)
+    
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                # The other call may still produce a valid response
+                error = e
+                continue
+            if future is hedge_future:
+                metrics.increment('hedge_wins', route=route)
+            for loser in pending:
+                # A running SDK call can't be interrupted; its result is discarded
+                loser.cancel()
+                metrics.increment('hedge_abandoned', route=route)
+            return result
+    raise error
+
+@retry_on_exception(breaker=gemini_breaker)
+def _generate_with_retry(prompt_with_instructions, models, format_type, generation_config=None, route='default'):
+    alternate = _hedge_model(models)
+    if alternate is None:
+        return _generate_once(prompt_with_instructions, models[0], format_type, generation_config, route)
+    return _generate_hedged(prompt_with_instructions, models[0], alternate, format_type, generation_config, route)
+
+def _flight_key(models, generation_config, prompt_with_instructions):
+    return (models, json.dumps(generation_config, sort_keys=True, default=str), prompt_with_instructions)
+
+def _structured_config(response_schema, generation_config=None):
+    return {
+        **(GENERATION_CONFIG if generation_config is None else generation_config),
+        "response_mime_type": "application/json",
+        "response_schema": response_schema,
+    }
+
+def _route_models(model_name, route):
+    return (model_name,) if model_name else tuple(model_router.models_for(route))
+
+def generate_content(prompt, model_name=None, format_type='json', response_schema=None,
+                     generation_config=None, route='default'):
+    """Generate a response, sharing one upstream call (retries included) among identical concurrent requests.
+
+    Without a model_name the route's models (MODEL_ROUTES) are used, healthiest first, and a slow
+    call is hedged with the next one. With a response_schema (and STRUCTURED_OUTPUT_ENABLED)
+    Gemini's JSON response mode is used; if the model rejects the schema the call falls back to
+    the free-text JSON path. generation_config (e.g. from generation_config_for) replaces
+    GENERATION_CONFIG for this call.
+    """
+    prompt_with_instructions = _with_format_instructions(prompt, format_type)
+    models = _route_models(model_name, route)
+    
+    if response_schema is not None and STRUCTURED_OUTPUT_ENABLED and format_type == 'json':
+        structured_config = _structured_config(response_schema, generation_config)
+        key = _flight_key(models, structured_config, prompt_with_instructions)
+        metrics.increment('structured_output_requests')
+        try:
+            return _inflight.do(
+                key, _generate_with_retry, prompt_with_instructions, models, format_type, structured_config, route
+            )
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if classify_exception(e).retryable:
+                raise
+            logger.warning("Structured output rejected, falling back to free-text JSON: %s", e)
+            metrics.increment('structured_output_fallbacks')
+    
+    key = _flight_key(models, generation_config or GENERATION_CONFIG, prompt_with_instructions)
+    return _inflight.do(
+        key, _generate_with_retry, prompt_with_instructions, models, format_type, generation_config, route
+    )
+
+def generate_content_stream(prompt, model_name=None, format_type='markdown', generation_config=None,
+                            route='default'):
+    """Yield response text chunks as Gemini produces them, continuing past max_output_tokens."""
+    # Chunks may already have reached the client, so a stream is never retried or hedged
+    gemini_breaker.before_call()
+    api_key = None
+    recorded = False
+    try:
+        api_key = _acquire_key()
+        model_name = _route_models(model_name, route)[0]
+        model = get_model(model_name, generation_config, api_key)
+        prompt_with_instructions = _with_format_instructions(prompt, format_type)
         
-        return response_text
+        text = ''
+        contents = prompt_with_instructions
+        for continuation in range(GENERATION_MAX_CONTINUATIONS + 1):
+            finish_reason = None
+            first_chunk = True
+            tokens = 0
+            for chunk in model.generate_content(contents, stream=True):
+                finish_reason = _finish_reason(chunk) or finish_reason
+                # Each chunk's usage metadata covers the whole call so far
+                tokens = _token_count(chunk) or tokens
+                if chunk.text:
+                    piece = chunk.text
+                    if continuation and first_chunk:
+                        piece = _strip_continuation_fence(piece)
+                    first_chunk = False
+                    text += piece
+                    yield piece
+            # acquire() counted the first call's request
+            gemini_keys.record(api_key, tokens, requests=1 if continuation else 0)
+            if finish_reason != 'MAX_TOKENS':
+                break
+            if continuation == 0:
+                metrics.increment('generation_truncated')
+            if not GENERATION_CONTINUATION_ENABLED or continuation == GENERATION_MAX_CONTINUATIONS:
+                metrics.increment('generation_truncated_unrecovered')
+                break
+            metrics.increment('generation_continuations')
+            contents = _continuation_contents(prompt_with_instructions, text)
+            model = get_model(model_name, _continuation_config(generation_config), api_key)
     except Exception as e:
-        logger.error(f"Gemini API error: {str(e)}")
+        logger.error("Gemini streaming error: %s", e)
+        metrics.increment('upstream_errors', upstream='gemini', error=type(e).__name__)
+        if api_key is not None and is_quota_error(e):
+            gemini_keys.park(api_key, classify_exception(e).retry_after)
+        recorded = True
+        gemini_breaker.record(classify_exception(e))
         raise
+    else:
+        recorded = True
+        gemini_breaker.record_success()
+    finally:
+        if not recorded:
+            # Closed early (GeneratorExit when the client disconnects): release a half-open probe
+            # without counting the call either way, or the circuit would never be probed again
+            gemini_breaker.release()
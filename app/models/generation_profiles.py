@@ -0,0 +1,18 @@
+import math
+from app.config.config import GENERATION_CONFIG, GENERATION_PROFILES
+
+# Budgets are rounded up to this step so similar requests share one model client
+TOKEN_BUDGET_STEP = 256
+
+def output_token_budget(profile, units=None):
+    """max_output_tokens for an endpoint profile, scaled by the size of the request."""
+    settings = GENERATION_PROFILES[profile]
+    if units is None:
+        units = settings['default_units']
+    tokens = settings['base_tokens'] + settings['tokens_per_unit'] * units
+    tokens = math.ceil(tokens / TOKEN_BUDGET_STEP) * TOKEN_BUDGET_STEP
+    return min(tokens, settings['max_tokens'])
+
+def generation_config_for(profile, units=None):
+    """GENERATION_CONFIG with the profile's output budget for `units`."""
+    return {**GENERATION_CONFIG, "max_output_tokens": output_token_budget(profile, units)}
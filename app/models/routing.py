@@ -0,0 +1,96 @@
+import threading
+from collections import deque
+from app.config.config import (
+    MODEL_ROUTES, MODEL_STATS_WINDOW, MODEL_MAX_ERROR_RATE, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY, HEDGE_MIN_DELAY, HEDGE_MAX_RATIO
+)
+from app.utils import metrics
+
+class ModelStats:
+    """Latencies of recent successful calls and outcomes of recent calls for one (route, model)."""
+
+    __slots__ = ('latencies', 'outcomes', '_lock')
+
+    def __init__(self, window=MODEL_STATS_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True for success
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(seconds)
+
+    def percentile(self, fraction):
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def error_rate(self):
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def __len__(self):
+        return len(self.latencies)
+
+class ModelRouter:
+    """Orders each route's models by health and decides when (and whether) to hedge a call."""
+
+    def __init__(self, routes=MODEL_ROUTES, max_error_rate=MODEL_MAX_ERROR_RATE, hedge_percentile=HEDGE_PERCENTILE,
+                 hedge_max_ratio=HEDGE_MAX_RATIO):
+        self.routes = routes
+        self.max_error_rate = max_error_rate
+        self.hedge_percentile = hedge_percentile
+        self.hedge_max_ratio = hedge_max_ratio
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._calls = {}  # route -> [calls, hedges]
+        self._calls_lock = threading.Lock()
+
+    def stats(self, route, model_name):
+        key = (route, model_name)
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._stats_lock:
+                stats = self._stats.setdefault(key, ModelStats())
+        return stats
+
+    def models_for(self, route):
+        """The route's models, healthy ones first, each group in configured order."""
+        models = self.routes.get(route) or self.routes['default']
+        return sorted(models, key=lambda model: self.stats(route, model).error_rate() > self.max_error_rate)
+
+    def record(self, route, model_name, seconds, ok):
+        self.stats(route, model_name).record(seconds, ok)
+        if ok:
+            metrics.histogram('model_latency_seconds', model=model_name).observe(seconds)
+        else:
+            metrics.increment('model_errors', model=model_name)
+
+    def hedge_delay(self, route, model_name):
+        """Seconds to wait for model_name before hedging: its recent latency percentile on this route."""
+        stats = self.stats(route, model_name)
+        if len(stats) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, stats.percentile(self.hedge_percentile))
+
+    def start_call(self, route):
+        with self._calls_lock:
+            self._calls.setdefault(route, [0, 0])[0] += 1
+
+    def try_hedge(self, route):
+        """Claim a hedge if the route is within its budget of hedges per call."""
+        with self._calls_lock:
+            counts = self._calls.setdefault(route, [0, 0])
+            # A few hedges are always allowed so the budget doesn't block a fresh process
+            if counts[1] >= self.hedge_max_ratio * counts[0] + 5:
+                return False
+            counts[1] += 1
+            return True
+
+model_router = ModelRouter()
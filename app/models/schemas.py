@@ -0,0 +1,70 @@
+# Response schemas for Gemini's JSON response mode (OpenAPI subset accepted by
+# GenerationConfig.response_schema). They mirror the structures the endpoints validate.
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}},
+        "correct_answer": {"type": "string"},
+        "explanation": {"type": "string"},
+    },
+    "required": ["question", "options", "correct_answer", "explanation"],
+}
+
+QUIZ_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "level": {"type": "string"},
+        "questions": {"type": "array", "items": QUESTION_SCHEMA},
+    },
+    "required": ["title", "description", "questions"],
+}
+
+ROADMAP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "course_title": {"type": "string"},
+        "description": {"type": "string"},
+        "level": {"type": "string"},
+        "duration": {"type": "string"},
+        "modules": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "module_title": {"type": "string"},
+                    "topics": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["module_title", "topics"],
+            },
+        },
+    },
+    "required": ["course_title", "description", "level", "duration", "modules"],
+}
+
+TUTORIAL_OUTLINE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "estimated_time": {"type": "string"},
+        "overview": {"type": "string"},
+        "about": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "section_title": {"type": "string"},
+                    "summary": {"type": "string"},
+                },
+                "required": ["section_title", "summary"],
+            },
+        },
+        "practice_exercises": {"type": "array", "items": {"type": "string"}},
+        "additional_resources": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["title", "estimated_time", "overview", "sections", "practice_exercises", "additional_resources"],
+}
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.config.config import (
+    CACHE_ENABLED, CACHE_BACKEND, CACHE_DB_PATH, CACHE_MAX_ENTRIES, CACHE_TTL, PROMPT_VERSIONS
+)
+
+logger = logging.getLogger(__name__)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def normalize_key_part(value):
+    """Fold case and whitespace so trivially different inputs share a cache entry."""
+    return ' '.join(str(value).split()).casefold()
+
+def make_cache_key(namespace, *parts):
+    """Build a cache key that is invalidated whenever the namespace's prompt version changes."""
+    version = PROMPT_VERSIONS.get(namespace, 'v1')
+    raw = '\x1f'.join(normalize_key_part(part) for part in parts)
+    digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+    return f"{namespace}:{version}:{digest}"
+
+class MemoryBackend:
+    """In-process LRU store; entries are (serialized_value, expires_at) tuples."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteBackend:
+    """On-disk LRU store that survives restarts and can be shared by several worker processes."""
+
+    name = 'sqlite'
+
+    def __init__(self, path, namespace, max_entries):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_response_cache_lru ON response_cache (namespace, accessed_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM response_cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM response_cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+            return None
+        conn.execute(
+            "UPDATE response_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key)
+        )
+        return value
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (namespace, key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, value, now + ttl, now)
+            )
+            conn.execute(
+                "DELETE FROM response_cache WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, now)
+            )
+            count = conn.execute(
+                "SELECT COUNT(*) FROM response_cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            evicted = max(0, count - self.max_entries)
+            if evicted:
+                conn.execute(
+                    "DELETE FROM response_cache WHERE namespace = ? AND key IN ("
+                    "SELECT key FROM response_cache WHERE namespace = ? ORDER BY accessed_at LIMIT ?)",
+                    (self.namespace, self.namespace, evicted)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return evicted
+
+    def delete(self, key):
+        self._connect().execute(
+            "DELETE FROM response_cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM response_cache WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM response_cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+
+class ResponseCache:
+    """JSON response cache with hit/miss accounting on top of a pluggable backend."""
+
+    def __init__(self, namespace, backend=None, ttl=CACHE_TTL):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.errors = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.error("Cache read failed for %s: %s", self.namespace, e)
+            with self._stats_lock:
+                self.errors += 1
+            return None
+
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if value is None else json.loads(value)
+
+    def peek(self, key):
+        """True if key is cached, without counting a hit or miss."""
+        if not self.enabled:
+            return False
+        try:
+            return self.backend.get(key) is not None
+        except Exception:
+            return False
+
+    def set(self, key, value, ttl=None):
+        if not self.enabled:
+            return
+        try:
+            evicted = self.backend.set(key, json.dumps(value), self.ttl if ttl is None else ttl)
+        except Exception as e:
+            logger.error("Cache write failed for %s: %s", self.namespace, e)
+            with self._stats_lock:
+                self.errors += 1
+            return
+
+        with self._stats_lock:
+            self.sets += 1
+            self.evictions += evicted
+
+    def delete(self, key):
+        if self.enabled:
+            self.backend.delete(key)
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "namespace": self.namespace,
+                "backend": self.backend.name if self.enabled else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "sets": self.sets,
+                "evictions": self.evictions,
+                "errors": self.errors,
+            }
+        try:
+            stats["entries"] = len(self.backend) if self.enabled else 0
+        except Exception:
+            stats["entries"] = None
+        return stats
+
+def _create_backend(namespace):
+    if not CACHE_ENABLED:
+        return None
+    if CACHE_BACKEND == 'sqlite':
+        return SQLiteBackend(CACHE_DB_PATH, namespace, CACHE_MAX_ENTRIES)
+    if CACHE_BACKEND != 'memory':
+        logger.warning("Unknown CACHE_BACKEND '%s', falling back to memory", CACHE_BACKEND)
+    return MemoryBackend(CACHE_MAX_ENTRIES)
+
+def get_cache(namespace, ttl=CACHE_TTL):
+    """Return the process-wide cache for a namespace, creating it on first use."""
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = ResponseCache(namespace, _create_backend(namespace), ttl)
+            _caches[namespace] = cache
+        return cache
+
+def get_cache_stats():
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.namespace: cache.stats() for cache in caches}
@@ -0,0 +1,50 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(name, max_workers):
+    """Return a named, process-wide bounded thread pool, creating it on first use."""
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+            _executors[name] = executor
+        return executor
+
+def timed_call(func, *args, **kwargs):
+    """Run func and return (result, elapsed_seconds)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def remaining_time(started_at, deadline):
+    """Seconds left before a deadline measured from started_at (never negative)."""
+    return max(0.0, deadline - (time.perf_counter() - started_at))
+
+class ActiveCounter:
+    """Thread-safe gauge of work currently in progress."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            self._value += 1
+
+    def decrement(self):
+        with self._lock:
+            self._value -= 1
+
+    @property
+    def value(self):
+        return self._value
+
+# Requests currently being served; background work defers to these
+live_requests = ActiveCounter()
@@ -1,33 +1,110 @@
 import json
+import math
+import random
 import re
 import logging
 import time
 import traceback
 from functools import wraps
-from app.config.config import MAX_RETRIES, RETRY_DELAY
+from flask import g, has_request_context, jsonify
+from app.config.config import MAX_RETRIES, RETRY_DELAY, RETRY_MAX_DELAY, REQUEST_DEADLINE, ERROR_MESSAGES
+from app.utils import metrics
+from app.utils.resilience import classify_exception
+from app.utils.json_repair import repair_json
 
 logger = logging.getLogger(__name__)
 
-def retry_on_exception(max_retries=MAX_RETRIES, delay=RETRY_DELAY):
+def _deadline_start():
+    """Start of the current request's time budget, or now outside a request."""
+    if has_request_context() and 'request_started_at' in g:
+        return g.request_started_at
+    return time.monotonic()
+
+def retry_on_exception(max_retries=MAX_RETRIES, delay=RETRY_DELAY, max_delay=RETRY_MAX_DELAY,
+                       deadline=REQUEST_DEADLINE, breaker=None):
+    """Retry retryable errors with exponential backoff and full jitter within a deadline budget."""
     def decorator(func):
+        upstream = breaker.name if breaker else func.__name__
+        attempts_histogram = metrics.histogram('upstream_attempts', metrics.ATTEMPT_BUCKETS, upstream=upstream)
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
+            started_at = _deadline_start()
             retries = 0
-            while retries < max_retries:
+            while True:
+                if breaker:
+                    breaker.before_call()
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
+                    error_class = classify_exception(e)
+                    if breaker:
+                        breaker.record(error_class)
                     retries += 1
-                    logger.warning(f"Retry {retries}/{max_retries} due to: {str(e)}")
+                    if not error_class.retryable:
+                        logger.error("Not retrying %s: %s", type(e).__name__, e)
+                        attempts_histogram.observe(retries)
+                        raise
                     if retries >= max_retries:
-                        logger.error(f"Max retries reached: {str(e)}")
+                        logger.error("Max retries reached: %s", e)
+                        attempts_histogram.observe(retries)
                         raise
-                    time.sleep(delay)
+                    
+                    backoff = random.uniform(0, min(max_delay, delay * 2 ** (retries - 1)))
+                    wait = max(backoff, error_class.retry_after or 0)
+                    if time.monotonic() - started_at + wait >= deadline:
+                        logger.error("Retry budget of %ss exhausted: %s", deadline, e)
+                        attempts_histogram.observe(retries)
+                        raise
+                    
+                    logger.warning("Retry %s/%s in %.2fs due to: %s", retries, max_retries, wait, e)
+                    metrics.increment('upstream_retries', upstream=upstream)
+                    time.sleep(wait)
+                else:
+                    if breaker:
+                        breaker.record_success()
+                    attempts_histogram.observe(retries + 1)
+                    return result
         return wrapper
     return decorator
 
+def circuit_open_response(e):
+    """503 telling the client when the upstream circuit will be probed again."""
+    response = jsonify({
+        "error": ERROR_MESSAGES['service_unavailable'],
+        "message": "Our AI service is currently experiencing issues. Please try again in a few minutes.",
+        "retry_after": e.retry_after
+    })
+    response.headers['Retry-After'] = str(math.ceil(e.retry_after))
+    return response, 503
+
+def resolve_level(data):
+    """Learner level from an explicit 'level' or inferred from user_profile.education_level."""
+    if 'level' in data:
+        return data['level'].strip()
+    if 'user_profile' in data and isinstance(data['user_profile'], dict):
+        user_profile = data['user_profile']
+        if 'education_level' in user_profile:
+            education = user_profile['education_level'].lower()
+            if 'phd' in education or 'doctorate' in education:
+                return "Advanced"
+            elif 'master' in education or 'be' in education or 'btech' in education:
+                return "Intermediate"
+            return "Beginner"
+    return "Intermediate"
+
+def sse_event(event, data):
+    """Format a Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def wants_event_stream(req):
+    """True when the client asked for a streamed response via ?stream=1 or the Accept header."""
+    if req.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'text/event-stream' in req.headers.get('Accept', '')
+
 def parse_ai_json(response_text):
-    """Parse the AI generated response as JSON, with improved handling for math content."""
+    """Parse the AI generated response as JSON, repairing common LLM formatting faults."""
     if not response_text:
         raise ValueError("Empty response from AI")
     
@@ -38,50 +115,17 @@ def parse_ai_json(response_text):
         # Log the position of the error
         error_position = e.pos
         error_context = response_text[max(0, error_position-50):min(len(response_text), error_position+50)]
-        logger.error(f"JSON error at position {error_position}: {error_context}")
-        
-        # Special handling for math content - replace common math symbols that break JSON
-        sanitized_text = response_text
-        math_replacements = {
-            "\\": "\\\\",  # Escape backslashes
-            "\n": " ",     # Replace newlines with spaces
-            "≈": "approximately",
-            "∫": "integral",
-            "∑": "sum",
-            "∞": "infinity",
-            "≠": "!=",
-            "≤": "<=",
-            "≥": ">=",
-            "π": "pi",
-            "θ": "theta",
-            "λ": "lambda",
-            "α": "alpha",
-            "β": "beta",
-            "γ": "gamma",
-            "Δ": "Delta",
-            "δ": "delta",
-            "√": "sqrt"
-        }
-        
-        for symbol, replacement in math_replacements.items():
-            sanitized_text = sanitized_text.replace(symbol, replacement)
+        logger.warning("JSON error at position %s: %s", error_position, error_context)
         
         try:
-            return json.loads(sanitized_text)
-        except json.JSONDecodeError:
-            # If still failing, try more aggressive approach to extract JSON
-            try:
-                # Find what looks like the start and end of JSON
-                json_start = sanitized_text.find('{')
-                json_end = sanitized_text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    extracted_json = sanitized_text[json_start:json_end]
-                    return json.loads(extracted_json)
-            except:
-                pass
-            
-            logger.error(f"JSON sanitization failed: {str(e)}")
+            parsed, repairs = repair_json(response_text)
+        except ValueError as repair_error:
+            logger.error("JSON repair failed: %s", repair_error)
             raise ValueError(f"Failed to parse AI response as JSON: {str(e)}")
+        
+        logger.info("Repaired AI JSON response: %s", ', '.join(repairs))
+        metrics.increment('json_repaired')
+        return parsed
 
 def validate_roadmap(roadmap):
     required_fields = ['course_title', 'description', 'level', 'duration', 'modules']
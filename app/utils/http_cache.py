@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from flask import Response, g, request
+from app.config.config import (
+    COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, COMPRESSION_LEVEL, COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_CACHE_ENTRIES
+)
+from app.utils import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/markdown', 'text/html')
+
+# (etag, encoding) -> compressed body, most recently used last
+_encoded_bodies = OrderedDict()
+_encoded_lock = threading.Lock()
+
+def mark_cacheable(cache_key):
+    """Tag the current response as the cached result stored under cache_key, so it gets a strong ETag."""
+    g.result_cache_key = cache_key
+
+def make_etag(cache_key, body):
+    return hashlib.sha256(cache_key.encode('utf-8') + b'\x1f' + body).hexdigest()[:32]
+
+def negotiate_encoding(req):
+    if not req.headers.get('Accept-Encoding'):
+        return None
+    return req.accept_encodings.best_match(ENCODINGS)
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(body, compresslevel=COMPRESSION_LEVEL, mtime=0)
+
+def _encoded_body(etag, encoding, body):
+    """Compressed body, reused across responses that carry the same ETag."""
+    if etag is None:
+        return compress(body, encoding)
+    key = (etag, encoding)
+    with _encoded_lock:
+        encoded = _encoded_bodies.get(key)
+        if encoded is not None:
+            _encoded_bodies.move_to_end(key)
+            metrics.increment('compression_reused', encoding=encoding)
+            return encoded
+    encoded = compress(body, encoding)
+    with _encoded_lock:
+        _encoded_bodies[key] = encoded
+        while len(_encoded_bodies) > COMPRESSION_CACHE_ENTRIES:
+            _encoded_bodies.popitem(last=False)
+    return encoded
+
+def _not_modified(etag):
+    """304 when If-None-Match names this result, in any of its encodings."""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    tags = (etag,) + tuple(f"{etag}-{encoding}" for encoding in ENCODINGS)
+    matched = next((tag for tag in tags if if_none_match.contains(tag)), None)
+    if matched is None and not if_none_match.star_tag:
+        return None
+    metrics.increment('not_modified_responses')
+    response = Response(status=304)
+    response.set_etag(matched or etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def _should_compress(response):
+    return (
+        COMPRESSION_ENABLED
+        and response.status_code == 200
+        and not response.is_streamed
+        and not response.direct_passthrough
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+    )
+
+def setup_http_cache(app):
+    @app.after_request
+    def encode_response(response):
+        cache_key = g.pop('result_cache_key', None)
+        etag = None
+        if cache_key is not None and response.status_code == 200 and not response.is_streamed:
+            etag = make_etag(cache_key, response.get_data())
+            if request.method in ('GET', 'HEAD'):
+                not_modified = _not_modified(etag)
+                if not_modified is not None:
+                    return not_modified
+                # Clients may keep the result but must revalidate it before reuse
+                response.headers['Cache-Control'] = 'no-cache'
+            response.set_etag(etag)
+        
+        if not _should_compress(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        encoding = negotiate_encoding(request)
+        if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        
+        encoded = _encoded_body(etag, encoding, body)
+        response.set_data(encoded)
+        response.headers['Content-Encoding'] = encoding
+        if etag is not None:
+            # A strong ETag names exact bytes, so each encoding gets its own
+            response.set_etag(f"{etag}-{encoding}")
+        metrics.increment('compressed_responses', encoding=encoding)
+        metrics.increment('compression_bytes_saved', len(body) - len(encoded))
+        return response
@@ -0,0 +1,231 @@
+import ipaddress
+import json
+import logging
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlparse
+from flask import g
+from app.config.config import (
+    JOB_WORKERS, JOB_MAX_PENDING, JOB_STORE, JOB_DB_PATH, JOB_TTL, JOB_MAX_ENTRIES,
+    JOB_CALLBACK_TIMEOUT, JOB_CALLBACK_ATTEMPTS, JOB_CALLBACK_ALLOWED_HOSTS, ERROR_MESSAGES
+)
+from app.utils import metrics
+from app.utils.concurrency import ActiveCounter, get_executor
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+
+class MemoryJobStore:
+    """In-process job records; polling must reach the process that accepted the job."""
+
+    name = 'memory'
+
+    def __init__(self, ttl=JOB_TTL, max_entries=JOB_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._jobs = OrderedDict()  # job id -> (record, expires_at), oldest first
+        self._lock = threading.Lock()
+
+    def save(self, job):
+        with self._lock:
+            self._jobs[job['job_id']] = (dict(job), time.time() + self.ttl)
+            self._jobs.move_to_end(job['job_id'])
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id):
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            job, expires_at = entry
+            if expires_at <= time.time():
+                del self._jobs[job_id]
+                return None
+            return dict(job)
+
+class SQLiteJobStore:
+    """Job records on disk, so any worker process sharing the file can answer a poll."""
+
+    name = 'sqlite'
+
+    def __init__(self, path=JOB_DB_PATH, ttl=JOB_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    record TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_expiry ON jobs (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def save(self, job):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, record, expires_at) VALUES (?, ?, ?)",
+                (job['job_id'], json.dumps(job), now + self.ttl)
+            )
+            conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, job_id):
+        row = self._connect().execute(
+            "SELECT record FROM jobs WHERE job_id = ? AND expires_at > ?", (job_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+def create_job_store():
+    if JOB_STORE == 'sqlite':
+        return SQLiteJobStore()
+    if JOB_STORE != 'memory':
+        logger.warning("Unknown JOB_STORE '%s', falling back to memory", JOB_STORE)
+    return MemoryJobStore()
+
+def _public_address(address):
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+def valid_callback_url(url):
+    """True for an http(s) URL the server may POST job results to.
+
+    With JOB_CALLBACK_ALLOWED_HOSTS set, the host must be one of them. Otherwise every
+    address the host resolves to must be public, so callbacks can't reach loopback,
+    private networks or cloud metadata endpoints.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return False
+    if JOB_CALLBACK_ALLOWED_HOSTS:
+        return parsed.hostname in JOB_CALLBACK_ALLOWED_HOSTS
+    try:
+        port = parsed.port
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (ValueError, OSError):
+        return False
+    return bool(addresses) and all(_public_address(address) for address in addresses)
+
+class JobRunner:
+    """Runs generation requests on a bounded pool after their HTTP request has returned 202.
+
+    A job replays the original POST (body, headers and query string, minus streaming
+    options) in a request context of its own, so endpoints need no changes to run async.
+    """
+
+    def __init__(self, store=None, workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING):
+        self.store = store or create_job_store()
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = ActiveCounter()
+
+    def submit(self, app, endpoint, view_args, request_data, callback_url=None):
+        """Queue a job; returns its record, or None when max_pending jobs are already waiting."""
+        if self.pending.value >= self.max_pending:
+            metrics.increment('jobs', status='rejected')
+            return None
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": endpoint,
+            "status": QUEUED,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "status_code": None,
+            "result": None,
+        }
+        self.store.save(job)
+        self.pending.increment()
+        metrics.increment('jobs', status=QUEUED)
+        try:
+            get_executor('jobs', self.workers).submit(
+                self._run, app, dict(job), endpoint, view_args, request_data, callback_url
+            )
+        except Exception:
+            self.pending.decrement()
+            raise
+        return job
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def _run(self, app, job, endpoint, view_args, request_data, callback_url):
+        try:
+            job.update(status=RUNNING, started_at=time.time())
+            self.store.save(job)
+            try:
+                with app.test_request_context(**request_data):
+                    # The job gets a full request time budget from when it starts
+                    g.request_started_at = time.monotonic()
+                    g.request_id = job['job_id'][:16]
+                    response = app.make_response(app.view_functions[endpoint](**view_args))
+                    status_code, result = response.status_code, response.get_json(silent=True)
+            except Exception as e:
+                logger.error("Job %s (%s) raised: %s", job['job_id'], endpoint, e)
+                status_code = 500
+                result = {"error": ERROR_MESSAGES['server_error'], "message": "Please try again later"}
+            job.update(
+                status=SUCCEEDED if status_code < 400 else FAILED,
+                finished_at=time.time(),
+                status_code=status_code,
+                result=result,
+            )
+            self.store.save(job)
+            metrics.increment('jobs', status=job['status'])
+            metrics.histogram('job_duration_seconds', kind=endpoint).observe(job['finished_at'] - job['started_at'])
+            logger.info(
+                "Job %s (%s) %s in %.2fs", job['job_id'], endpoint, job['status'], job['finished_at'] - job['started_at']
+            )
+        finally:
+            self.pending.decrement()
+        if callback_url:
+            # Retries back off for seconds; keep them off the generation workers
+            get_executor('job-callbacks', self.workers).submit(self._deliver_callback, job, callback_url)
+
+    def _deliver_callback(self, job, callback_url):
+        import requests  # deferred: only jobs with a callback_url need it
+        for attempt in range(1, JOB_CALLBACK_ATTEMPTS + 1):
+            # Checked again on every attempt: the host's DNS may have changed since the job was accepted
+            if not valid_callback_url(callback_url):
+                metrics.increment('job_callbacks', status='rejected')
+                logger.error("Not delivering callback for job %s: %s is not a public host", job['job_id'], callback_url)
+                return
+            try:
+                # Redirects are not followed; they could point anywhere
+                response = requests.post(callback_url, json=job, timeout=JOB_CALLBACK_TIMEOUT, allow_redirects=False)
+                if response.status_code < 500:
+                    metrics.increment('job_callbacks', status='delivered' if response.ok else f"http_{response.status_code}")
+                    return
+                logger.warning("Callback for job %s got HTTP %s (attempt %s)", job['job_id'], response.status_code, attempt)
+            except Exception as e:
+                logger.warning("Callback for job %s failed (attempt %s): %s", job['job_id'], attempt, e)
+            if attempt < JOB_CALLBACK_ATTEMPTS:
+                time.sleep(2 ** (attempt - 1))
+        metrics.increment('job_callbacks', status='failed')
+        logger.error("Giving up on callback for job %s to %s", job['job_id'], callback_url)
+
+job_runner = JobRunner()
@@ -0,0 +1,295 @@
+import json
+import re
+
+# Tolerant parser for LLM-produced JSON. A single left-to-right scan rewrites the
+# text into valid JSON, fixing the faults models commonly make, and records which
+# repairs were needed. The rewritten text is then parsed once with json.loads.
+
+_VALID_ESCAPES = frozenset('"\\/bfnrtu')
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+_CONTROL_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+_STRING_SPECIAL = {
+    '"': re.compile(r'["\\\x00-\x1f]'),
+    "'": re.compile(r'[\'"\\\x00-\x1f]'),
+}
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_WORD = re.compile(r'[A-Za-z_]+')
+_WHITESPACE = re.compile(r'\s*')
+_LITERALS = {
+    'true': 'true', 'false': 'false', 'null': 'null',
+    'True': 'true', 'False': 'false', 'None': 'null',
+}
+_CLOSERS = {'{': '}', '[': ']'}
+_decoder = json.JSONDecoder()
+
+# What an object expects next
+_KEY, _COLON, _VALUE, _COMMA = range(4)
+
+class _Container:
+    __slots__ = ('opener', 'expect')
+
+    def __init__(self, opener):
+        self.opener = opener
+        self.expect = _KEY if opener == '{' else _VALUE
+
+class _Repairer:
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        self.out = []
+        self.stack = []
+        self.repairs = []
+        # Index in self.out of the last structural token, and what it was
+        self.last_index = -1
+        self.last_token = None
+
+    def note(self, repair):
+        if repair not in self.repairs:
+            self.repairs.append(repair)
+
+    def emit(self, piece, token):
+        self.out.append(piece)
+        self.last_index = len(self.out) - 1
+        self.last_token = token
+
+    # -- structure -----------------------------------------------------------
+
+    def value_started(self):
+        """Bookkeeping before a value (string, number, literal or container) is emitted."""
+        if not self.stack:
+            return
+        top = self.stack[-1]
+        if top.expect == _COMMA:
+            self.note('missing_comma')
+            self.emit(',', ',')
+            top.expect = _KEY if top.opener == '{' else _VALUE
+        elif top.expect == _COLON:
+            self.note('missing_colon')
+            self.emit(':', ':')
+            top.expect = _VALUE
+
+    def value_finished(self):
+        if self.stack:
+            self.stack[-1].expect = _COMMA
+
+    def drop_trailing_comma(self):
+        if self.last_token == ',':
+            self.out[self.last_index] = ''
+            self.note('trailing_comma')
+
+    def close(self, closer):
+        """Close the innermost container, also closing any that were left open inside it."""
+        if not any(_CLOSERS[c.opener] == closer for c in self.stack):
+            self.note('unmatched_bracket')
+            return
+        while self.stack:
+            top = self.stack[-1]
+            if top.opener == '{' and top.expect in (_COLON, _VALUE):
+                # Key without a value: keep the key, give it null
+                self.note('missing_value')
+                if top.expect == _COLON:
+                    self.emit(':', ':')
+                self.emit('null', 'null')
+            self.drop_trailing_comma()
+            self.stack.pop()
+            expected = _CLOSERS[top.opener]
+            self.emit(expected, expected)
+            self.value_finished()
+            if expected == closer:
+                return
+            self.note('mismatched_bracket')
+
+    # -- scanning ------------------------------------------------------------
+
+    def closes_string(self, i, quote):
+        """Decide whether the quote at i ends the string or is an unescaped inner quote."""
+        j = _WHITESPACE.match(self.text, i + 1).end()
+        if j >= self.length:
+            return True
+        nxt = self.text[j]
+        if nxt in ':}]':
+            return True
+        if nxt == ',':
+            k = _WHITESPACE.match(self.text, j + 1).end()
+            if k >= self.length or self.text[k] in '"\'{[]}-0123456789':
+                return True
+            word = _WORD.match(self.text, k)
+            return bool(word) and word.group() in _LITERALS
+        if nxt == quote and quote == '"':
+            # Two adjacent strings: most likely a missing comma
+            return True
+        return False
+
+    def read_string(self, i):
+        quote = self.text[i]
+        if quote == "'":
+            self.note('single_quotes')
+        special = _STRING_SPECIAL[quote]
+        pieces = ['"']
+        i += 1
+        while True:
+            match = special.search(self.text, i)
+            if match is None:
+                pieces.append(self.text[i:])
+                pieces.append('"')
+                self.note('unterminated_string')
+                return ''.join(pieces), self.length
+            j = match.start()
+            pieces.append(self.text[i:j])
+            char = self.text[j]
+            if char == '\\':
+                nxt = self.text[j + 1] if j + 1 < self.length else ''
+                if nxt == "'" and quote == "'":
+                    pieces.append("'")
+                    i = j + 2
+                elif nxt == 'u' and all(c in _HEX_DIGITS for c in self.text[j + 2:j + 6]) \
+                        and len(self.text[j + 2:j + 6]) == 4:
+                    pieces.append(self.text[j:j + 6])
+                    i = j + 6
+                elif nxt in _VALID_ESCAPES and nxt != 'u' and not (
+                        nxt in 'bf' and self.text[j + 2:j + 3].isalpha()):
+                    pieces.append('\\' + nxt)
+                    i = j + 2
+                elif nxt == '':
+                    # Truncated right after a backslash
+                    i = j + 1
+                else:
+                    # Invalid escape such as LaTeX \( or \frac: keep the backslash literally
+                    self.note('invalid_escape')
+                    pieces.append('\\\\')
+                    i = j + 1
+            elif char == quote:
+                if self.closes_string(j, quote):
+                    pieces.append('"')
+                    return ''.join(pieces), j + 1
+                self.note('unescaped_quote')
+                pieces.append('\\"')
+                i = j + 1
+            elif char == '"':
+                # Double quote inside a single-quoted string
+                pieces.append('\\"')
+                i = j + 1
+            else:
+                self.note('control_character')
+                pieces.append(_CONTROL_ESCAPES.get(char, f'\\u{ord(char):04x}'))
+                i = j + 1
+
+    def run(self, i):
+        text = self.text
+        if text[:i].strip():
+            self.note('stripped_prefix')
+
+        while i < self.length:
+            char = text[i]
+            if char in ' \t\r\n':
+                i = _WHITESPACE.match(text, i).end()
+                continue
+
+            if char in '{[':
+                self.value_started()
+                self.stack.append(_Container(char))
+                self.emit(char, char)
+                i += 1
+            elif char in '}]':
+                self.close(char)
+                i += 1
+                if not self.stack:
+                    break
+            elif char in '"\'':
+                top = self.stack[-1] if self.stack else None
+                is_key = top is not None and top.opener == '{' and top.expect in (_KEY, _COMMA)
+                piece, i = self.read_string(i)
+                if is_key:
+                    if top.expect == _COMMA:
+                        self.note('missing_comma')
+                        self.emit(',', ',')
+                    self.emit(piece, 'key')
+                    top.expect = _COLON
+                else:
+                    self.value_started()
+                    self.emit(piece, 'string')
+                    self.value_finished()
+            elif char == ':':
+                top = self.stack[-1] if self.stack else None
+                if top is not None and top.opener == '{' and top.expect == _COLON:
+                    self.emit(':', ':')
+                    top.expect = _VALUE
+                else:
+                    self.note('stray_colon')
+                i += 1
+            elif char == ',':
+                top = self.stack[-1] if self.stack else None
+                if top is not None and top.expect == _COMMA:
+                    self.emit(',', ',')
+                    top.expect = _KEY if top.opener == '{' else _VALUE
+                else:
+                    self.note('stray_comma')
+                i += 1
+            else:
+                number = _NUMBER.match(text, i)
+                word = None if number else _WORD.match(text, i)
+                if number:
+                    self.value_started()
+                    self.emit(number.group(), 'number')
+                    self.value_finished()
+                    i = number.end()
+                elif word and word.group() in _LITERALS:
+                    literal = _LITERALS[word.group()]
+                    if literal != word.group():
+                        self.note('python_literal')
+                    self.value_started()
+                    self.emit(literal, literal)
+                    self.value_finished()
+                    i = word.end()
+                elif word and word.end() == self.length and any(
+                        lit.startswith(word.group()) for lit in ('true', 'false', 'null')):
+                    # Output cut off mid-literal
+                    self.note('truncated')
+                    literal = next(lit for lit in ('true', 'false', 'null') if lit.startswith(word.group()))
+                    self.value_started()
+                    self.emit(literal, literal)
+                    self.value_finished()
+                    i = word.end()
+                else:
+                    raise ValueError(f"Unexpected character {char!r} at position {i}")
+
+        if self.stack:
+            self.note('truncated')
+            while self.stack:
+                self.close(_CLOSERS[self.stack[-1].opener])
+        elif text[i:].strip():
+            self.note('stripped_suffix')
+
+        return ''.join(self.out)
+
+def repair_json(text):
+    """Parse JSON that may contain common LLM faults.
+
+    Returns (value, repairs) where repairs lists the fixes applied, in the order
+    they were first needed. Raises ValueError if the text cannot be salvaged.
+    """
+    starts = [pos for pos in (text.find('{'), text.find('[')) if pos >= 0]
+    if not starts:
+        raise ValueError("No JSON object or array found")
+    start = min(starts)
+
+    # Well-formed JSON wrapped in prose or code fences needs no rewriting
+    try:
+        value, end = _decoder.raw_decode(text, start)
+    except json.JSONDecodeError:
+        pass
+    else:
+        repairs = []
+        if text[:start].strip():
+            repairs.append('stripped_prefix')
+        if text[end:].strip():
+            repairs.append('stripped_suffix')
+        return value, repairs
+
+    repairer = _Repairer(text)
+    repaired = repairer.run(start)
+    try:
+        value = json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Could not repair JSON: {str(e)}")
+    return value, repairer.repairs
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from collections import deque
+from app.config.config import (
+    GEMINI_API_KEYS, GEMINI_KEY_RPM, GEMINI_KEY_TPM, GEMINI_KEY_RPD, YOUTUBE_API_KEYS,
+    YOUTUBE_KEY_UNITS_PER_DAY, KEY_COOLDOWN
+)
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+MINUTE = 60.0
+DAY = 86400.0
+
+class KeyUsage:
+    """Usage of one API key: a sliding minute window and a calendar (UTC) day."""
+
+    __slots__ = ('key', 'label', 'minute', 'minute_requests', 'minute_tokens', 'day', 'day_requests', 'day_tokens',
+                 'parked_until')
+
+    def __init__(self, key, label):
+        self.key = key
+        self.label = label
+        self.minute = deque()  # (timestamp, requests, tokens) charged in the last minute
+        self.minute_requests = 0
+        self.minute_tokens = 0
+        self.day = None
+        self.day_requests = 0
+        self.day_tokens = 0
+        self.parked_until = 0.0
+
+    def expire(self, now):
+        while self.minute and self.minute[0][0] <= now - MINUTE:
+            _, requests, tokens = self.minute.popleft()
+            self.minute_requests -= requests
+            self.minute_tokens -= tokens
+        day = int(now // DAY)
+        if day != self.day:
+            self.day, self.day_requests, self.day_tokens = day, 0, 0
+
+    def charge(self, now, requests, tokens):
+        self.minute.append((now, requests, tokens))
+        self.minute_requests += requests
+        self.minute_tokens += tokens
+        self.day_requests += requests
+        self.day_tokens += tokens
+
+class KeyPool:
+    """Balances calls across a provider's API keys and keeps each within its quotas.
+
+    Quotas are per key and 0 means unlimited. "Tokens" are whatever the provider meters:
+    Gemini tokens, or YouTube quota units. acquire() hands out the least-used key that has
+    capacity left and counts the request against it at once, so concurrent callers spread
+    out; record() adds the tokens a call actually used. A key the provider rejects for
+    quota is parked until its cooldown ends.
+    """
+
+    def __init__(self, provider, keys, requests_per_minute=0, tokens_per_minute=0, requests_per_day=0,
+                 tokens_per_day=0, cooldown=KEY_COOLDOWN):
+        self.provider = provider
+        self.quotas = {
+            'requests_per_minute': requests_per_minute,
+            'tokens_per_minute': tokens_per_minute,
+            'requests_per_day': requests_per_day,
+            'tokens_per_day': tokens_per_day,
+        }
+        self.cooldown = cooldown
+        # Keys are never logged or exported, not even in part; they are identified by position
+        self._usage = {key: KeyUsage(key, str(index)) for index, key in enumerate(dict.fromkeys(keys))}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._usage)
+
+    @property
+    def keys(self):
+        return list(self._usage)
+
+    def _used(self, usage):
+        return {
+            'requests_per_minute': usage.minute_requests,
+            'tokens_per_minute': usage.minute_tokens,
+            'requests_per_day': usage.day_requests,
+            'tokens_per_day': usage.day_tokens,
+        }
+
+    def _utilization(self, usage, tokens):
+        """Fraction of the tightest quota in use after `tokens` more; above 1 the key is full."""
+        used = self._used(usage)
+        fractions = [
+            (used[quota] + (1 if quota.startswith('requests') else tokens)) / limit
+            for quota, limit in self.quotas.items() if limit
+        ]
+        return max(fractions) if fractions else usage.minute_requests
+
+    def acquire(self, tokens=0):
+        """Return the least-used key with capacity for one request of `tokens`, or None."""
+        now = time.time()
+        with self._lock:
+            best, best_utilization = None, None
+            for usage in self._usage.values():
+                if usage.parked_until > now:
+                    continue
+                usage.expire(now)
+                utilization = self._utilization(usage, tokens)
+                if any(self.quotas.values()) and utilization > 1:
+                    continue
+                if best is None or utilization < best_utilization:
+                    best, best_utilization = usage, utilization
+            if best is None:
+                metrics.increment('api_key_exhausted', provider=self.provider)
+                return None
+            best.charge(now, 1, tokens)
+            return best.key
+
+    def record(self, key, tokens, requests=0):
+        """Charge a key for tokens used (and any extra requests made) beyond what acquire() counted."""
+        usage = self._usage.get(key)
+        if usage is None or not (tokens or requests):
+            return
+        now = time.time()
+        with self._lock:
+            usage.expire(now)
+            usage.charge(now, requests, tokens)
+
+    def park(self, key, seconds=None):
+        """Take a key out of rotation for `seconds` (default: the pool's cooldown)."""
+        usage = self._usage.get(key)
+        if usage is None:
+            return
+        seconds = max(self.cooldown, seconds or 0)
+        with self._lock:
+            usage.parked_until = max(usage.parked_until, time.time() + seconds)
+        metrics.increment('api_key_parks', provider=self.provider, key=usage.label)
+        logger.warning("%s API key %s hit its quota, parked for %.0fs", self.provider, usage.label, seconds)
+
+    def seconds_until_reset(self):
+        """Seconds until daily quotas reset (UTC midnight here; providers may reset on Pacific time)."""
+        return DAY - time.time() % DAY
+
+    def retry_after(self):
+        """Seconds until some key can take a request again."""
+        now = time.time()
+        with self._lock:
+            waits = []
+            for usage in self._usage.values():
+                usage.expire(now)
+                wait = max(0.0, usage.parked_until - now)
+                used = self._used(usage)
+                if any(used[quota] >= limit for quota, limit in self.quotas.items() if limit and quota.endswith('_day')):
+                    wait = max(wait, self.seconds_until_reset())
+                elif usage.minute and any(
+                    used[quota] >= limit for quota, limit in self.quotas.items() if limit and quota.endswith('_minute')
+                ):
+                    wait = max(wait, usage.minute[0][0] + MINUTE - now)
+                waits.append(wait)
+        return min(waits) if waits else self.cooldown
+
+    def remaining(self, key, quota):
+        usage = self._usage[key]
+        with self._lock:
+            usage.expire(time.time())
+            return max(0, self.quotas[quota] - self._used(usage)[quota])
+
+    def register_gauges(self):
+        """Export each key's remaining capacity and whether it is parked."""
+        for key, usage in self._usage.items():
+            for quota, limit in self.quotas.items():
+                if limit:
+                    metrics.register_gauge(
+                        'api_key_remaining', lambda key=key, quota=quota: self.remaining(key, quota),
+                        provider=self.provider, key=usage.label, quota=quota
+                    )
+            metrics.register_gauge(
+                'api_key_parked', lambda usage=usage: int(usage.parked_until > time.time()),
+                provider=self.provider, key=usage.label
+            )
+
+gemini_keys = KeyPool(
+    'gemini', GEMINI_API_KEYS, requests_per_minute=GEMINI_KEY_RPM, tokens_per_minute=GEMINI_KEY_TPM,
+    requests_per_day=GEMINI_KEY_RPD
+)
+youtube_keys = KeyPool('youtube', YOUTUBE_API_KEYS, tokens_per_day=YOUTUBE_KEY_UNITS_PER_DAY)
+
+for _pool in (gemini_keys, youtube_keys):
+    _pool.register_gauges()
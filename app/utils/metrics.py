@@ -0,0 +1,178 @@
+import threading
+from bisect import bisect_left
+
+# Process-wide counters, histograms and gauges, rendered in Prometheus text format by
+# /metrics. Every metric has its own lock; the registry locks are only taken to create a
+# metric. Stage histograms are allocated up front and an observation is one bisect and a
+# few integer updates under a short per-histogram lock, so they are cheap enough to leave
+# on in production.
+
+METRIC_PREFIX = 'atomic'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5)
+
+ENDPOINTS = ('roadmap', 'content', 'quiz')
+STAGES = ('request_parse', 'prompt_build', 'gemini_call', 'json_parse', 'validation', 'youtube_fetch')
+
+_counters = {}
+_counters_lock = threading.Lock()
+_histograms = {}
+_histograms_lock = threading.Lock()
+_gauges = {}
+_gauges_lock = threading.Lock()
+
+class Counter:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        with self._lock:
+            return self.value
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+def increment(name, amount=1, **labels):
+    """Add to a process-wide counter."""
+    key = (name, _labels_key(labels))
+    counter = _counters.get(key)
+    if counter is None:
+        with _counters_lock:
+            counter = _counters.get(key)
+            if counter is None:
+                counter = Counter()
+                _counters[key] = counter
+    counter.add(amount)
+
+def histogram(name, buckets=LATENCY_BUCKETS, **labels):
+    """Return the histogram for (name, labels), creating it on first use."""
+    key = (name, _labels_key(labels))
+    hist = _histograms.get(key)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.get(key)
+            if hist is None:
+                hist = Histogram(buckets)
+                _histograms[key] = hist
+    return hist
+
+# Pre-allocate every per-stage histogram so the request path never creates one
+_stage_histograms = {
+    (endpoint, stage): histogram('stage_duration_seconds', endpoint=endpoint, stage=stage)
+    for endpoint in ENDPOINTS for stage in STAGES
+}
+
+def observe_stage(endpoint, stage, seconds):
+    """Record how long one stage of an endpoint took."""
+    hist = _stage_histograms.get((endpoint, stage))
+    if hist is None:
+        hist = histogram('stage_duration_seconds', endpoint=endpoint, stage=stage)
+    hist.observe(seconds)
+
+def register_gauge(name, read, **labels):
+    """Expose a value that is read (by calling `read`) only when metrics are scraped."""
+    with _gauges_lock:
+        _gauges[(name, _labels_key(labels))] = read
+
+def _escape_label(value):
+    """Escape a label value as the Prometheus text format requires."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_name(name, labels):
+    if not labels:
+        return f"{METRIC_PREFIX}_{name}"
+    rendered = ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+    return f"{METRIC_PREFIX}_{name}{{{rendered}}}"
+
+def get_counters():
+    """Counters as a flat JSON-friendly dict."""
+    with _counters_lock:
+        items = list(_counters.items())
+    result = {}
+    for (name, labels), counter in items:
+        value = counter.snapshot()
+        key = name if not labels else name + '{' + ','.join(f"{k}={v}" for k, v in labels) + '}'
+        result[key] = value
+    return result
+
+def render_prometheus(extra_counters=()):
+    """Render all metrics in the Prometheus text exposition format.
+
+    extra_counters is an iterable of (name, labels_dict, value) read at scrape time,
+    e.g. cache statistics that are tracked elsewhere.
+    """
+    lines = []
+    typed = set()
+
+    def type_line(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+    with _counters_lock:
+        items = list(_counters.items())
+    counters = sorted((key, counter.snapshot()) for key, counter in items)
+    counters += sorted(
+        ((name, _labels_key(labels)), value) for name, labels, value in extra_counters
+    )
+    for (name, labels), value in counters:
+        metric = name if name.endswith('_total') else f"{name}_total"
+        type_line(metric, 'counter')
+        lines.append(f"{_format_name(metric, labels)} {value}")
+
+    with _gauges_lock:
+        gauges = sorted(_gauges.items(), key=lambda item: item[0])
+    for (name, labels), read in gauges:
+        try:
+            value = read()
+        except Exception:
+            continue
+        type_line(name, 'gauge')
+        lines.append(f"{_format_name(name, labels)} {value}")
+
+    with _histograms_lock:
+        histograms = sorted(_histograms.items(), key=lambda item: item[0])
+    for (name, labels), hist in histograms:
+        counts, total, count = hist.snapshot()
+        if not count:
+            continue
+        type_line(name, 'histogram')
+        cumulative = 0
+        for bound, bucket_count in zip(hist.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{_format_name(name + '_bucket', labels + (('le', bound),))} {cumulative}")
+        lines.append(f"{_format_name(name + '_bucket', labels + (('le', '+Inf'),))} {count}")
+        lines.append(f"{_format_name(name + '_sum', labels)} {total}")
+        lines.append(f"{_format_name(name + '_count', labels)} {count}")
+
+    return '\n'.join(lines) + '\n'
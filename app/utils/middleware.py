@@ -1,48 +1,65 @@
-import time
+import math
 import logging
-import traceback
-from flask import request, jsonify
+import re
+import time
+import uuid
+from flask import g, request, jsonify
 from werkzeug.exceptions import HTTPException
-from app.config.config import RATE_LIMIT_WINDOW, MAX_REQUESTS_PER_WINDOW, ERROR_MESSAGES
+from app.config.config import ERROR_MESSAGES
+from app.utils.rate_limiter import create_rate_limiter, get_client_ip
+from app.utils.concurrency import live_requests
+from app.utils import metrics
 
 logger = logging.getLogger(__name__)
-request_timestamps = {}
+
+# Client-supplied request ids are echoed back only if they look like ids
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
 
 def setup_middleware(app):
+    rate_limiter = create_rate_limiter()
+    app.extensions['rate_limiter'] = rate_limiter
+
     @app.before_request
     def before_request():
-        logger.info(f"Request: {request.method} {request.path} - {request.remote_addr}")
-        logger.debug(f"Request headers: {dict(request.headers)}")  # Log headers to debug
+        g.request_started_at = time.monotonic()
+        live_requests.increment()
+        g.counted_live_request = True
+        request_id = request.headers.get('X-Request-Id', '')
+        g.request_id = request_id if _REQUEST_ID.match(request_id) else uuid.uuid4().hex[:16]
+        client_ip = get_client_ip(request)
+        logger.info("Request: %s %s - %s", request.method, request.path, client_ip)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request headers: %s", dict(request.headers))
         
-        client_ip = request.remote_addr
-        # Add support for forwarded IP in case your app is behind a proxy
-        if request.headers.get('X-Forwarded-For'):
-            client_ip = request.headers.get('X-Forwarded-For')
-            logger.info(f"Using forwarded IP: {client_ip}")
+        if request.blueprint == 'health' or request.endpoint == 'jobs.get_job':
+            # Health checks, metrics scrapes and job polls must not use up a client's request budget
+            return
         
-        current_time = time.time()
-        
-        for ip in list(request_timestamps.keys()):
-            timestamps = request_timestamps[ip]
-            request_timestamps[ip] = [ts for ts in timestamps if current_time - ts < RATE_LIMIT_WINDOW]
-            if not request_timestamps[ip]:
-                del request_timestamps[ip]
-        
-        if client_ip in request_timestamps:
-            if len(request_timestamps[client_ip]) >= MAX_REQUESTS_PER_WINDOW:
-                logger.warning(f"Rate limit exceeded for {client_ip}")
-                return jsonify({
-                    "error": ERROR_MESSAGES['rate_limit'],
-                    "retry_after": RATE_LIMIT_WINDOW - (current_time - min(request_timestamps[client_ip]))
-                }), 429
-            
-            request_timestamps[client_ip].append(current_time)
-        else:
-            request_timestamps[client_ip] = [current_time]
+        result = rate_limiter.hit(client_ip)
+        if not result.allowed:
+            logger.warning("Rate limit exceeded for %s", client_ip)
+            metrics.increment('rate_limit_rejections')
+            response = jsonify({
+                "error": ERROR_MESSAGES['rate_limit'],
+                "retry_after": result.retry_after
+            })
+            response.headers['Retry-After'] = str(math.ceil(result.retry_after))
+            return response, 429
+
+    @app.after_request
+    def add_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-Id'] = g.request_id
+        return response
+
+    @app.teardown_request
+    def teardown_request(exc):
+        if g.pop('counted_live_request', False):
+            live_requests.decrement()
 
     @app.errorhandler(Exception)
     def handle_exception(e):
-        logger.error(f"Unhandled exception: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Unhandled exception: %s", e, exc_info=True)
         
         if isinstance(e, HTTPException):
             return jsonify({
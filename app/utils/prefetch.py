@@ -0,0 +1,138 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from app.config.config import (
+    PREFETCH_ENABLED, PREFETCH_WORKERS, PREFETCH_MAX_PENDING, PREFETCH_BUDGET_PER_HOUR,
+    PREFETCH_TOPICS, PREFETCH_QUIZZES, PREFETCH_MAX_LIVE_REQUESTS, PREFETCH_MAX_DEFER
+)
+from app.utils import metrics
+from app.utils.concurrency import live_requests
+from app.utils.rate_limiter import RateLimiter, TokenBucket, MemoryStore
+
+logger = logging.getLogger(__name__)
+
+# key(topic, level) -> cache key; fill(topic, level, key) -> True if it generated and stored a result
+PrefetchHandler = namedtuple('PrefetchHandler', ['key', 'fill'])
+
+_handlers = {}
+
+def register_prefetch_handler(kind, key, fill):
+    """Let a blueprint declare how to prefetch its results for a topic."""
+    _handlers[kind] = PrefetchHandler(key, fill)
+
+class Prefetcher:
+    """Bounded, budgeted background generation that always yields to live requests."""
+
+    # Prefetched keys remembered for the prefetch_used metric
+    max_tracked = 10000
+
+    def __init__(self, workers=PREFETCH_WORKERS, max_pending=PREFETCH_MAX_PENDING,
+                 budget_per_hour=PREFETCH_BUDGET_PER_HOUR, max_live_requests=PREFETCH_MAX_LIVE_REQUESTS,
+                 max_defer=PREFETCH_MAX_DEFER):
+        self.workers = workers
+        self.max_live_requests = max_live_requests
+        self.max_defer = max_defer
+        self._queue = queue.PriorityQueue(maxsize=max_pending)
+        self._order = itertools.count()
+        self._budget = RateLimiter(TokenBucket(budget_per_hour, 3600), MemoryStore())
+        self._pending = set()
+        self._prefetched = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _start_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"prefetch-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def schedule(self, kind, topic, level, priority=0):
+        """Queue one prefetch; returns False when it is a duplicate, over budget or the queue is full."""
+        handler = _handlers.get(kind)
+        if handler is None:
+            return False
+        key = handler.key(topic, level)
+        with self._lock:
+            if key in self._pending or key in self._prefetched:
+                return False
+        
+        if not self._budget.hit('prefetch').allowed:
+            metrics.increment('prefetch_skipped_budget')
+            return False
+        try:
+            self._queue.put_nowait((priority, next(self._order), kind, topic, level, key))
+        except queue.Full:
+            metrics.increment('prefetch_skipped_queue_full')
+            return False
+        
+        with self._lock:
+            self._pending.add(key)
+        metrics.increment('prefetch_scheduled')
+        self._start_workers()
+        return True
+
+    def _wait_for_idle(self):
+        """Hold back while live traffic is busy; give up after max_defer seconds."""
+        deadline = time.monotonic() + self.max_defer
+        while live_requests.value > self.max_live_requests:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _run(self):
+        while True:
+            _, _, kind, topic, level, key = self._queue.get()
+            try:
+                if not self._wait_for_idle():
+                    metrics.increment('prefetch_skipped_busy')
+                    continue
+                if _handlers[kind].fill(topic, level, key):
+                    with self._lock:
+                        self._prefetched[key] = time.time()
+                        while len(self._prefetched) > self.max_tracked:
+                            self._prefetched.popitem(last=False)
+                    metrics.increment('prefetch_completed')
+                else:
+                    metrics.increment('prefetch_skipped_cached')
+            except Exception as e:
+                logger.warning("Prefetch of %s for '%s' failed: %s", kind, topic, e)
+                metrics.increment('prefetch_failed')
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+    def mark_used(self, key):
+        """Record that a live request was served from a prefetched result."""
+        with self._lock:
+            used = self._prefetched.pop(key, None) is not None
+        if used:
+            metrics.increment('prefetch_used')
+        return used
+
+prefetcher = Prefetcher()
+
+def prefetch_roadmap_topics(roadmap, level):
+    """Queue content (and optionally quizzes) for the first PREFETCH_TOPICS topics of a roadmap."""
+    if not PREFETCH_ENABLED:
+        return
+    topics = []
+    for module in roadmap.get('modules', []):
+        for topic in module.get('topics', []):
+            if isinstance(topic, str) and topic.strip():
+                topics.append(topic.strip())
+        if len(topics) >= PREFETCH_TOPICS:
+            break
+    
+    # Earlier topics first; a topic's content ranks ahead of its quiz
+    for index, topic in enumerate(topics[:PREFETCH_TOPICS]):
+        prefetcher.schedule('content', topic, level, priority=index * 2)
+        if PREFETCH_QUIZZES:
+            prefetcher.schedule('quiz', topic, level, priority=index * 2 + 1)
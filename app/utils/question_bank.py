@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from app.config.config import QUESTION_BANK_ENABLED, QUESTION_BANK_DB_PATH, QUESTION_BANK_SESSION_TTL
+from app.utils.topics import canonicalize_topic, trigrams
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r'\W+')
+
+def normalize_question(question_text):
+    return ' '.join(_NON_WORD.sub(' ', question_text.casefold()).split())
+
+def question_fingerprint(question_text):
+    """Identical questions up to case, whitespace and punctuation share a fingerprint."""
+    return hashlib.sha256(normalize_question(question_text).encode('utf-8')).hexdigest()[:32]
+
+def remove_near_duplicates(questions, threshold):
+    """Drop questions whose normalized text is too similar to an earlier one.
+
+    Similarity is the Jaccard index of character trigrams, as for topics; a question is
+    dropped when it reaches `threshold` against any question kept before it.
+    """
+    kept, kept_grams = [], []
+    for question in questions:
+        grams = trigrams(normalize_question(question['question']))
+        if any(len(grams & other) / len(grams | other) >= threshold for other in kept_grams):
+            continue
+        kept.append(question)
+        kept_grams.append(grams)
+    return kept
+
+def _normalize_level(level):
+    return ' '.join(str(level).split()).casefold()
+
+class QuestionBank:
+    """SQLite store of validated quiz questions, indexed with FTS5 on topic, level and question text.
+
+    Questions are de-duplicated per (topic, level) by fingerprint. Sampling is random and
+    skips questions already served to the same session.
+    """
+
+    def __init__(self, path=QUESTION_BANK_DB_PATH, enabled=QUESTION_BANK_ENABLED,
+                 session_ttl=QUESTION_BANK_SESSION_TTL):
+        self.path = path
+        self.enabled = enabled
+        self.session_ttl = session_ttl
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id INTEGER PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    UNIQUE (topic, level, fingerprint)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+                    topic, level, question, content='questions', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+                    INSERT INTO questions_fts (rowid, topic, level, question)
+                    VALUES (new.id, new.topic, new.level, new.question);
+                END;
+                CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+                    INSERT INTO questions_fts (questions_fts, rowid, topic, level, question)
+                    VALUES ('delete', old.id, old.topic, old.level, old.question);
+                END;
+                CREATE TABLE IF NOT EXISTS served_questions (
+                    session_id TEXT NOT NULL,
+                    question_id INTEGER NOT NULL,
+                    served_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, question_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_served_questions_age ON served_questions (served_at);
+            """)
+            self._local.conn = conn
+        return conn
+
+    def add(self, topic, level, questions):
+        """Store questions, skipping duplicates; returns the bank id of each question, in order."""
+        if not self.enabled or not questions:
+            return []
+        topic, level = canonicalize_topic(topic), _normalize_level(level)
+        conn = self._connect()
+        now = time.time()
+        ids = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for question in questions:
+                fingerprint = question_fingerprint(question['question'])
+                conn.execute(
+                    "INSERT OR IGNORE INTO questions (topic, level, question, fingerprint, payload, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (topic, level, question['question'], fingerprint, json.dumps(question), now)
+                )
+                ids.append(conn.execute(
+                    "SELECT id FROM questions WHERE topic = ? AND level = ? AND fingerprint = ?",
+                    (topic, level, fingerprint)
+                ).fetchone()[0])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def sample(self, topic, level, count, session_id=None):
+        """Up to `count` random (id, question) pairs for the topic and level.
+
+        Questions stored under the topic itself come first, then ones from broader topics
+        that contain it (e.g. "python decorators" for "decorators"). Questions already
+        served to session_id are skipped.
+        """
+        if not self.enabled or count <= 0:
+            return []
+        topic, level = canonicalize_topic(topic), _normalize_level(level)
+        if not topic:
+            return []
+        phrase = '"' + topic.replace('"', '""') + '"'
+        query = (
+            "SELECT q.id, q.payload FROM questions_fts JOIN questions q ON q.id = questions_fts.rowid "
+            "WHERE questions_fts MATCH ? AND q.level = ? AND (' ' || q.topic || ' ') LIKE ? "
+        )
+        # The FTS tokenizer drops symbols ("c++" is just "c"), so also require the words in order
+        params = [f"topic : {phrase}", level, f"% {topic} %"]
+        if session_id:
+            query += "AND q.id NOT IN (SELECT question_id FROM served_questions WHERE session_id = ?) "
+            params.append(session_id)
+        query += "ORDER BY q.topic != ?, random() LIMIT ?"
+        params += [topic, count]
+        rows = self._connect().execute(query, params).fetchall()
+        return [(question_id, json.loads(payload)) for question_id, payload in rows]
+
+    def mark_served(self, session_id, question_ids):
+        """Remember which questions a session has seen so later quizzes don't repeat them."""
+        if not self.enabled or not session_id or not question_ids:
+            return
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO served_questions (session_id, question_id, served_at) VALUES (?, ?, ?)",
+                [(session_id, question_id, now) for question_id in question_ids]
+            )
+            conn.execute("DELETE FROM served_questions WHERE served_at <= ?", (now - self.session_ttl,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def served(self, session_id, question_ids):
+        """The subset of question_ids already served to session_id."""
+        if not self.enabled or not session_id or not question_ids:
+            return set()
+        placeholders = ','.join('?' * len(question_ids))
+        rows = self._connect().execute(
+            f"SELECT question_id FROM served_questions WHERE session_id = ? AND question_id IN ({placeholders})",
+            [session_id, *question_ids]
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def __len__(self):
+        if not self.enabled:
+            return 0
+        return self._connect().execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+question_bank = QuestionBank()
@@ -0,0 +1,204 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from app.config.config import (
+    RATE_LIMIT_WINDOW, MAX_REQUESTS_PER_WINDOW, RATE_LIMIT_ALGORITHM, RATE_LIMIT_BACKEND, RATE_LIMIT_DB_PATH,
+    TRUSTED_PROXY_COUNT
+)
+
+logger = logging.getLogger(__name__)
+
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'remaining', 'retry_after'])
+
+# Each algorithm keeps a fixed-size state tuple of three floats per client and
+# updates it in constant time, so a check never depends on how many clients exist.
+
+class TokenBucket:
+    """Bucket of `limit` tokens refilled continuously over `window` seconds."""
+
+    name = 'token_bucket'
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+        # An idle bucket is full again after one window, so its state can be dropped
+        self.idle_ttl = window
+
+    def check(self, state, now, cost=1):
+        if state is None:
+            tokens, last = float(self.limit), now
+        else:
+            tokens, last, _ = state
+            tokens = min(float(self.limit), tokens + (now - last) * self.rate)
+
+        if tokens >= cost:
+            tokens -= cost
+            return (tokens, now, 0.0), RateLimitResult(True, int(tokens), 0.0)
+
+        retry_after = (cost - tokens) / self.rate
+        return (tokens, now, 0.0), RateLimitResult(False, 0, retry_after)
+
+class SlidingWindowCounter:
+    """Fixed windows weighted by overlap, approximating a sliding log with O(1) state."""
+
+    name = 'sliding_window'
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        # After two idle windows both counters are zero
+        self.idle_ttl = 2 * window
+
+    def check(self, state, now, cost=1):
+        window_start = now - (now % self.window)
+        if state is None:
+            current, previous = 0.0, 0.0
+        else:
+            state_start, current, previous = state
+            if state_start != window_start:
+                previous = current if window_start - state_start == self.window else 0.0
+                current = 0.0
+
+        weight = 1 - (now - window_start) / self.window
+        estimated = previous * weight + current
+        if estimated + cost <= self.limit:
+            current += cost
+            remaining = int(self.limit - estimated - cost)
+            return (window_start, current, previous), RateLimitResult(True, remaining, 0.0)
+
+        if previous and current + cost <= self.limit:
+            # Wait until enough of the previous window has slid out of view
+            needed_weight = (self.limit - current - cost) / previous
+            retry_after = (1 - needed_weight) * self.window - (now - window_start)
+        else:
+            retry_after = self.window - (now - window_start)
+        return (window_start, current, previous), RateLimitResult(False, 0, max(retry_after, 0.0))
+
+ALGORITHMS = {
+    TokenBucket.name: TokenBucket,
+    SlidingWindowCounter.name: SlidingWindowCounter,
+}
+
+class MemoryStore:
+    """Per-process state with lazy expiry of idle clients."""
+
+    name = 'memory'
+
+    # Idle entries reaped per update; keeps cleanup amortized O(1) instead of a full sweep
+    reap_batch = 8
+
+    def __init__(self):
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key, check, now, idle_ttl):
+        with self._lock:
+            entry = self._states.pop(key, None)
+            state = entry[0] if entry is not None and now - entry[1] < idle_ttl else None
+            new_state, result = check(state, now)
+            # Entries stay ordered by last update, so idle ones collect at the front
+            self._states[key] = (new_state, now)
+
+            for _ in range(self.reap_batch):
+                oldest_key, (_, updated_at) = next(iter(self._states.items()))
+                if now - updated_at < idle_ttl:
+                    break
+                del self._states[oldest_key]
+        return result
+
+    def __len__(self):
+        return len(self._states)
+
+class SQLiteStore:
+    """State shared by every worker process that points at the same database file."""
+
+    name = 'sqlite'
+
+    reap_batch = 8
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    key TEXT PRIMARY KEY,
+                    a REAL NOT NULL,
+                    b REAL NOT NULL,
+                    c REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limits_expiry ON rate_limits (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def update(self, key, check, now, idle_ttl):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT a, b, c, expires_at FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            state = row[:3] if row is not None and row[3] > now else None
+            new_state, result = check(state, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, a, b, c, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, *new_state, now + idle_ttl)
+            )
+            conn.execute(
+                "DELETE FROM rate_limits WHERE rowid IN ("
+                "SELECT rowid FROM rate_limits WHERE expires_at <= ? LIMIT ?)",
+                (now, self.reap_batch)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+class RateLimiter:
+    def __init__(self, algorithm, store):
+        self.algorithm = algorithm
+        self.store = store
+
+    def hit(self, key, cost=1, now=None):
+        """Record a request for key and report whether it is within the limit."""
+        now = time.time() if now is None else now
+        return self.store.update(
+            key, lambda state, ts: self.algorithm.check(state, ts, cost), now, self.algorithm.idle_ttl
+        )
+
+def create_rate_limiter(algorithm=RATE_LIMIT_ALGORITHM, backend=RATE_LIMIT_BACKEND,
+                        limit=MAX_REQUESTS_PER_WINDOW, window=RATE_LIMIT_WINDOW):
+    if algorithm not in ALGORITHMS:
+        logger.warning("Unknown RATE_LIMIT_ALGORITHM '%s', falling back to sliding_window", algorithm)
+        algorithm = SlidingWindowCounter.name
+    store = SQLiteStore(RATE_LIMIT_DB_PATH) if backend == 'sqlite' else MemoryStore()
+    return RateLimiter(ALGORITHMS[algorithm](limit, window), store)
+
+def get_client_ip(req, trusted_proxies=TRUSTED_PROXY_COUNT):
+    """Client address as seen by the outermost of `trusted_proxies` proxies.
+
+    Each proxy appends the address it received the request from to X-Forwarded-For,
+    so only the last `trusted_proxies` entries can be trusted; anything to their left
+    was sent by the client and may be forged. Without the header (or with no trusted
+    proxies) the connection's own address is used.
+    """
+    forwarded_for = req.headers.get('X-Forwarded-For', '')
+    hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+    if trusted_proxies <= 0 or not hops:
+        return req.remote_addr
+    return hops[max(0, len(hops) - trusted_proxies)]
@@ -0,0 +1,146 @@
+import logging
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+from app.config.config import CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RECOVERY_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+ErrorClass = namedtuple('ErrorClass', ['retryable', 'upstream_failure', 'retry_after'])
+
+_RETRY_IN_PATTERN = re.compile(r'retry in ([0-9.]+)\s*s', re.IGNORECASE)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that the circuit breaker considers unhealthy."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class KeysExhaustedError(CircuitOpenError):
+    """Raised instead of calling an upstream when every API key is parked or out of quota."""
+
+    def __init__(self, provider, retry_after):
+        Exception.__init__(self, f"All {provider} API keys are out of quota; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+def _retry_hint(e):
+    """Extract a server-provided retry delay (RetryInfo detail, Retry-After header or message)."""
+    for detail in getattr(e, 'details', None) or []:
+        retry_delay = getattr(detail, 'retry_delay', None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    response = getattr(e, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    if headers.get('Retry-After'):
+        try:
+            return float(headers['Retry-After'])
+        except ValueError:
+            pass
+
+    match = _RETRY_IN_PATTERN.search(str(e))
+    return float(match.group(1)) if match else None
+
+def is_quota_error(e):
+    """True for a 429 / RESOURCE_EXHAUSTED from the Gemini SDK."""
+    google_exceptions = sys.modules.get('google.api_core.exceptions')
+    return google_exceptions is not None and isinstance(
+        e, (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted)
+    )
+
+def classify_exception(e):
+    """Decide whether an error is worth retrying and whether it reflects upstream health."""
+    if isinstance(e, CircuitOpenError):
+        return ErrorClass(False, False, e.retry_after)
+
+    # Importing google-api-core pulls in grpc, so it is only consulted once the SDK has loaded it;
+    # until then no error can be one of its exceptions
+    google_exceptions = sys.modules.get('google.api_core.exceptions')
+    if google_exceptions is not None and isinstance(e, google_exceptions.GoogleAPICallError):
+        if isinstance(e, (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted)):
+            return ErrorClass(True, True, _retry_hint(e))
+        if isinstance(e, (google_exceptions.ServerError, google_exceptions.DeadlineExceeded,
+                          google_exceptions.Aborted)):
+            return ErrorClass(True, True, _retry_hint(e))
+        # 4xx such as InvalidArgument, PermissionDenied or Unauthenticated can never succeed
+        return ErrorClass(False, False, None)
+
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return ErrorClass(True, True, None)
+
+    # Malformed model output: a fresh sample may well be valid
+    if isinstance(e, ValueError):
+        return ErrorClass(True, False, None)
+
+    return ErrorClass(False, False, None)
+
+class CircuitBreaker:
+    """Closed -> open after consecutive upstream failures -> half-open single probe -> closed."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout=CIRCUIT_BREAKER_RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == self.OPEN and elapsed >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.name, max(self.recovery_timeout - elapsed, 1.0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit '%s' closed", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """End a call that says nothing about upstream health, freeing the half-open probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit '%s' opened after %s upstream failures", self.name, self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def record(self, error_class):
+        """Feed the outcome of a failed call; only upstream failures count against the circuit.
+
+        Other errors (no API key left, a rejected request, malformed output) say nothing about
+        upstream health: they neither reset the failure count nor close a half-open circuit.
+        """
+        if error_class.upstream_failure:
+            self.record_failure()
+        else:
+            self.release()
+
+gemini_breaker = CircuitBreaker('gemini')
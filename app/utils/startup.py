@@ -0,0 +1,61 @@
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+from app.config.config import STARTUP_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Modules that dominate a cold start when they are imported eagerly
+HEAVY_MODULES = ('google.generativeai', 'grpc', 'google.api_core', 'requests')
+
+_timings = {}
+_first_request = {}
+_lock = threading.Lock()
+
+def record(phase, seconds):
+    """Record how long a startup phase took; the first measurement of a phase wins."""
+    with _lock:
+        _timings.setdefault(phase, seconds)
+    if STARTUP_PROFILE:
+        logger.info("Startup phase %s: %.1fms", phase, seconds * 1000)
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+def install_first_request_timer(app):
+    """Record the path and duration of the first request the process serves."""
+    @app.before_request
+    def _start_first_request():
+        if not _first_request:
+            g.startup_request_start = time.perf_counter()
+
+    @app.after_request
+    def _finish_first_request(response):
+        start = g.pop('startup_request_start', None)
+        if start is not None:
+            with _lock:
+                if not _first_request:
+                    _first_request.update(path=request.path, status=response.status_code,
+                                          seconds=time.perf_counter() - start)
+                    logger.info("First request %s took %.1fms", request.path, _first_request['seconds'] * 1000)
+        return response
+
+def get_startup_timings():
+    with _lock:
+        return {
+            "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in _timings.items()},
+            "first_request": {
+                "path": _first_request['path'],
+                "status": _first_request['status'],
+                "ms": round(_first_request['seconds'] * 1000, 2),
+            } if _first_request else None,
+            "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+        }
@@ -0,0 +1,115 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context
+from app.config.config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_MAX_MESSAGE_CHARS, LOG_PAYLOAD_MAX_CHARS, LOG_PAYLOAD_SAMPLE_RATE
+)
+from app.utils import metrics
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listener = None
+
+def truncate(text, limit):
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+
+def log_payload(logger, level, label, payload):
+    """Log a large payload (e.g. model output) truncated to LOG_PAYLOAD_MAX_CHARS, for a sample of calls."""
+    if not logger.isEnabledFor(level) or random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    logger.log(level, "%s: %s", label, truncate(payload if payload is not None else 'None', LOG_PAYLOAD_MAX_CHARS))
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the id of the request being served, while still on the request thread."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueue records without formatting them; a full queue drops the record instead of blocking.
+
+    Message arguments are merged on the writer thread, so callers pass immutable values.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Tracebacks reference live frames; render them while they are still accurate
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment('log_records_dropped')
+
+class TruncatingFormatter(logging.Formatter):
+    def formatMessage(self, record):
+        record.message = truncate(record.message, LOG_MAX_MESSAGE_CHARS)
+        return super().formatMessage(record)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the timestamp, level, logger, request id and message."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, 'request_id', '-'),
+            "message": truncate(record.getMessage(), LOG_MAX_MESSAGE_CHARS),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+def configure_logging(level=LOG_LEVEL, log_format=LOG_FORMAT, stream=None):
+    """Route all logging through a bounded queue drained by a background writer thread.
+
+    Safe to call again (e.g. from a benchmark); the previous writer is flushed and stopped.
+    """
+    global _listener
+    stop_logging()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else TruncatingFormatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Write out queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
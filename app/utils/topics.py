@@ -0,0 +1,223 @@
+import json
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from app.config.config import (
+    TOPIC_ALIASES, TOPIC_ALIASES_FILE, TOPIC_FILLER_WORDS, TOPIC_SIMILARITY_ENABLED,
+    TOPIC_SIMILARITY_THRESHOLD, TOPIC_INDEX_MAX_ENTRIES
+)
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Everything except letters, digits, '+' and '#' separates words, so "C++" and "C#" survive
+_SEPARATORS = re.compile(r'[^\w+#]+|_')
+_DIGITS = re.compile(r'\d')
+# A word that is another topic's word behind one of these ("unsupervised") negates it
+NEGATING_PREFIXES = ('un', 'non', 'anti', 'dis')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def _load_aliases():
+    aliases = dict(TOPIC_ALIASES)
+    if TOPIC_ALIASES_FILE:
+        try:
+            with open(TOPIC_ALIASES_FILE) as f:
+                aliases.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error("Could not load topic aliases from %s: %s", TOPIC_ALIASES_FILE, e)
+    # Keys and values are folded the same way as topics, so lookups compare like with like
+    return {_fold(key): _fold(value) for key, value in aliases.items() if _fold(key)}
+
+def _fold(text):
+    return ' '.join(_SEPARATORS.sub(' ', str(text).casefold()).split())
+
+def _alias_pattern(aliases):
+    if not aliases:
+        return None
+    keys = sorted(aliases, key=len, reverse=True)
+    return re.compile(r'(?<![\w+#])(?:' + '|'.join(re.escape(key) for key in keys) + r')(?![\w+#])')
+
+_aliases = _load_aliases()
+_alias_re = _alias_pattern(_aliases)
+_fillers = frozenset(word.strip().casefold() for word in TOPIC_FILLER_WORDS if word.strip())
+
+def canonicalize_topic(topic):
+    """Fold case, punctuation and whitespace, expand aliases and drop filler words.
+
+    "Intro to Machine-Learning", "ML basics" and "machine learning " all become
+    "machine learning". The result is stable: canonicalizing it again changes nothing.
+    """
+    folded = _fold(topic)
+    if _alias_re is not None:
+        folded = _alias_re.sub(lambda match: _aliases[match.group()], folded)
+    words = folded.split()
+    kept = [word for word in words if word not in _fillers]
+    # A topic made only of filler words ("Getting Started") keeps them
+    return ' '.join(kept or words)
+
+def trigrams(canonical):
+    padded = f"  {canonical} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _numbers(canonical):
+    return frozenset(word for word in canonical.split() if _DIGITS.search(word))
+
+def _distinct_subjects(canonical, candidate):
+    """True for similar-looking topics that are different subjects.
+
+    That is when one adds words to the other ("binary search tree" and "binary search")
+    or negates one of its words ("unsupervised learning" and "supervised learning").
+    """
+    words, candidate_words = set(canonical.split()), set(candidate.split())
+    if words < candidate_words or candidate_words < words:
+        return True
+    for own, other in ((words - candidate_words, candidate_words), (candidate_words - words, words)):
+        for word in own:
+            if any(word.startswith(prefix) and word[len(prefix):] in other for prefix in NEGATING_PREFIXES):
+                return True
+    return False
+
+class TopicIndex:
+    """Character-trigram index over canonical topics for Jaccard-similarity lookups.
+
+    Posting lists are kept per (trigram, topic size). Two sets of sizes n and m with
+    Jaccard similarity >= t share at least a = ceil(t * (n + m) / (1 + t)) trigrams, so
+    for each size m in range a match must appear in MIN_HITS of the query's k - a +
+    MIN_HITS rarest lists for that size (k being the query's non-empty lists). Those
+    few lists are combined with set operations and only the survivors are scored.
+    """
+
+    MIN_HITS = 3
+
+    def __init__(self, threshold=TOPIC_SIMILARITY_THRESHOLD, max_entries=TOPIC_INDEX_MAX_ENTRIES):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # canonical topic -> trigram set, oldest first
+        self._postings = {}  # (trigram, trigram count) -> set of canonical topics
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, topic):
+        canonical = canonicalize_topic(topic)
+        if not canonical:
+            return
+        grams = trigrams(canonical)
+        size = len(grams)
+        with self._lock:
+            if canonical in self._entries:
+                self._entries.move_to_end(canonical)
+                return
+            self._entries[canonical] = grams
+            for gram in grams:
+                self._postings.setdefault((gram, size), set()).add(canonical)
+            while len(self._entries) > self.max_entries:
+                self._remove_oldest()
+
+    def _remove_oldest(self):
+        canonical, grams = self._entries.popitem(last=False)
+        size = len(grams)
+        for gram in grams:
+            posting = self._postings.get((gram, size))
+            if posting is not None:
+                posting.discard(canonical)
+                if not posting:
+                    del self._postings[(gram, size)]
+
+    def _candidates(self, query, size):
+        """Topics of `size` trigrams that may reach the threshold against `query`."""
+        min_overlap = math.ceil(self.threshold * (len(query) + size) / (1 + self.threshold))
+        lists = [self._postings.get((gram, size)) for gram in query]
+        lists = [posting for posting in lists if posting]
+        if len(lists) < min_overlap:
+            return ()
+        # A match is in at least min_overlap of these lists, so it is missing from at
+        # most len(lists) - min_overlap and must hit `hits` of the rarest ones below
+        hits = min(self.MIN_HITS, min_overlap)
+        lists.sort(key=len)
+        lists = lists[:len(lists) - min_overlap + hits]
+        if hits == len(lists):
+            return lists[0].intersection(*lists[1:])
+        # at_least[j] holds the topics seen in at least j + 1 of the lists so far
+        at_least = [set() for _ in range(hits)]
+        for posting in lists:
+            for j in range(hits - 1, 0, -1):
+                at_least[j] |= at_least[j - 1] & posting
+            at_least[0] |= posting
+        return at_least[-1]
+
+    def similar(self, topic, limit=3):
+        """Indexed topics similar to `topic`, best first, as (canonical, score) pairs.
+
+        The topic itself (an exact canonical match) is not included.
+        """
+        canonical = canonicalize_topic(topic)
+        if not canonical:
+            return []
+        query = trigrams(canonical)
+        query_size = len(query)
+        numbers = _numbers(canonical)
+
+        scored = []
+        with self._lock:
+            for size in range(math.ceil(self.threshold * query_size), int(query_size / self.threshold) + 1):
+                for candidate in self._candidates(query, size):
+                    if candidate == canonical:
+                        continue
+                    overlap = len(query & self._entries[candidate])
+                    score = overlap / (query_size + size - overlap)
+                    # "Python 2" and "Python 3" look alike but are different requests
+                    if score < self.threshold or _numbers(candidate) != numbers:
+                        continue
+                    if _distinct_subjects(canonical, candidate):
+                        continue
+                    scored.append((candidate, score))
+
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+def get_topic_index(namespace):
+    """Return the process-wide topic index for a cache namespace."""
+    with _indexes_lock:
+        index = _indexes.get(namespace)
+        if index is None:
+            index = TopicIndex()
+            _indexes[namespace] = index
+        return index
+
+def remember_topic(namespace, topic):
+    """Record that a result for `topic` was stored so similar topics can reuse it."""
+    if TOPIC_SIMILARITY_ENABLED:
+        get_topic_index(namespace).add(topic)
+
+def lookup_topic(cache, namespace, topic, key_for):
+    """Look up a cached result for `topic`, falling back to near-duplicate topics.
+
+    key_for(topic) builds the cache key for a topic with the caller's other key parts,
+    so a near match is only served if it was generated with the same level, format etc.
+    Returns (value, cache_key); value is None on a miss and cache_key is then the key
+    for `topic` itself.
+    """
+    cache_key = key_for(topic)
+    value = cache.get(cache_key)
+    if value is not None or not TOPIC_SIMILARITY_ENABLED or not cache.enabled:
+        return value, cache_key
+
+    for candidate, score in get_topic_index(namespace).similar(topic):
+        candidate_key = key_for(candidate)
+        # peek first so candidates cached under another level don't count as misses
+        if not cache.peek(candidate_key):
+            continue
+        value = cache.get(candidate_key)
+        if value is not None:
+            logger.info("Serving cached %s for '%s' to similar topic '%s' (score %.2f)", namespace, candidate, topic, score)
+            metrics.increment('topic_similarity_hits', namespace=namespace)
+            return value, candidate_key
+    return None, cache_key
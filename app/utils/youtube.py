@@ -0,0 +1,161 @@
+import logging
+import threading
+from app.config.config import (
+    YOUTUBE_API_URL, YOUTUBE_POOL_SIZE, YOUTUBE_RETRIES, YOUTUBE_TIMEOUT, YOUTUBE_CACHE_TTL,
+    YOUTUBE_NEGATIVE_CACHE_TTL, YOUTUBE_SEARCH_COST
+)
+from app.utils import metrics
+from app.utils.cache import get_cache, make_cache_key
+from app.utils.concurrency import get_executor
+from app.utils.key_pool import youtube_keys
+from app.utils.singleflight import SingleFlight
+from app.utils.topics import canonicalize_topic
+
+logger = logging.getLogger(__name__)
+
+# 403 reasons (besides any 429) that mean a key ran out of quota
+QUOTA_REASONS = ('quotaExceeded', 'dailyLimitExceeded', 'rateLimitExceeded', 'userRateLimitExceeded')
+DAILY_QUOTA_REASONS = ('quotaExceeded', 'dailyLimitExceeded')
+
+def _quota_reason(response):
+    """The quota error reason of a 403/429 response, or None if it wasn't about quota."""
+    if response.status_code == 429:
+        return 'rateLimitExceeded'
+    if response.status_code != 403:
+        return None
+    try:
+        errors = response.json().get("error", {}).get("errors", [])
+    except ValueError:
+        return None
+    for error in errors:
+        if error.get("reason") in QUOTA_REASONS:
+            return error["reason"]
+    return None
+
+class YouTubeClient:
+    """Searches the YouTube Data API for tutorial videos.
+
+    Requests share one keep-alive session (retrying connection errors and 5xx), keys come
+    from the YouTube key pool, and results are cached per canonical topic: found videos
+    for YOUTUBE_CACHE_TTL, searches that found nothing for YOUTUBE_NEGATIVE_CACHE_TTL.
+    Failed searches are not cached.
+    """
+
+    def __init__(self, api_url=YOUTUBE_API_URL, keys=youtube_keys, cache=None, timeout=YOUTUBE_TIMEOUT,
+                 pool_size=YOUTUBE_POOL_SIZE, retries=YOUTUBE_RETRIES):
+        self.api_url = api_url.rstrip('/')
+        self.keys = keys
+        self.cache = cache or get_cache('youtube', ttl=YOUTUBE_CACHE_TTL)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._inflight = SingleFlight()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        import requests  # deferred: only requests that miss the cache need it
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=self.retries, backoff_factor=0.2, status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']), raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def cache_key(self, topic, max_results):
+        return make_cache_key('youtube', canonicalize_topic(topic), max_results)
+
+    def search(self, topic, max_results=2):
+        """Videos for a topic as [{"title", "url"}], from the cache when possible; [] on failure."""
+        key = self.cache_key(topic, max_results)
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.increment('youtube_lookups', result='hit')
+            return cached["videos"]
+        metrics.increment('youtube_lookups', result='miss')
+        # Concurrent requests for the same topic share one search (and its quota cost)
+        return self._inflight.do(key, self._search_and_cache, topic, max_results, key)
+
+    def search_many(self, topics, max_results=2):
+        """Look up several topics at once; returns their videos in order.
+
+        Topics that share a canonical form are searched once, and misses run concurrently
+        on the session's connection pool.
+        """
+        keys = [self.cache_key(topic, max_results) for topic in topics]
+        first_topic = {}
+        for topic, key in zip(topics, keys):
+            first_topic.setdefault(key, topic)
+        executor = get_executor('youtube', self.pool_size)
+        futures = {key: executor.submit(self.search, topic, max_results) for key, topic in first_topic.items()}
+        return [futures[key].result() for key in keys]
+
+    def _search_and_cache(self, topic, max_results, key):
+        videos = self._search(topic, max_results)
+        if videos is None:
+            return []
+        self.cache.set(key, {"videos": videos}, ttl=YOUTUBE_CACHE_TTL if videos else YOUTUBE_NEGATIVE_CACHE_TTL)
+        return videos
+
+    def _search(self, topic, max_results):
+        """Run search.list on the least-used key; None if it failed and shouldn't be cached."""
+        if not self.keys:
+            logger.warning("YouTube API key not configured")
+            return None
+        params = {
+            "part": "snippet",
+            "q": f"{topic} tutorial",
+            "type": "video",
+            "maxResults": max_results,
+        }
+        try:
+            for _ in range(len(self.keys)):
+                api_key = self.keys.acquire(YOUTUBE_SEARCH_COST)
+                if api_key is None:
+                    logger.warning("All YouTube API keys are out of quota for %.0fs", self.keys.retry_after())
+                    return None
+                response = self.session.get(
+                    f"{self.api_url}/search", params={**params, "key": api_key}, timeout=self.timeout
+                )
+                quota_reason = _quota_reason(response)
+                if quota_reason is None:
+                    break
+                # Daily quota is gone until the reset; rate limits pass after a cooldown
+                daily = quota_reason in DAILY_QUOTA_REASONS
+                self.keys.park(api_key, self.keys.seconds_until_reset() if daily else None)
+                metrics.increment('upstream_errors', upstream='youtube', error=quota_reason)
+            else:
+                return None
+            if response.status_code != 200:
+                logger.error("YouTube API error: %s", response.status_code)
+                metrics.increment('upstream_errors', upstream='youtube', error=f"http_{response.status_code}")
+                return None
+
+            videos = []
+            for item in response.json().get("items", []):
+                video_id = item.get("id", {}).get("videoId")
+                if video_id:
+                    videos.append({
+                        "title": item["snippet"]["title"],
+                        "url": f"https://www.youtube.com/watch?v={video_id}"
+                    })
+            return videos
+        except Exception as e:
+            logger.error("Error fetching YouTube videos: %s", e)
+            metrics.increment('upstream_errors', upstream='youtube', error=type(e).__name__)
+            return None
+
+youtube_client = YouTubeClient()
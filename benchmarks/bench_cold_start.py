@@ -0,0 +1,104 @@
+"""Cold-start cost of the serverless entry point (api/index.py).
+
+Every sample runs in a fresh interpreter, like a new serverless instance. It measures:
+- importing api.index, which creates the app
+- the first /health request
+- the first quiz request against the fake Gemini model
+- the deferred Gemini SDK import and configuration that the first real generation pays
+
+--eager imports the Gemini SDK before the app, which is what every cold start paid
+when the SDK was configured at import time. --importtime lists the slowest imports,
+from `python -X importtime`.
+
+Usage: python -m benchmarks.bench_cold_start [--runs 10] [--eager] [--importtime 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, logging, sys, time
+logging.disable(logging.CRITICAL)
+results = {}
+start = time.perf_counter()
+if EAGER:
+    import google.generativeai
+import api.index
+results['import_ms'] = (time.perf_counter() - start) * 1000
+client = api.index.app.test_client()
+start = time.perf_counter()
+client.get('/health').get_data()
+results['first_health_ms'] = (time.perf_counter() - start) * 1000
+results['sdk_loaded_after_health'] = 'google.generativeai' in sys.modules
+start = time.perf_counter()
+response = client.post('/api/generate-quiz', json={"topic": "Cold starts", "level": "Beginner", "count": 3})
+response.get_data()
+results['first_quiz_ms'] = (time.perf_counter() - start) * 1000
+results['quiz_status'] = response.status_code
+import app.models.gemini_model as gemini_model
+start = time.perf_counter()
+gemini_model._load_genai()
+results['sdk_load_ms'] = (time.perf_counter() - start) * 1000
+print(json.dumps(results))
+"""
+
+def child_environment():
+    env = dict(os.environ)
+    env.update({
+        'GEMINI_FAKE_MODEL': 'true',
+        # A placeholder key lets the deferred SDK configuration run; nothing is sent to Gemini
+        'GEMINI_API_KEY': env.get('GEMINI_API_KEY') or 'cold-start-benchmark',
+        'CACHE_ENABLED': 'false',
+        'PREFETCH_ENABLED': 'false',
+        'QUESTION_BANK_ENABLED': 'false',
+        'GEMINI_WARMUP': 'false',
+    })
+    return env
+
+def run_once(eager):
+    script = CHILD.replace('EAGER', 'True' if eager else 'False')
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT, env=child_environment(),
+                                     stderr=subprocess.DEVNULL, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def slowest_imports(limit):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import api.index'], cwd=ROOT,
+                            env=child_environment(), capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        rows.append((int(cumulative), name.rstrip()))
+    rows.sort(reverse=True)
+    print("\nSlowest imports of api.index (cumulative):")
+    for cumulative, name in rows[:limit]:
+        print(f"  {cumulative / 1000:8.1f}ms {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--eager', action='store_true', help='import the Gemini SDK at startup, as before')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='also list the N slowest imports')
+    args = parser.parse_args()
+
+    run_once(args.eager)  # populate bytecode caches so every sample starts equally warm on disk
+    samples = [run_once(args.eager) for _ in range(args.runs)]
+    print(f"{args.runs} cold starts ({'eager' if args.eager else 'deferred'} Gemini SDK import)")
+    for field in ('import_ms', 'first_health_ms', 'first_quiz_ms', 'sdk_load_ms'):
+        values = sorted(sample[field] for sample in samples)
+        print(f"  {field:<16} median {statistics.median(values):8.1f}ms  max {values[-1]:8.1f}ms")
+    print(f"  SDK loaded by /health: {any(sample['sdk_loaded_after_health'] for sample in samples)}")
+    statuses = {sample['quiz_status'] for sample in samples}
+    print(f"  quiz statuses: {sorted(statuses)}")
+
+    if args.importtime:
+        slowest_imports(args.importtime)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Tail latency of generate_content with and without hedged requests.
+
+The fake Gemini model answers most calls in a lognormal ~median time, but a small fraction
+of calls stall for --tail-seconds, as real upstream calls occasionally do. Each mode runs in
+a fresh interpreter, warms the router's latency statistics, then measures unique prompts
+at the given concurrency. With two --models, hedges go to the second model; with one, to
+another call of the same model.
+
+Usage: python -m benchmarks.bench_hedging [--calls 600] [--tail-probability 0.03] [--models a b]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def child(args):
+    import logging
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, ROOT)
+    from app.models.fake_model import behaviour, configure_fake_model
+    from app.models.gemini_model import generate_content
+    from app.utils.metrics import get_counters
+
+    configure_fake_model(
+        latency=('tail', args.median, args.sigma, args.tail_probability, args.tail_seconds), seed=args.seed
+    )
+
+    def one_call(n):
+        start = time.perf_counter()
+        generate_content(f"Quiz prompt {n}", route='quiz')
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_call, range(-args.warmup, 0)))
+        calls_before = behaviour.calls
+        timings = sorted(pool.map(one_call, range(args.calls)))
+    counters = get_counters()
+    print(json.dumps({
+        "p50": timings[len(timings) // 2],
+        "p99": timings[int(len(timings) * 0.99)],
+        "max": timings[-1],
+        "upstream_calls": behaviour.calls - calls_before,
+        "hedged": counters.get('hedged_requests{route=quiz}', 0),
+        "hedge_wins": counters.get('hedge_wins{route=quiz}', 0),
+    }))
+
+def run_mode(args, hedging):
+    env = dict(os.environ)
+    env.update({
+        'GEMINI_FAKE_MODEL': 'true',
+        'HEDGING_ENABLED': 'true' if hedging else 'false',
+        'HEDGE_SAME_MODEL': 'true',
+        'MODEL_ROUTES': json.dumps({'quiz': args.models}),
+        'HEDGE_PERCENTILE': str(args.percentile),
+    })
+    command = [sys.executable, '-m', 'benchmarks.bench_hedging', '--child'] + [
+        f"--{name.replace('_', '-')}={value}" for name, value in vars(args).items()
+        if name not in ('child', 'models')
+    ] + ['--models', *args.models]
+    output = subprocess.check_output(command, cwd=ROOT, env=env, stderr=subprocess.DEVNULL, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=600)
+    parser.add_argument('--warmup', type=int, default=100, help='calls that fill the latency statistics first')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--median', type=float, default=0.2, help='median call latency in seconds')
+    parser.add_argument('--sigma', type=float, default=0.3)
+    parser.add_argument('--tail-probability', type=float, default=0.03)
+    parser.add_argument('--tail-seconds', type=float, default=3.0)
+    parser.add_argument('--percentile', type=float, default=0.95, help='hedge after this latency percentile')
+    parser.add_argument('--models', nargs='+', default=['gemini-2.0-flash'])
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    print(f"{'hedging':<8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'calls/req':>9} {'hedged':>7} {'hedge wins':>10}")
+    for hedging in (False, True):
+        result = run_mode(args, hedging)
+        print(f"{'on' if hedging else 'off':<8} {result['p50'] * 1000:>8.0f} {result['p99'] * 1000:>8.0f} "
+              f"{result['max'] * 1000:>8.0f} {result['upstream_calls'] / args.calls:>9.3f} "
+              f"{result['hedged']:>7} {result['hedge_wins']:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Success rate and CPU time of parse_ai_json against the original multi-pass repair.
+
+Every case the parser cannot salvage costs a full extra Gemini round trip in
+generate_quiz, so the success column matters more than the timings.
+
+Usage: python -m benchmarks.bench_json_repair [--repeat 200]
+"""
+import argparse
+import json
+import logging
+import time
+from app.utils.helpers import parse_ai_json
+from tests.json_repair_corpus import ALL_CASES
+
+def legacy_parse_ai_json(response_text):
+    """parse_ai_json as it was before the single-pass repair parser."""
+    if not response_text:
+        raise ValueError("Empty response from AI")
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError as e:
+        sanitized_text = response_text
+        math_replacements = {
+            "\\": "\\\\", "\n": " ", "≈": "approximately", "∫": "integral", "∑": "sum",
+            "∞": "infinity", "≠": "!=", "≤": "<=", "≥": ">=", "π": "pi", "θ": "theta",
+            "λ": "lambda", "α": "alpha", "β": "beta", "γ": "gamma", "Δ": "Delta", "δ": "delta",
+            "√": "sqrt",
+        }
+        for symbol, replacement in math_replacements.items():
+            sanitized_text = sanitized_text.replace(symbol, replacement)
+        try:
+            return json.loads(sanitized_text)
+        except json.JSONDecodeError:
+            try:
+                json_start = sanitized_text.find('{')
+                json_end = sanitized_text.rfind('}') + 1
+                if json_start >= 0 and json_end > json_start:
+                    return json.loads(sanitized_text[json_start:json_end])
+            except Exception:
+                pass
+            raise ValueError(f"Failed to parse AI response as JSON: {str(e)}")
+
+def run(parser, text, expected):
+    try:
+        value = parser(text)
+    except ValueError:
+        return False
+    return expected is None or value == expected
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    totals = {'legacy': [0, 0.0], 'repair': [0, 0.0]}
+    print(f"{'case':<28} {'legacy':>8} {'repair':>8} {'legacy us':>10} {'repair us':>10}")
+    for name, text, expected, _ in ALL_CASES:
+        row = []
+        for label, parser in (('legacy', legacy_parse_ai_json), ('repair', parse_ai_json)):
+            ok = run(parser, text, expected)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                run(parser, text, expected)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            totals[label][0] += ok
+            totals[label][1] += elapsed
+            row.append((ok, elapsed))
+        (legacy_ok, legacy_time), (repair_ok, repair_time) = row
+        print(f"{name:<28} {'ok' if legacy_ok else 'FAIL':>8} {'ok' if repair_ok else 'FAIL':>8} "
+              f"{legacy_time * 1e6:>10.1f} {repair_time * 1e6:>10.1f}")
+
+    print(f"{'total':<28} {totals['legacy'][0]:>5}/{len(ALL_CASES)} {totals['repair'][0]:>5}/{len(ALL_CASES)} "
+          f"{totals['legacy'][1] * 1e6:>10.1f} {totals['repair'][1] * 1e6:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Per-request overhead of logging: off, synchronous (the old StreamHandler setup) and queued.
+
+Requests go through the WSGI app against a warm response cache, so the time measured is
+the app's own overhead: middleware, cache lookup, JSON encoding and logging. Logs are
+written to a file in a temporary directory. --sink-latency adds a delay to every write,
+like a stderr pipe to a log collector that is falling behind; that is where synchronous
+logging stalls request threads and the queue does not.
+
+Usage: python -m benchmarks.bench_logging [--requests 5000] [--concurrency 1 8] [--sink-latency 0.0005]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = ('off', 'sync-text', 'queue-text', 'queue-json')
+
+def _prepare_environment():
+    # Must happen before the app (and its config) is imported
+    os.environ['GEMINI_FAKE_MODEL'] = 'true'
+    os.environ['MAX_REQUESTS_PER_WINDOW'] = str(10 ** 9)
+    os.environ['CACHE_ENABLED'] = 'true'
+    os.environ['PREFETCH_ENABLED'] = 'false'
+    os.environ['COMPRESSION_ENABLED'] = 'false'
+
+class SlowStream:
+    """File wrapper whose writes block for a fixed time."""
+
+    def __init__(self, stream, latency):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def set_mode(mode, log_file):
+    from app.utils.structured_logging import TEXT_FORMAT, configure_logging, stop_logging
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    logging.disable(logging.NOTSET)
+    if mode == 'off':
+        logging.disable(logging.CRITICAL)
+    elif mode == 'sync-text':
+        handler = logging.StreamHandler(log_file)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT.replace(' - [%(request_id)s]', '')))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        configure_logging(level='INFO', log_format=mode.split('-')[1], stream=log_file)
+
+def run(app, requests, concurrency):
+    from app.utils.structured_logging import stop_logging
+    body = {"topic": "Logging overhead", "level": "Beginner"}
+    app.test_client().post('/api/generate-content', json=body)  # warm the cache
+
+    def one_request(_):
+        client = app.test_client()
+        start = time.perf_counter()
+        client.post('/api/generate-content', json=body).get_data()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = sorted(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - start
+    flush_start = time.perf_counter()
+    stop_logging()  # wait for the writer to drain, so queued modes are charged for their backlog
+    drain = time.perf_counter() - flush_start
+    return timings, elapsed, drain
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--sink-latency', type=float, default=0.0, help='seconds each log write blocks')
+    args = parser.parse_args()
+
+    _prepare_environment()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    logging.disable(logging.CRITICAL)
+    from app import create_app
+    app = create_app()
+
+    log_path = os.path.join(tempfile.mkdtemp(prefix='atomic-bench-'), 'app.log')
+    print(f"{'mode':<11} {'conc':>4} {'p50 us':>8} {'p99 us':>8} {'rps':>8} {'drain ms':>9}")
+    for concurrency in args.concurrency:
+        for mode in args.modes:
+            with open(log_path, 'w') as log_file:
+                set_mode(mode, SlowStream(log_file, args.sink_latency))
+                timings, elapsed, drain = run(app, args.requests, concurrency)
+            p50 = timings[len(timings) // 2] * 1e6
+            p99 = timings[int(len(timings) * 0.99)] * 1e6
+            print(f"{mode:<11} {concurrency:>4} {p50:>8.0f} {p99:>8.0f} {args.requests / elapsed:>8.0f} {drain * 1000:>9.1f}")
+    print(f"\nLast run's log: {log_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Per-call overhead of generate_content with and without the model registry.
+
+The gRPC transport is replaced by an in-process stub, so the numbers isolate
+client construction and request/response handling from network latency. The
+one-off client/channel setup that warm_up() moves off the first request is
+measured separately with the real SDK (no network traffic is made).
+
+Usage: python -m benchmarks.bench_model_registry [--calls 2000]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark-key')
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from google.generativeai import protos
+from app.config.config import GENERATION_CONFIG, DEFAULT_MODEL_NAME
+from app.models import gemini_model
+
+class StubTransport:
+    """Stands in for GenerativeServiceClient and answers instantly."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, request, **kwargs):
+        self.calls += 1
+        return protos.GenerateContentResponse(candidates=[{
+            "content": {"parts": [{"text": '{"ok": true}'}], "role": "model"},
+            "finish_reason": 1,
+        }])
+
+def uncached_model(model_name=DEFAULT_MODEL_NAME, generation_config=None, api_key=None):
+    """The pre-registry behaviour: a fresh GenerativeModel (and client lookup) per call."""
+    return genai.GenerativeModel(model_name, generation_config=generation_config or GENERATION_CONFIG)
+
+def per_call(calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        gemini_model.generate_content("prompt")
+    return (time.perf_counter() - start) / calls
+
+def client_setup_time():
+    """Time to build the real default GenerativeServiceClient and its channel from scratch."""
+    genai.configure(api_key=os.environ['GEMINI_API_KEY'])
+    genai_client._client_manager.clients.clear()
+    start = time.perf_counter()
+    genai_client.get_default_generative_client()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_time = client_setup_time()
+
+    transport = StubTransport()
+    genai_client.get_default_generative_client = lambda: transport
+    gemini_model._client_for = lambda api_key: transport
+
+    registry_get_model = gemini_model.get_model
+    gemini_model.get_model = uncached_model
+    per_call(50)
+    without_registry = per_call(args.calls)
+
+    gemini_model.get_model = registry_get_model
+    per_call(50)
+    with_registry = per_call(args.calls)
+
+    print(f"new GenerativeModel per call: {without_registry * 1e6:8.1f} us/call")
+    print(f"model registry:               {with_registry * 1e6:8.1f} us/call")
+    print(f"saved per call:               {(without_registry - with_registry) * 1e6:8.1f} us")
+    print(f"client/channel setup moved off the first request by warm_up(): {setup_time * 1e3:.1f} ms")
+
+if __name__ == '__main__':
+    main()
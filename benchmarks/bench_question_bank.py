@@ -0,0 +1,98 @@
+"""Latency of assembling quizzes from the question bank versus generating them.
+
+The bank is filled with synthetic questions for many topics, then quizzes are
+requested three ways: fully from the bank, from the bank with a session that has
+already seen part of it, and fully generated by the fake Gemini model with the
+given latency.
+
+Usage: python -m benchmarks.bench_question_bank [--topics 2000] [--per-topic 40] [--quizzes 500]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+def _prepare_environment(db_path):
+    # Must happen before the app (and its config) is imported
+    os.environ['GEMINI_FAKE_MODEL'] = 'true'
+    os.environ['QUESTION_BANK_ENABLED'] = 'true'
+    os.environ['QUESTION_BANK_DB_PATH'] = db_path
+    os.environ['CACHE_ENABLED'] = 'false'
+    os.environ['PREFETCH_ENABLED'] = 'false'
+
+def make_question(topic, n):
+    options = [f"{topic} option {n}-{letter}" for letter in 'ABCD']
+    return {
+        "question": f"Question {n} about {topic}?",
+        "options": options,
+        "correct_answer": options[n % 4],
+        "explanation": f"Option {n % 4} is correct for question {n}.",
+    }
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return (timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.99)] * 1000)
+
+def timed(label, calls):
+    timings = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    p50, p99 = percentiles(timings)
+    print(f"{label:<28} p50 {p50:9.2f}ms  p99 {p99:9.2f}ms")
+    return p50
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=2000)
+    parser.add_argument('--per-topic', type=int, default=40, help='banked questions per topic')
+    parser.add_argument('--quizzes', type=int, default=500, help='quizzes assembled per scenario')
+    parser.add_argument('--count', type=int, default=10, help='questions per quiz')
+    parser.add_argument('--generations', type=int, default=20, help='quizzes generated by the fake model')
+    parser.add_argument('--latency', type=float, default=2.0, help='fake model latency in seconds')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='atomic-bench-'), 'questions.sqlite3')
+    _prepare_environment(db_path)
+    import logging
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.api.quiz_generator import assemble_quiz, create_quiz
+    from app.models.fake_model import configure_fake_model
+    from app.utils.question_bank import question_bank
+
+    rng = random.Random(args.seed)
+    topics = [f"subject {n} fundamentals" for n in range(args.topics)]
+    start = time.perf_counter()
+    for topic in topics:
+        question_bank.add(topic, 'Beginner', [make_question(topic, n) for n in range(args.per_topic)])
+    print(f"Banked {len(question_bank)} questions for {args.topics} topics in {time.perf_counter() - start:.1f}s\n")
+
+    bank_p50 = timed("assembled from bank", [
+        lambda: assemble_quiz(rng.choice(topics), 'Beginner', args.count)
+        for _ in range(args.quizzes)
+    ])
+    sessions = [f"session-{n}" for n in range(args.quizzes)]
+    for session_id in sessions:
+        # Each session has already been served most of its topic's questions
+        assemble_quiz(topics[hash(session_id) % len(topics)], 'Beginner', args.per_topic - args.count, session_id)
+    timed("assembled, repeat session", [
+        lambda session_id=session_id: assemble_quiz(
+            topics[hash(session_id) % len(topics)], 'Beginner', args.count, session_id
+        )
+        for session_id in sessions
+    ])
+
+    configure_fake_model(latency=('constant', args.latency), seed=args.seed)
+    generated_p50 = timed("generated (fake model)", [
+        lambda: create_quiz(f"unbanked {rng.random()}", 'Beginner', args.count)
+        for _ in range(args.generations)
+    ])
+    print(f"\nAssembly is {generated_p50 / bank_p50:,.0f}x faster than generation at p50")
+
+if __name__ == '__main__':
+    main()
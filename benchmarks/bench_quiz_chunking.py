@@ -0,0 +1,75 @@
+"""Large quizzes: one generation call versus concurrent chunks.
+
+The fake Gemini model takes longer the more it writes (--seconds-per-token on top of a
+lognormal base latency), and the longer a response, the likelier it comes back malformed
+(--malformed-per-1k-tokens), as long LLM generations do. Each quiz has a topic of its own,
+so no two requests share an upstream call. It reports latency, how many quizzes failed
+or came back short of --count questions, and upstream calls per quiz.
+
+Usage: python -m benchmarks.bench_quiz_chunking [--quizzes 40] [--count 20] [--concurrency 1 8]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def _prepare_environment():
+    # Must happen before the app (and its config) is imported
+    os.environ['GEMINI_FAKE_MODEL'] = 'true'
+    os.environ['CACHE_ENABLED'] = 'false'
+    os.environ['QUESTION_BANK_ENABLED'] = 'false'
+    os.environ['HEDGING_ENABLED'] = 'false'
+
+def run(create, args, label, concurrency):
+    from app.api.quiz_generator import QuizGenerationError
+    from app.models.fake_model import behaviour, configure_fake_model
+    from app.utils.metrics import get_counters
+    configure_fake_model(
+        latency=('lognormal', args.median, 0.3), seconds_per_token=args.seconds_per_token,
+        malformed_per_1k_tokens=args.malformed_per_1k_tokens, seed=args.seed
+    )
+    reprompts_before = get_counters().get('quiz_reprompts', 0)
+
+    def one_quiz(n):
+        start = time.perf_counter()
+        try:
+            questions = len(create(f"{label} subject {n}", 'Beginner', args.count)['questions'])
+        except QuizGenerationError:
+            questions = None
+        return time.perf_counter() - start, questions
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_quiz, range(args.quizzes)))
+    timings = sorted(elapsed for elapsed, _ in results)
+    failed = sum(1 for _, questions in results if questions is None)
+    short = sum(1 for _, questions in results if questions is not None and questions < args.count)
+    print(f"{label:<8} {concurrency:>4} {timings[len(timings) // 2]:>7.2f} {timings[int(len(timings) * 0.99)]:>7.2f} "
+          f"{failed / len(results):>7.1%} {short / len(results):>7.1%} {behaviour.calls / len(results):>10.2f} "
+          f"{get_counters().get('quiz_reprompts', 0) - reprompts_before:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quizzes', type=int, default=40)
+    parser.add_argument('--count', type=int, default=20, help='questions per quiz')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--median', type=float, default=0.4, help='median base latency per call in seconds')
+    parser.add_argument('--seconds-per-token', type=float, default=0.002)
+    parser.add_argument('--malformed-per-1k-tokens', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    _prepare_environment()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    logging.disable(logging.CRITICAL)
+    from app.api.quiz_generator import create_chunked_quiz, create_single_quiz
+
+    print(f"{args.quizzes} quizzes of {args.count} questions\n")
+    print(f"{'path':<8} {'conc':>4} {'p50 s':>7} {'p99 s':>7} {'failed':>7} {'short':>7} {'calls/quiz':>10} {'reprompts':>9}")
+    for concurrency in args.concurrency:
+        run(create_single_quiz, args, 'single', concurrency)
+        run(create_chunked_quiz, args, 'chunked', concurrency)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Per-check cost of the rate limiter as the number of distinct clients grows.
+
+Usage: python -m benchmarks.bench_rate_limiter [--clients 1000 10000 100000] [--backend memory|sqlite]
+"""
+import argparse
+import os
+import tempfile
+import time
+from app.utils.rate_limiter import RateLimiter, ALGORITHMS, MemoryStore, SQLiteStore
+
+LIMIT = 10
+WINDOW = 60
+
+def legacy_check(request_timestamps, client_ip, current_time):
+    """The original before_request logic: sweep every client on every request."""
+    for ip in list(request_timestamps.keys()):
+        timestamps = request_timestamps[ip]
+        request_timestamps[ip] = [ts for ts in timestamps if current_time - ts < WINDOW]
+        if not request_timestamps[ip]:
+            del request_timestamps[ip]
+    if client_ip in request_timestamps:
+        if len(request_timestamps[client_ip]) >= LIMIT:
+            return False
+        request_timestamps[client_ip].append(current_time)
+    else:
+        request_timestamps[client_ip] = [current_time]
+    return True
+
+def bench_limiter(limiter, clients, checks):
+    now = time.time()
+    for i in range(clients):
+        limiter.hit(f"10.0.{i // 256}.{i % 256}", now=now)
+    start = time.perf_counter()
+    for i in range(checks):
+        limiter.hit(f"10.0.{(i * 7919) % clients // 256}.{(i * 7919) % clients % 256}", now=now + 1)
+    return (time.perf_counter() - start) / checks
+
+def bench_legacy(clients, checks):
+    now = time.time()
+    timestamps = {}
+    for i in range(clients):
+        timestamps[f"client-{i}"] = [now]
+    start = time.perf_counter()
+    for i in range(checks):
+        legacy_check(timestamps, f"client-{(i * 7919) % clients}", now + 1)
+    return (time.perf_counter() - start) / checks
+
+def make_store(backend):
+    if backend == 'sqlite':
+        return SQLiteStore(os.path.join(tempfile.mkdtemp(), 'bench_rate_limits.sqlite3'))
+    return MemoryStore()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--checks', type=int, default=20000)
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--legacy-max-clients', type=int, default=10000,
+                        help='skip the legacy sweep above this many clients (it is O(clients) per check)')
+    args = parser.parse_args()
+
+    print(f"{'clients':>10} {'algorithm':>16} {'us/check':>10}")
+    for clients in args.clients:
+        for name, algorithm in ALGORITHMS.items():
+            limiter = RateLimiter(algorithm(LIMIT, WINDOW), make_store(args.backend))
+            per_check = bench_limiter(limiter, clients, args.checks)
+            print(f"{clients:>10} {name:>16} {per_check * 1e6:>10.2f}")
+        if clients <= args.legacy_max_clients:
+            per_check = bench_legacy(clients, max(100, args.checks // 100))
+            print(f"{clients:>10} {'legacy_sweep':>16} {per_check * 1e6:>10.2f}")
+
+if __name__ == '__main__':
+    main()
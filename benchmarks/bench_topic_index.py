@@ -0,0 +1,110 @@
+"""Lookup latency of the topic similarity index as the number of indexed topics grows.
+
+Topics are 1-4 Zipf-distributed words from a pseudo-word vocabulary. Queries are a
+mix of typos of indexed topics (near hits) and unseen word combinations (misses).
+A brute-force scan over all topics is run on a sample of queries to check that the
+prefix-filtered lookup finds the same best match.
+
+Usage: python -m benchmarks.bench_topic_index [--topics 1000 10000 100000] [--queries 2000]
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from app.utils.topics import TopicIndex, canonicalize_topic, trigrams
+
+ONSETS = ['', 'b', 'c', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'w',
+          'st', 'tr', 'pr', 'ch', 'sh', 'th', 'gr', 'cl', 'bl', 'pl']
+NUCLEI = ['a', 'e', 'i', 'o', 'u', 'ea', 'ou', 'io', 'y', 'ai']
+CODAS = ['', 'n', 'r', 's', 't', 'l', 'm', 'ng', 'ck', 'nd', 'rt', 'st', 'x']
+
+def make_vocabulary(size, rng):
+    """Pronounceable pseudo-words, so trigram statistics resemble real text."""
+    words = set()
+    while len(words) < size:
+        syllables = rng.choice([1, 2, 2, 3, 3, 4])
+        words.add(''.join(rng.choice(ONSETS) + rng.choice(NUCLEI) + rng.choice(CODAS) for _ in range(syllables)))
+    return sorted(words)
+
+def make_topics(count, vocabulary, rng):
+    # Word frequencies follow Zipf's law, as they do in real topic names
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    topics = set()
+    while len(topics) < count:
+        words = [vocabulary[bisect.bisect(weights, rng.random() * weights[-1])] for _ in range(rng.randint(1, 4))]
+        topics.add(' '.join(words))
+    return sorted(topics)
+
+def typo(text, rng):
+    if len(text) < 4:
+        return text + 's'
+    i = rng.randrange(1, len(text) - 2)
+    return text[:i] + text[i + 1:] if rng.random() < 0.5 else text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+def brute_force(indexed, query, threshold):
+    canonical = canonicalize_topic(query)
+    query_grams = trigrams(canonical)
+    best = None
+    for candidate, grams in indexed:
+        if candidate == canonical:
+            continue
+        score = len(query_grams & grams) / len(query_grams | grams)
+        if score >= threshold and (best is None or score > best[1]):
+            best = (candidate, score)
+    return best
+
+def run(size, queries, threshold, vocabulary, rng):
+    topics = make_topics(size, vocabulary, rng)
+    index = TopicIndex(threshold=threshold, max_entries=size)
+    start = time.perf_counter()
+    for topic in topics:
+        index.add(topic)
+    build_time = time.perf_counter() - start
+
+    near = [typo(rng.choice(topics), rng) for _ in range(queries // 2)]
+    misses = [' '.join(rng.sample(vocabulary, rng.randint(1, 4))) for _ in range(queries - len(near))]
+    workload = near + misses
+    rng.shuffle(workload)
+
+    timings = []
+    hits = 0
+    for query in workload:
+        start = time.perf_counter()
+        result = index.similar(query, limit=1)
+        timings.append(time.perf_counter() - start)
+        hits += bool(result)
+    timings.sort()
+
+    # Verify the best match against an exhaustive scan on a small sample
+    indexed = [(canonicalize_topic(topic), trigrams(canonicalize_topic(topic))) for topic in topics]
+    mismatches = 0
+    for query in workload[:20]:
+        expected = brute_force(indexed, query, threshold)
+        found = index.similar(query, limit=1)
+        expected_score = round(expected[1], 9) if expected else None
+        found_score = round(found[0][1], 9) if found else None
+        mismatches += expected_score != found_score
+
+    print(f"{size:>7} topics  build {build_time:6.2f}s  "
+          f"p50 {timings[len(timings) // 2] * 1e6:7.1f}us  "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:7.1f}us  "
+          f"max {timings[-1] * 1e6:8.1f}us  "
+          f"matched {hits / len(workload):5.1%}  brute-force mismatches {mismatches}/20")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--threshold', type=float, default=0.7)
+    parser.add_argument('--vocabulary', type=int, default=50000, help='distinct words topics are built from')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    for size in args.topics:
+        run(size, args.queries, args.threshold, vocabulary, rng)
+
+if __name__ == '__main__':
+    main()
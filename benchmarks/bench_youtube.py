@@ -0,0 +1,130 @@
+"""YouTube lookup latency: a bare request per lookup versus the pooled, cached client.
+
+A local fake YouTube Data API server answers search.list after --latency seconds, and
+every new connection first pays --connect-latency, standing in for the TCP and TLS
+handshakes to googleapis.com. It measures:
+- bare: requests.get per lookup, a new connection each time (the old fetch_youtube_videos)
+- miss: youtube_client.search on topics it hasn't seen, over its keep-alive session
+- hit: youtube_client.search on topics it has cached
+- empty: one topic with no videos, looked up repeatedly (negative caching)
+- batch: youtube_client.search_many over --batch distinct topics, against looking them up one by one
+
+Usage: python -m benchmarks.bench_youtube [--lookups 200] [--latency 0.05] [--connect-latency 0.03]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    latency = 0.0
+    connect_latency = 0.0
+    connections = 0
+    searches = 0
+    _lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, delayed ACKs stall keep-alive responses
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            FakeYouTubeHandler.connections += 1
+        time.sleep(self.connect_latency)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query).get('q', [''])[0]
+        with self._lock:
+            FakeYouTubeHandler.searches += 1
+        time.sleep(self.latency)
+        items = [] if 'nothing' in query else [
+            {"id": {"videoId": f"v{index}"}, "snippet": {"title": f"{query} part {index}"}} for index in range(2)
+        ]
+        body = json.dumps({"items": items}).encode('utf-8')
+        self.send_response(200 if url.path.endswith('/search') else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_server(latency, connect_latency):
+    FakeYouTubeHandler.latency = latency
+    FakeYouTubeHandler.connect_latency = connect_latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeYouTubeHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def timed(lookup, topics):
+    timings = []
+    connections, searches = FakeYouTubeHandler.connections, FakeYouTubeHandler.searches
+    for topic in topics:
+        start = time.perf_counter()
+        lookup(topic)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return (timings, FakeYouTubeHandler.connections - connections, FakeYouTubeHandler.searches - searches)
+
+def report(name, result):
+    timings, connections, searches = result
+    p50 = timings[len(timings) // 2] * 1000
+    p99 = timings[int(len(timings) * 0.99)] * 1000
+    print(f"{name:<6} {len(timings):>7} {p50:>9.2f} {p99:>9.2f} {connections:>11} {searches:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the fake API takes per search')
+    parser.add_argument('--connect-latency', type=float, default=0.03, help='seconds per new connection')
+    parser.add_argument('--batch', type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_server(args.latency, args.connect_latency)
+    api_url = f"http://127.0.0.1:{server.server_port}/youtube/v3"
+    # Must happen before the app (and its config) is imported
+    os.environ.update({
+        'YOUTUBE_API_URL': api_url,
+        'YOUTUBE_API_KEYS': 'benchmark-key',
+        'YOUTUBE_KEY_UNITS_PER_DAY': '0',
+        'CACHE_ENABLED': 'true',
+        'CACHE_BACKEND': 'memory',
+        'CACHE_MAX_ENTRIES': str(10 * args.lookups),
+        'GEMINI_FAKE_MODEL': 'true',
+    })
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    import requests
+    logging.disable(logging.CRITICAL)
+    from app.utils.youtube import youtube_client
+
+    def bare_lookup(topic):
+        params = {"part": "snippet", "q": f"{topic} tutorial", "type": "video", "maxResults": 2, "key": "benchmark-key"}
+        return requests.get(f"{api_url}/search", params=params, timeout=3).json()
+
+    topics = [f"bench topic {index}" for index in range(args.lookups)]
+    print(f"{'mode':<6} {'lookups':>7} {'p50 ms':>9} {'p99 ms':>9} {'connections':>11} {'searches':>8}")
+    report('bare', timed(bare_lookup, topics))
+    report('miss', timed(youtube_client.search, topics))
+    report('hit', timed(youtube_client.search, topics))
+    report('empty', timed(youtube_client.search, ['nothing matches this'] * args.lookups))
+
+    batch = [f"batch topic {index}" for index in range(args.batch)]
+    sequential = timed(youtube_client.search, [f"sequential {topic}" for topic in batch])
+    start = time.perf_counter()
+    youtube_client.search_many(batch)
+    batched = time.perf_counter() - start
+    print(f"\n{args.batch} uncached topics: one by one {sum(sequential[0]) * 1000:.1f} ms, "
+          f"search_many {batched * 1000:.1f} ms")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
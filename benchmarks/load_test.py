@@ -0,0 +1,191 @@
+"""Offline load test: drive the generation endpoints through the WSGI app against the fake Gemini model.
+
+Reports p50/p95/p99 latency, throughput and upstream (fake Gemini) calls per
+request for each endpoint, and saves the run as JSON so results can be
+compared between commits.
+
+Usage:
+    python -m benchmarks.load_test --requests 200 --concurrency 16 \\
+        --latency lognormal 0.8 0.5 --failure-rate 0.05 --malformed-rate 0.1
+    python -m benchmarks.load_test --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = {
+    'roadmap': ('/api/generate-roadmap', lambda n: {"course_title": f"Course {n}", "level": "Beginner"}),
+    'content': ('/api/generate-content', lambda n: {"topic": f"Topic {n}", "level": "Beginner"}),
+    'quiz': ('/api/generate-quiz', lambda n: {"topic": f"Topic {n}", "level": "Beginner", "count": 5}),
+}
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def _prepare_environment(args):
+    # Must happen before the app (and its config) is imported
+    os.environ['GEMINI_FAKE_MODEL'] = 'true'
+    os.environ['MAX_REQUESTS_PER_WINDOW'] = str(10 ** 9)
+    os.environ['CACHE_ENABLED'] = 'true' if args.cache else 'false'
+    os.environ['PREFETCH_ENABLED'] = 'false'
+    # A bank left over from earlier runs would serve quizzes without calling the model
+    os.environ['QUESTION_BANK_ENABLED'] = 'true' if args.bank else 'false'
+    if args.bank:
+        os.environ['QUESTION_BANK_DB_PATH'] = args.bank
+    os.environ.setdefault('YOUTUBE_API_KEY', '')
+    os.environ.setdefault('YOUTUBE_API_KEYS', '')
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def summarize(latencies, statuses, upstream_calls, elapsed):
+    ordered = sorted(latencies)
+    errors = {}
+    for status in statuses:
+        if status >= 400:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(sum(errors.values()) / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": round(sum(ordered) / count * 1000, 2) if count else None,
+            "p50": round(percentile(ordered, 0.50) * 1000, 2) if count else None,
+            "p95": round(percentile(ordered, 0.95) * 1000, 2) if count else None,
+            "p99": round(percentile(ordered, 0.99) * 1000, 2) if count else None,
+            "max": round(ordered[-1] * 1000, 2) if count else None,
+        },
+        "upstream_calls_per_request": round(upstream_calls / count, 3) if count else None,
+    }
+
+def run_endpoint(app, behaviour, name, args):
+    path, payload = ENDPOINTS[name]
+    latencies = []
+    statuses = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one_request(n):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        topic_id = n % args.distinct_topics if args.distinct_topics else n
+        start = time.perf_counter()
+        response = client.post(path, json=payload(topic_id))
+        response.get_data()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            statuses.append(response.status_code)
+
+    calls_before = behaviour.calls
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, statuses, behaviour.calls - calls_before, elapsed)
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+def compare(previous_path, current):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nComparison with {previous_path} (revision {previous.get('revision')}):")
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if not before:
+            continue
+        parts = []
+        for metric in ('p50', 'p95', 'p99'):
+            old, new = before['latency_ms'][metric], result['latency_ms'][metric]
+            if old:
+                parts.append(f"{metric} {old:.0f}->{new:.0f}ms ({(new - old) / old * 100:+.1f}%)")
+        old_rps, new_rps = before['throughput_rps'], result['throughput_rps']
+        if old_rps:
+            parts.append(f"rps {old_rps:.1f}->{new_rps:.1f} ({(new_rps - old_rps) / old_rps * 100:+.1f}%)")
+        print(f"  {name:<8} " + ", ".join(parts))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--requests', type=int, default=100, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', nargs='+', default=['lognormal', '0.5', '0.4'],
+                        help="constant S | uniform LOW HIGH | lognormal MEDIAN SIGMA | tail MEDIAN SIGMA P SLOW (seconds)")
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--distinct-topics', type=int, default=0,
+                        help='cycle through this many topics (0 = every request unique)')
+    parser.add_argument('--cache', action='store_true', help='leave the response caches enabled')
+    parser.add_argument('--bank', help='use the question bank at this SQLite path (default: bank disabled)')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<time>-<revision>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare against')
+    args = parser.parse_args()
+
+    _prepare_environment(args)
+    import logging
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import create_app
+    from app.models.fake_model import behaviour, configure_fake_model
+
+    latency = (args.latency[0], *[float(value) for value in args.latency[1:]])
+    configure_fake_model(latency=latency, failure_rate=args.failure_rate,
+                         malformed_json_rate=args.malformed_rate, seed=args.seed)
+    app = create_app()
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency": list(latency),
+            "failure_rate": args.failure_rate,
+            "malformed_json_rate": args.malformed_rate,
+            "seed": args.seed,
+            "distinct_topics": args.distinct_topics,
+            "cache": args.cache,
+            "bank": args.bank,
+        },
+        "results": {},
+    }
+
+    print(f"{'endpoint':<8} {'reqs':>5} {'err%':>6} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls/req':>9}")
+    for name in args.endpoints:
+        result = run_endpoint(app, behaviour, name, args)
+        report['results'][name] = result
+        latency_ms = result['latency_ms']
+        print(f"{name:<8} {result['requests']:>5} {result['error_rate'] * 100:>5.1f}% {result['throughput_rps']:>7.1f} "
+              f"{latency_ms['p50']:>8.1f} {latency_ms['p95']:>8.1f} {latency_ms['p99']:>8.1f} "
+              f"{result['upstream_calls_per_request']:>9.2f}")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['revision'] or 'local'}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,10 @@
 import os
 import logging
 from app import create_app
+from app.utils.structured_logging import configure_logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-    ]
-)
+# Request threads only enqueue records; a background thread formats and writes them
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = create_app()
@@ -0,0 +1,38 @@
+import os
+import time
+import pytest
+
+# Must happen before the app (and its config) is imported
+os.environ['GEMINI_FAKE_MODEL'] = 'true'
+os.environ['CACHE_ENABLED'] = 'false'
+os.environ['QUESTION_BANK_ENABLED'] = 'false'
+os.environ['PREFETCH_ENABLED'] = 'false'
+os.environ['JOBS_ENABLED'] = 'true'
+
+@pytest.fixture(autouse=True)
+def fake_model():
+    """Reset the fake Gemini model (instant, never failing) before every test."""
+    from app.models.fake_model import configure_fake_model
+    configure_fake_model()
+    yield
+    configure_fake_model()
+
+@pytest.fixture
+def breaker():
+    """The Gemini circuit breaker, closed before and after the test."""
+    from app.utils.resilience import gemini_breaker
+    gemini_breaker.record_success()
+    yield gemini_breaker
+    gemini_breaker.record_success()
+
+def open_circuit(breaker, ready_to_probe=True):
+    """Open a breaker; with ready_to_probe its recovery timeout has already passed."""
+    breaker.state = breaker.OPEN
+    breaker.opened_at = time.monotonic() - (breaker.recovery_timeout + 1 if ready_to_probe else 0)
+
+@pytest.fixture
+def client():
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
@@ -0,0 +1,60 @@
+"""Malformed-JSON samples modelled on real Gemini quiz/roadmap output.
+
+Each case is (name, text, expected, needs_repair): expected is the value a correct
+repair should produce, and needs_repair says whether the text is invalid JSON that
+the repair parser has to fix. Shared by the tests and benchmarks/bench_json_repair.py.
+"""
+import json
+
+_QUESTION = {
+    "question": "What does a JavaScript Promise represent?",
+    "options": ["A value", "An eventual result", "A function", "A callback"],
+    "correct_answer": "An eventual result",
+    "explanation": "A Promise represents the eventual completion of an async operation.",
+}
+
+def _quiz(question_count):
+    return {
+        "title": "Quiz on JavaScript Promises",
+        "description": "Test your knowledge.",
+        "level": "Beginner",
+        "questions": [dict(_QUESTION, question=f"{_QUESTION['question']} ({n})") for n in range(question_count)],
+    }
+
+QUIZ = _quiz(3)
+LARGE_QUIZ = _quiz(20)
+
+def _truncate(value, keep):
+    text = json.dumps(value, indent=2)
+    return text[:int(len(text) * keep)]
+
+CASES = [
+    ("valid", json.dumps(QUIZ), QUIZ, False),
+    ("code_fence", "```json\n" + json.dumps(QUIZ, indent=2) + "\n```", QUIZ, True),
+    ("preamble", "Here is your quiz:\n" + json.dumps(QUIZ), QUIZ, True),
+    ("trailing_comma_object", '{"a": 1, "b": [1, 2],}', {"a": 1, "b": [1, 2]}, True),
+    ("trailing_comma_array", '{"a": [1, 2, 3,]}', {"a": [1, 2, 3]}, True),
+    ("unescaped_quotes", '{"question": "What does "this" refer to?", "answer": "the object"}',
+     {"question": 'What does "this" refer to?', "answer": "the object"}, True),
+    ("raw_newline", '{"explanation": "line one\nline two"}', {"explanation": "line one\nline two"}, True),
+    ("latex_escapes", r'{"formula": "\(x^2\) and \frac{a}{b} and \theta"}',
+     {"formula": r"\(x^2\) and \frac{a}{b}" + " and \theta"}, True),
+    ("valid_escapes_kept", r'{"path": "C:\\temp", "quote": "say \"hi\"", "tab": "a\tb", "x": 1,}',
+     {"path": "C:\\temp", "quote": 'say "hi"', "tab": "a\tb", "x": 1}, True),
+    ("unicode_math", '{"q": "Is π ≈ 3.14 and x ≤ y?", "n": 2,}', {"q": "Is π ≈ 3.14 and x ≤ y?", "n": 2}, True),
+    ("missing_comma", '{"a": "x" "b": "y"}', {"a": "x", "b": "y"}, True),
+    ("missing_comma_objects", '[{"a": 1} {"b": 2}]', [{"a": 1}, {"b": 2}], True),
+    ("python_literals", "{'a': True, 'b': None, 'c': 'it\\'s'}", {"a": True, "b": None, "c": "it's"}, True),
+    ("truncated_in_string", '{"title": "Quiz", "questions": [{"question": "What is', 
+     {"title": "Quiz", "questions": [{"question": "What is"}]}, True),
+    ("truncated_after_key", '{"title": "Quiz", "description"', {"title": "Quiz", "description": None}, True),
+    ("truncated_after_comma", '{"items": [1, 2,', {"items": [1, 2]}, True),
+    ("truncated_literal", '{"ok": tru', {"ok": True}, True),
+    ("trailing_text", json.dumps(QUIZ) + "\nLet me know if you need more!", QUIZ, True),
+]
+
+# Truncated large quizzes: any structurally valid prefix is acceptable
+TRUNCATED = [(f"truncated_large_quiz_{int(keep * 100)}", _truncate(LARGE_QUIZ, keep), None, True)
+             for keep in (0.35, 0.6, 0.85)]
+
+ALL_CASES = CASES + TRUNCATED
@@ -0,0 +1,90 @@
+import pytest
+from app.utils import cache as cache_module
+from app.utils.cache import MemoryBackend, ResponseCache, SQLiteBackend, make_cache_key
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return clock
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_backend(request, tmp_path):
+    def make(max_entries=100, namespace='test'):
+        if request.param == 'memory':
+            return MemoryBackend(max_entries)
+        return SQLiteBackend(str(tmp_path / 'cache.sqlite3'), namespace, max_entries)
+    return make
+
+def test_least_recently_used_entry_is_evicted_first(make_backend, clock):
+    backend = make_backend(max_entries=2)
+    backend.set('a', '"A"', 60)
+    clock.advance(1)
+    backend.set('b', '"B"', 60)
+    clock.advance(1)
+    assert backend.get('a') == '"A"'  # 'a' is now more recent than 'b'
+    clock.advance(1)
+
+    assert backend.set('c', '"C"', 60) == 1
+    assert backend.get('b') is None
+    assert backend.get('a') == '"A"'
+    assert backend.get('c') == '"C"'
+    assert len(backend) == 2
+
+def test_entries_expire_after_their_ttl(make_backend, clock):
+    backend = make_backend()
+    backend.set('short', '"S"', 10)
+    backend.set('long', '"L"', 100)
+
+    clock.advance(9)
+    assert backend.get('short') == '"S"'
+    clock.advance(1)
+    assert backend.get('short') is None
+    assert backend.get('long') == '"L"'
+
+def test_sqlite_entries_are_shared_by_workers_and_kept_per_namespace(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    SQLiteBackend(path, 'content', 10).set('key', '"from worker 1"', 60)
+
+    assert SQLiteBackend(path, 'content', 10).get('key') == '"from worker 1"'
+    assert SQLiteBackend(path, 'quiz', 10).get('key') is None
+
+def test_prompt_version_bump_invalidates_cached_results(monkeypatch):
+    response_cache = ResponseCache('content', MemoryBackend(10), ttl=60)
+    old_key = make_cache_key('content', 'closures', 'beginner')
+    response_cache.set(old_key, {"content": "# Closures"})
+    assert response_cache.get(make_cache_key('content', ' Closures', 'BEGINNER')) == {"content": "# Closures"}
+
+    monkeypatch.setitem(cache_module.PROMPT_VERSIONS, 'content', 'v-next')
+    new_key = make_cache_key('content', 'closures', 'beginner')
+
+    assert new_key != old_key
+    assert response_cache.get(new_key) is None
+    assert response_cache.stats()["misses"] == 1
+
+def test_response_cache_counts_hits_misses_and_evictions():
+    response_cache = ResponseCache('stats-test', MemoryBackend(1), ttl=60)
+    response_cache.set('a', {"n": 1})
+    response_cache.set('b', {"n": 2})
+
+    assert response_cache.get('a') is None
+    assert response_cache.get('b') == {"n": 2}
+    stats = response_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (1, 1, 1, 1)
+
+def test_sectioned_content_is_cached_apart_from_single_call_content():
+    from app.api.content_generator import content_cache_key
+    single = content_cache_key('Closures', 'Beginner', mode='single')
+
+    assert content_cache_key('closures ', 'beginner') == single
+    assert content_cache_key('Closures', 'Beginner', mode='sections') != single
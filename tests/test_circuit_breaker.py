@@ -0,0 +1,66 @@
+import pytest
+from conftest import open_circuit
+from app.models import gemini_model
+from app.models.gemini_model import generate_content, generate_content_stream
+from app.utils.resilience import CircuitOpenError, KeysExhaustedError, classify_exception
+
+def test_stream_closed_mid_probe_releases_the_probe(breaker):
+    open_circuit(breaker)
+    stream = generate_content_stream("Explain closures")
+    next(stream)
+    assert breaker.state == breaker.HALF_OPEN
+    assert breaker._probe_in_flight
+
+    # What Flask does when the client disconnects
+    stream.close()
+
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker._probe_in_flight
+    assert breaker.failures == 0
+    # The next call is let through as the probe, and its success closes the circuit
+    assert generate_content("Explain closures", format_type='markdown')
+    assert breaker.state == breaker.CLOSED
+
+def test_stream_success_closes_a_half_open_circuit(breaker):
+    open_circuit(breaker)
+    assert ''.join(generate_content_stream("Explain closures"))
+    assert breaker.state == breaker.CLOSED
+
+def test_open_circuit_rejects_streams(breaker):
+    open_circuit(breaker, ready_to_probe=False)
+    with pytest.raises(CircuitOpenError):
+        next(generate_content_stream("Explain closures"))
+
+def _keys_exhausted():
+    raise KeysExhaustedError('Gemini', 30)
+
+def test_running_out_of_keys_does_not_close_a_half_open_circuit(breaker, monkeypatch):
+    monkeypatch.setattr(gemini_model, '_acquire_key', _keys_exhausted)
+    open_circuit(breaker)
+    breaker.failures = 5
+
+    with pytest.raises(KeysExhaustedError):
+        generate_content("Explain closures", format_type='markdown')
+
+    assert breaker.state == breaker.HALF_OPEN
+    assert breaker.failures == 5
+    # The probe is free again for the next call
+    assert not breaker._probe_in_flight
+    breaker.before_call()
+
+def test_running_out_of_keys_does_not_reset_the_failure_count(breaker, monkeypatch):
+    monkeypatch.setattr(gemini_model, '_acquire_key', _keys_exhausted)
+    breaker.failures = 3
+
+    with pytest.raises(KeysExhaustedError):
+        generate_content("Explain closures", format_type='markdown')
+
+    assert breaker.state == breaker.CLOSED
+    assert breaker.failures == 3
+
+def test_non_upstream_errors_are_neutral(breaker):
+    breaker.failures = 2
+    breaker.record(classify_exception(ValueError("malformed JSON")))
+    assert breaker.failures == 2
+    breaker.record(classify_exception(ConnectionError("reset")))
+    assert breaker.failures == 3
@@ -0,0 +1,139 @@
+import json
+import threading
+from app.api import content_generator
+from app.models.fake_model import FAKE_OUTLINE, behaviour
+from app.utils.youtube import youtube_client
+
+VIDEOS = [{"title": "Closures explained", "url": "https://www.youtube.com/watch?v=abc"}]
+
+def test_generation_runs_on_the_request_thread(monkeypatch):
+    threads = {}
+
+    def generate(*args, **kwargs):
+        threads['gemini'] = threading.current_thread()
+        return "# Closures"
+
+    def search(topic, max_results=2):
+        threads['youtube'] = threading.current_thread()
+        return VIDEOS
+
+    monkeypatch.setattr(content_generator, 'generate_content', generate)
+    monkeypatch.setattr(youtube_client, 'search', search)
+
+    response, _, youtube_time = content_generator.create_tutorial_content('Closures', 'Beginner')
+
+    assert response == {"content": "# Closures", "youtube_links": VIDEOS}
+    assert youtube_time is not None
+    assert threads['gemini'] is threading.current_thread()
+    assert threads['youtube'] is not threading.current_thread()
+
+def test_concurrent_generations_are_not_capped_by_the_io_pool(monkeypatch):
+    callers = content_generator.IO_POOL_WORKERS * 2
+    # Every generation waits until all of them are running at once
+    barrier = threading.Barrier(callers, timeout=5)
+
+    def generate(*args, **kwargs):
+        barrier.wait()
+        return "# Closures"
+
+    monkeypatch.setattr(content_generator, 'generate_content', generate)
+    monkeypatch.setattr(youtube_client, 'search', lambda topic, max_results=2: VIDEOS)
+    results = []
+
+    def request():
+        try:
+            response, _, _ = content_generator.create_tutorial_content('Closures', 'Beginner')
+        except threading.BrokenBarrierError:
+            return
+        results.append(response["youtube_links"])
+
+    threads = [threading.Thread(target=request) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert results == [VIDEOS] * callers
+
+def _events(response):
+    """(event, data) pairs of a text/event-stream response body."""
+    assert response.mimetype == 'text/event-stream'
+    events = []
+    for message in response.get_data(as_text=True).split('\n\n'):
+        if message:
+            event, data = message.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+    return events
+
+def _stream(client, mode):
+    return client.post('/api/generate-content?stream=1', json={
+        "topic": f"Closures streamed in {mode} mode", "level": "Beginner", "mode": mode
+    })
+
+def test_single_mode_streams_chunks_then_done(client, monkeypatch):
+    monkeypatch.setattr(youtube_client, 'search', lambda topic, max_results=2: VIDEOS)
+
+    events = _events(_stream(client, 'single'))
+
+    names = [event for event, _ in events]
+    assert names[-1] == 'done' and names.count('done') == 1
+    assert len(names) > 2 and set(names[:-1]) == {'chunk'}
+    assert ''.join(data['content'] for _, data in events[:-1]).startswith('#')
+    assert events[-1][1] == {"youtube_links": VIDEOS}
+
+def test_sections_mode_streams_head_sections_and_tail_in_order(client, monkeypatch):
+    monkeypatch.setattr(youtube_client, 'search', lambda topic, max_results=2: VIDEOS)
+
+    events = _events(_stream(client, 'sections'))
+
+    names = [event for event, _ in events]
+    assert names[-1] == 'done' and set(names[:-1]) == {'chunk'}
+    chunks = [data['content'] for _, data in events[:-1]]
+    outline = FAKE_OUTLINE['sections']
+    # head, one chunk per section in outline order, tail
+    assert len(chunks) == len(outline) + 2
+    for chunk, section in zip(chunks[1:-1], outline):
+        assert section['section_title'] in chunk
+    assert events[-1][1] == {"youtube_links": VIDEOS}
+
+def test_single_mode_ends_with_an_error_event_when_generation_fails(client, monkeypatch):
+    def failing_stream(*args, **kwargs):
+        yield "# Closures\n"
+        raise ConnectionError("upstream went away")
+
+    monkeypatch.setattr(content_generator, 'generate_content_stream', failing_stream)
+    monkeypatch.setattr(youtube_client, 'search', lambda topic, max_results=2: VIDEOS)
+
+    events = _events(_stream(client, 'single'))
+
+    assert [event for event, _ in events] == ['chunk', 'error']
+    assert events[1][1]["error"] == "Failed to generate content"
+
+def test_sections_mode_sends_only_an_error_event_when_the_outline_fails(client, monkeypatch):
+    def failing_outline(*args, **kwargs):
+        raise ValueError("malformed outline")
+
+    monkeypatch.setattr(content_generator, 'generate_outline', failing_outline)
+    monkeypatch.setattr(youtube_client, 'search', lambda topic, max_results=2: VIDEOS)
+
+    events = _events(_stream(client, 'sections'))
+
+    assert [event for event, _ in events] == ['error']
+
+def test_prefetched_content_is_stored_under_the_default_mode_key(client, monkeypatch):
+    from app.utils.cache import MemoryBackend, ResponseCache
+    cache = ResponseCache('content', MemoryBackend(10), ttl=60)
+    monkeypatch.setattr(content_generator, 'content_cache', cache)
+    monkeypatch.setattr(content_generator, 'CONTENT_DEFAULT_MODE', 'sections')
+    monkeypatch.setattr(youtube_client, 'search', lambda topic, max_results=2: VIDEOS)
+
+    key = content_generator.prefetch_cache_key("Closures", "Beginner")
+    assert content_generator.prefetch_tutorial_content("Closures", "Beginner", key)
+    calls = behaviour.calls
+
+    # A POST without a mode uses CONTENT_DEFAULT_MODE and finds the prefetched result
+    response = client.post('/api/generate-content', json={"topic": "Closures", "level": "Beginner"})
+
+    assert response.status_code == 200
+    assert response.get_json() == cache.get(key)
+    assert behaviour.calls == calls
@@ -0,0 +1,53 @@
+import json
+import pytest
+from app.models import gemini_model
+from app.models.fake_model import FakeGenerativeModel
+
+SCHEMA = {"type": "object", "properties": {"title": {"type": "string"}}}
+
+def test_continuation_runs_without_the_response_schema(monkeypatch):
+    received = []
+    generate = FakeGenerativeModel.generate_content
+
+    def spy(self, contents, stream=False, generation_config=None):
+        received.append(self.effective_config(generation_config))
+        return generate(self, contents, stream=stream, generation_config=generation_config)
+
+    monkeypatch.setattr(FakeGenerativeModel, 'generate_content', spy)
+    text = gemini_model.generate_content(
+        "Create a learning roadmap for Rust", model_name='continuation-model',
+        response_schema=SCHEMA, generation_config={'max_output_tokens': 60}
+    )
+
+    assert json.loads(text)
+    assert len(received) > 1
+    assert received[0]['response_schema'] == SCHEMA
+    for config in received[1:]:
+        assert config.get('response_schema') is None
+        assert config.get('response_mime_type') != 'application/json'
+        assert config['max_output_tokens'] == 60
+
+@pytest.fixture
+def real_sdk(monkeypatch):
+    """The installed google-generativeai SDK, with fresh per-key clients and no network calls."""
+    monkeypatch.setattr(gemini_model, 'GEMINI_API_KEYS', ['configured-key'])
+    monkeypatch.setattr(gemini_model, 'GEMINI_FAKE_MODEL', False)
+    monkeypatch.setattr(gemini_model, '_clients', {})
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_each_api_key_gets_its_own_sdk_client(real_sdk):
+    client_a = gemini_model._client_for('key-a')
+    client_b = gemini_model._client_for('key-b')
+
+    assert gemini_model._client_for('key-a') is client_a
+    assert client_b is not client_a
+    assert type(client_a).__name__ == 'GenerativeServiceClient'
+    assert client_a._transport._credentials.token == 'key-a'
+    assert client_b._transport._credentials.token == 'key-b'
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_sdk_model_is_bound_to_its_api_key(real_sdk):
+    model = gemini_model._create_model('gemini-test', {'temperature': 0.2}, api_key='key-a')
+
+    assert model._client is gemini_model._client_for('key-a')
+    assert model._generation_config == {'temperature': 0.2}
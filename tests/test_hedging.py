@@ -0,0 +1,129 @@
+import threading
+import time
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
+from app.models import gemini_model
+from app.models.fake_model import behaviour, configure_fake_model
+from app.models.routing import model_router
+from app.utils.metrics import get_counters
+
+PROMPT = "A quiz about closures"
+
+@pytest.fixture
+def hedge_after(monkeypatch):
+    """Hedge after a fixed delay, with no hedge budget, on a two-model route."""
+    def configure(delay):
+        monkeypatch.setattr(model_router, 'hedge_delay', lambda route, model_name: delay)
+        monkeypatch.setattr(model_router, 'try_hedge', lambda route: True)
+    return configure
+
+def _hedged(route):
+    return gemini_model._generate_hedged(PROMPT, 'primary-model', 'hedge-model', 'json', None, route)
+
+def _counter(name, route):
+    return get_counters().get(f"{name}{{route={route}}}", 0)
+
+def test_primary_wins_without_hedging(hedge_after):
+    hedge_after(0.5)
+    configure_fake_model(model_latency={'primary-model': ('constant', 0.01), 'hedge-model': ('constant', 0.01)})
+
+    assert _hedged('hedge-test-fast').startswith('{')
+    assert behaviour.calls == 1
+    assert _counter('hedged_requests', 'hedge-test-fast') == 0
+
+def test_primary_wins_after_the_hedge_starts(hedge_after):
+    hedge_after(0.05)
+    configure_fake_model(model_latency={'primary-model': ('constant', 0.15), 'hedge-model': ('constant', 1.0)})
+
+    start = time.perf_counter()
+    assert _hedged('hedge-test-primary').startswith('{')
+    assert time.perf_counter() - start < 0.5
+    assert behaviour.calls == 2
+    assert _counter('hedged_requests', 'hedge-test-primary') == 1
+    assert _counter('hedge_wins', 'hedge-test-primary') == 0
+    assert _counter('hedge_abandoned', 'hedge-test-primary') == 1
+
+def test_hedge_wins_when_the_primary_stalls(hedge_after):
+    hedge_after(0.05)
+    configure_fake_model(model_latency={'primary-model': ('constant', 1.0), 'hedge-model': ('constant', 0.01)})
+
+    start = time.perf_counter()
+    assert _hedged('hedge-test-hedge').startswith('{')
+    assert time.perf_counter() - start < 0.5
+    assert _counter('hedge_wins', 'hedge-test-hedge') == 1
+
+def test_both_calls_failing_raises(hedge_after):
+    hedge_after(0.05)
+    configure_fake_model(latency=('constant', 0.1), failure_rate=1.0)
+
+    with pytest.raises(ServiceUnavailable):
+        _hedged('hedge-test-fail')
+    assert behaviour.calls == 2
+
+def test_one_failure_is_covered_by_the_other_call(hedge_after, monkeypatch):
+    hedge_after(0.05)
+    configure_fake_model(model_latency={'primary-model': ('constant', 0.2), 'hedge-model': ('constant', 0.01)})
+    original = gemini_model._generate_once
+
+    def primary_fails(prompt, model_name, *args):
+        if model_name == 'primary-model':
+            time.sleep(0.1)
+            raise ConnectionError("reset")
+        return original(prompt, model_name, *args)
+
+    monkeypatch.setattr(gemini_model, '_generate_once', primary_fails)
+    assert _hedged('hedge-test-one-fails').startswith('{')
+
+def test_busy_pool_runs_the_call_unhedged_on_the_caller_thread(hedge_after, monkeypatch):
+    hedge_after(0.0)
+    monkeypatch.setattr(gemini_model, '_call_slots', threading.BoundedSemaphore(1))
+    gemini_model._call_slots.acquire()
+    threads = []
+    original = gemini_model._generate_once
+
+    def generate_once(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    monkeypatch.setattr(gemini_model, '_generate_once', generate_once)
+    assert _hedged('hedge-test-busy').startswith('{')
+    assert threads == [threading.current_thread()]
+    assert _counter('hedge_skipped', 'hedge-test-busy') == 1
+
+def _free_slots():
+    acquired = 0
+    while gemini_model._call_slots.acquire(blocking=False):
+        acquired += 1
+    for _ in range(acquired):
+        gemini_model._call_slots.release()
+    return acquired
+
+def test_call_slots_are_returned(hedge_after):
+    hedge_after(0.05)
+    configure_fake_model(model_latency={'primary-model': ('constant', 0.1), 'hedge-model': ('constant', 0.1)})
+    _hedged('hedge-test-slots')
+    # Calls abandoned by earlier tests may still be running; every slot comes back once they finish
+    deadline = time.monotonic() + 3
+    while _free_slots() < gemini_model.GEMINI_CALL_WORKERS and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _free_slots() == gemini_model.GEMINI_CALL_WORKERS
+
+def test_single_model_routes_are_not_hedged_by_default(monkeypatch):
+    assert gemini_model._hedge_model(('only-model',)) is None
+    assert gemini_model._hedge_model(('first', 'second')) == 'second'
+    monkeypatch.setattr(gemini_model, 'HEDGE_SAME_MODEL', True)
+    assert gemini_model._hedge_model(('only-model',)) == 'only-model'
+    monkeypatch.setattr(gemini_model, 'HEDGING_ENABLED', False)
+    assert gemini_model._hedge_model(('first', 'second')) is None
+
+def test_single_model_route_calls_on_the_request_thread(monkeypatch):
+    threads = []
+    original = gemini_model._generate_once
+
+    def generate_once(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    monkeypatch.setattr(gemini_model, '_generate_once', generate_once)
+    gemini_model.generate_content(PROMPT, model_name='only-model')
+    assert threads == [threading.current_thread()]
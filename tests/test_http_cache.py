@@ -0,0 +1,43 @@
+import pytest
+from app.api import content_generator
+from app.utils.cache import MemoryBackend, ResponseCache
+
+TOPIC = "HTTP caching"
+CONTENT = {"content": "# HTTP caching", "youtube_links": []}
+
+@pytest.fixture
+def content_cache(monkeypatch):
+    cache = ResponseCache('content', MemoryBackend(10), ttl=60)
+    monkeypatch.setattr(content_generator, 'content_cache', cache)
+    cache.set(content_generator.content_cache_key(TOPIC, 'Beginner'), CONTENT)
+    return cache
+
+def _get(client, **headers):
+    return client.get('/api/generate-content', query_string={"topic": TOPIC, "level": "Beginner"}, headers=headers)
+
+def test_etag_is_stable_for_the_same_result(client, content_cache):
+    first, second = _get(client), _get(client)
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag']
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+def test_matching_if_none_match_gets_304(client, content_cache):
+    etag = _get(client).headers['ETag']
+
+    response = _get(client, **{'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+
+def test_changed_result_gets_200_with_a_new_etag(client, content_cache):
+    etag = _get(client).headers['ETag']
+    content_cache.set(content_generator.content_cache_key(TOPIC, 'Beginner'), {**CONTENT, "content": "# Updated"})
+
+    response = _get(client, **{'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.get_json()["content"] == "# Updated"
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,64 @@
+import pytest
+from app.utils import jobs
+from app.utils.jobs import JobRunner, MemoryJobStore, valid_callback_url
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1:8080/hook',
+    'http://localhost/hook',
+    'http://10.1.2.3/hook',
+    'http://192.168.0.10/hook',
+    'http://169.254.169.254/latest/meta-data/',
+    'http://[::1]/hook',
+    'http://[::ffff:127.0.0.1]/hook',
+    'http://0.0.0.0/hook',
+    'ftp://8.8.8.8/hook',
+    'http:///hook',
+    'http://8.8.8.8:notaport/hook',
+])
+def test_callback_urls_to_internal_or_invalid_hosts_are_rejected(url):
+    assert not valid_callback_url(url)
+
+def test_callback_urls_to_public_addresses_are_accepted():
+    assert valid_callback_url('https://8.8.8.8/hook')
+    assert valid_callback_url('http://[2001:4860:4860::8888]:8443/hook')
+
+def test_allowlist_replaces_the_address_check(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_CALLBACK_ALLOWED_HOSTS', ['hooks.internal'])
+    assert valid_callback_url('https://hooks.internal/done')
+    assert not valid_callback_url('https://8.8.8.8/hook')
+
+def test_async_request_with_internal_callback_is_rejected(client):
+    response = client.post('/api/generate-roadmap?async=1', json={
+        "course_title": "Python", "level": "Beginner", "callback_url": "http://169.254.169.254/"
+    })
+    assert response.status_code == 400
+    assert "callback_url" in response.get_json()["message"]
+
+class _Response:
+    status_code = 302
+    ok = False
+
+def _capture_posts(monkeypatch):
+    import requests
+    posts = []
+    monkeypatch.setattr(requests, 'post', lambda url, **kwargs: posts.append((url, kwargs)) or _Response())
+    return posts
+
+def test_callbacks_do_not_follow_redirects(monkeypatch):
+    posts = _capture_posts(monkeypatch)
+    JobRunner(store=MemoryJobStore())._deliver_callback({"job_id": "job"}, 'https://8.8.8.8/hook')
+    assert len(posts) == 1
+    assert posts[0][1]['allow_redirects'] is False
+
+def test_callback_is_not_sent_once_the_host_resolves_internally(monkeypatch):
+    posts = _capture_posts(monkeypatch)
+    JobRunner(store=MemoryJobStore())._deliver_callback({"job_id": "job"}, 'http://127.0.0.1/hook')
+    assert posts == []
+
+def test_polling_a_job_does_not_use_up_the_rate_limit(client):
+    from app.config.config import MAX_REQUESTS_PER_WINDOW
+    polls = [client.get('/api/jobs/unknown-job').status_code for _ in range(MAX_REQUESTS_PER_WINDOW + 5)]
+    assert set(polls) == {404}
+
+    others = [client.get('/api/unknown-route').status_code for _ in range(MAX_REQUESTS_PER_WINDOW + 1)]
+    assert others[-1] == 429
@@ -0,0 +1,48 @@
+import json
+import pytest
+from app.utils.helpers import parse_ai_json
+from app.utils.json_repair import repair_json
+from json_repair_corpus import CASES, LARGE_QUIZ, TRUNCATED
+
+NEED_REPAIR = [case for case in CASES if case[3]]
+ALREADY_VALID = [case for case in CASES if not case[3]]
+
+@pytest.mark.parametrize('name, text, expected, needs_repair', CASES, ids=[case[0] for case in CASES])
+def test_corpus_case_parses_to_the_expected_value(name, text, expected, needs_repair):
+    assert parse_ai_json(text) == expected
+
+@pytest.mark.parametrize('name, text, expected, needs_repair', TRUNCATED, ids=[case[0] for case in TRUNCATED])
+def test_truncated_quiz_parses_to_a_prefix_of_the_quiz(name, text, expected, needs_repair):
+    quiz = parse_ai_json(text)
+
+    assert quiz["title"] == LARGE_QUIZ["title"]
+    assert 0 < len(quiz["questions"]) <= len(LARGE_QUIZ["questions"])
+    for question, original in zip(quiz["questions"], LARGE_QUIZ["questions"]):
+        # The last question may be cut short: keys missing, or a string or list truncated
+        for key, value in question.items():
+            if isinstance(value, str):
+                assert original[key].startswith(value)
+            elif isinstance(value, list):
+                assert original[key][:len(value) - 1] == value[:-1]
+            else:
+                assert value is None
+    # Every question but the last is complete
+    assert quiz["questions"][:-1] == LARGE_QUIZ["questions"][:len(quiz["questions"]) - 1]
+
+@pytest.mark.parametrize('name, text, expected, needs_repair', NEED_REPAIR, ids=[case[0] for case in NEED_REPAIR])
+def test_repairs_are_reported(name, text, expected, needs_repair):
+    value, repairs = repair_json(text)
+    assert value == expected
+    assert repairs
+
+@pytest.mark.parametrize('name, text, expected, needs_repair', ALREADY_VALID, ids=[case[0] for case in ALREADY_VALID])
+def test_valid_corpus_json_needs_no_repairs(name, text, expected, needs_repair):
+    assert repair_json(text) == (expected, [])
+
+def test_valid_json_needs_no_repairs():
+    assert repair_json(json.dumps({"a": [1, 2]})) == ({"a": [1, 2]}, [])
+
+@pytest.mark.parametrize('text', ['', 'no JSON here at all', 'Sorry, I cannot help with that.'])
+def test_unsalvageable_text_raises(text):
+    with pytest.raises(ValueError):
+        parse_ai_json(text)
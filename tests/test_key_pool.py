@@ -0,0 +1,17 @@
+import logging
+from app.utils.key_pool import KeyPool
+from app.utils.metrics import get_counters, render_prometheus
+
+KEYS = ['AIzaSyFirstKeyabcd', 'AIzaSySecondKeywxyz']
+
+def test_keys_are_labelled_by_position_only(caplog):
+    caplog.set_level(logging.WARNING)
+    pool = KeyPool('label-test', KEYS, requests_per_minute=5)
+    pool.register_gauges()
+    pool.park(KEYS[1], 30)
+
+    assert get_counters()['api_key_parks{key=1,provider=label-test}'] == 1
+    exported = render_prometheus() + repr(get_counters()) + caplog.text
+    assert 'provider="label-test"' in exported
+    for key in KEYS:
+        assert key[-4:] not in exported
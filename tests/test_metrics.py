@@ -0,0 +1,36 @@
+import threading
+from app.utils import metrics
+
+def test_label_values_are_escaped():
+    metrics.increment('escape_test', path='C:\\temp\\"quoted"\nnext')
+
+    rendered = metrics.render_prometheus()
+
+    assert 'atomic_escape_test_total{path="C:\\\\temp\\\\\\"quoted\\"\\nnext"} 1' in rendered
+    assert all(line.startswith(('#', 'atomic_')) for line in rendered.splitlines())
+
+def test_concurrent_increments_are_not_lost():
+    threads = [
+        threading.Thread(target=lambda: [metrics.increment('concurrency_test', worker='a') for _ in range(1000)])
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.get_counters()['concurrency_test{worker=a}'] == 8000
+
+def test_a_busy_counter_does_not_block_other_metrics():
+    metrics.increment('busy_counter')
+    busy = metrics._counters[('busy_counter', ())]
+    done = threading.Event()
+
+    def other_metrics():
+        metrics.increment('other_counter')
+        metrics.histogram('other_histogram').observe(0.1)
+        done.set()
+
+    with busy._lock:
+        threading.Thread(target=other_metrics).start()
+        assert done.wait(1)
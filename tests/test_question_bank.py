@@ -0,0 +1,89 @@
+import pytest
+from app.api import quiz_generator
+from app.models.fake_model import behaviour
+from app.utils.question_bank import QuestionBank, remove_near_duplicates
+
+def _question(text):
+    return {
+        "question": text,
+        "options": ["A", "B", "C", "D"],
+        "correct_answer": "A",
+        "explanation": "Because A.",
+    }
+
+DECORATOR_QUESTIONS = [
+    _question("What does a decorator return?"),
+    _question("Which syntax applies a decorator to a function?"),
+    _question("Why use functools.wraps inside a decorator?"),
+]
+
+@pytest.fixture
+def bank(tmp_path, monkeypatch):
+    bank = QuestionBank(path=str(tmp_path / 'questions.sqlite3'), enabled=True)
+    monkeypatch.setattr(quiz_generator, 'question_bank', bank)
+    return bank
+
+def test_duplicate_questions_are_stored_once(bank):
+    first = bank.add("Python Decorators", "Beginner", DECORATOR_QUESTIONS)
+    again = bank.add("python decorators", "beginner", [_question("what does a DECORATOR return")])
+
+    assert len(set(first)) == 3
+    assert again == first[:1]
+    assert len(bank) == 3
+
+def test_sample_matches_topic_and_level_through_full_text_search(bank):
+    bank.add("Python Decorators", "Beginner", DECORATOR_QUESTIONS)
+    bank.add("Decorators", "Beginner", [_question("What is a class decorator?")])
+    bank.add("Python Generators", "Beginner", [_question("What does yield do?")])
+
+    sampled = [question["question"] for _, question in bank.sample("decorators", "beginner", 10)]
+    # questions stored under the topic itself come before ones from broader topics
+    assert sampled[0] == "What is a class decorator?"
+    assert sorted(sampled[1:]) == sorted(question["question"] for question in DECORATOR_QUESTIONS)
+    assert bank.sample("python decorators", "Advanced", 10) == []
+    assert bank.sample("rust", "Beginner", 10) == []
+
+def test_sample_skips_questions_served_to_the_session(bank):
+    ids = bank.add("Python Decorators", "Beginner", DECORATOR_QUESTIONS)
+    bank.mark_served("session-1", ids[:2])
+
+    assert [question_id for question_id, _ in bank.sample("Python Decorators", "Beginner", 10, "session-1")] == ids[2:]
+    assert len(bank.sample("Python Decorators", "Beginner", 10, "session-2")) == 3
+
+def test_remove_near_duplicates_keeps_the_first_of_each():
+    questions = [
+        _question("What does a decorator return?"),
+        _question("What does a decorator return ?"),
+        _question("what does the decorator return?"),
+        _question("Which syntax applies a decorator to a function?"),
+    ]
+
+    kept = remove_near_duplicates(questions, 0.75)
+
+    assert kept == [questions[0], questions[3]]
+    assert remove_near_duplicates(questions, 1.0) == [questions[0], questions[2], questions[3]]
+
+def test_assemble_quiz_from_the_bank_without_generating(bank):
+    bank.add("Python Decorators", "Beginner", DECORATOR_QUESTIONS)
+
+    quiz = quiz_generator.assemble_quiz("Python Decorators", "Beginner", 3, session_id="session-1")
+
+    assert behaviour.calls == 0
+    assert sorted(question["question"] for question in quiz["questions"]) == sorted(
+        question["question"] for question in DECORATOR_QUESTIONS
+    )
+
+def test_assemble_quiz_generates_only_the_shortfall(bank):
+    bank.add("Python Decorators", "Beginner", DECORATOR_QUESTIONS[:2])
+
+    quiz = quiz_generator.assemble_quiz("Python Decorators", "Beginner", 5, session_id="session-1")
+
+    assert behaviour.calls == 1
+    assert len(quiz["questions"]) == 5
+    assert {question["question"] for question in DECORATOR_QUESTIONS[:2]} <= {
+        question["question"] for question in quiz["questions"]
+    }
+    assert len(bank) == 5
+    # the session has now seen every banked question, so its next quiz is generated
+    quiz_generator.assemble_quiz("Python Decorators", "Beginner", 5, session_id="session-1")
+    assert behaviour.calls == 2
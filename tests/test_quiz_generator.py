@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+from app.api import quiz_generator
+from app.config.config import MAX_RETRIES
+from app.models.fake_model import behaviour, configure_fake_model
+from app.utils import helpers
+from app.utils.metrics import get_counters
+
+def _question(text):
+    return {"question": text, "options": ["A", "B", "C", "D"], "correct_answer": "A", "explanation": "A."}
+
+def test_failed_chunk_is_regenerated_without_redoing_the_others(monkeypatch, breaker):
+    monkeypatch.setattr(helpers, 'random', SimpleNamespace(uniform=lambda low, high: 0.0))  # no backoff
+    sizes = quiz_generator.chunk_sizes(10)
+    failing_focus = quiz_generator.QUIZ_CHUNK_FOCUSES[1]
+    # Every attempt of the second chunk's first round fails; its second round succeeds
+    configure_fake_model(fail_prompts={failing_focus: MAX_RETRIES})
+    retries_before = get_counters().get('quiz_chunk_retries', 0)
+
+    quiz = quiz_generator.create_chunked_quiz("Closures", "Beginner", 10)
+
+    assert len(sizes) == 2
+    assert len(quiz["questions"]) == 10
+    assert behaviour.failures == MAX_RETRIES
+    # one call for the healthy chunk, the failed attempts, and one call for the regenerated chunk
+    assert behaviour.calls == 1 + MAX_RETRIES + 1
+    assert get_counters().get('quiz_chunk_retries', 0) - retries_before == 1
+
+def test_questions_repeated_across_chunks_are_kept_once(monkeypatch):
+    chunks = {
+        quiz_generator.QUIZ_CHUNK_FOCUSES[0]: ["What is a closure?", "What does a closure capture?", "Where do closures live?"],
+        quiz_generator.QUIZ_CHUNK_FOCUSES[1]: ["What is a closure ?", "When is a closure created?", "Why use a closure?"],
+    }
+
+    def create_single_quiz(topic, level, question_count, focus=None):
+        return {"title": "Quiz", "description": "Quiz", "questions": [_question(text) for text in chunks[focus]]}
+
+    monkeypatch.setattr(quiz_generator, 'create_single_quiz', create_single_quiz)
+    monkeypatch.setattr(quiz_generator, 'chunk_sizes', lambda question_count: [2, 2])
+
+    quiz = quiz_generator.create_chunked_quiz("Closures", "Beginner", 6)
+
+    texts = [question["question"] for question in quiz["questions"]]
+    assert texts == [
+        "What is a closure?", "What does a closure capture?", "Where do closures live?",
+        "When is a closure created?", "Why use a closure?",
+    ]
+
+def test_batch_reports_a_failed_topic_without_failing_the_others(client, monkeypatch, breaker):
+    monkeypatch.setattr(helpers, 'random', SimpleNamespace(uniform=lambda low, high: 0.0))
+    configure_fake_model(fail_prompts={"Broken topic": MAX_RETRIES})
+
+    response = client.post('/api/generate-quiz/batch', json={
+        "topics": ["Closures", "Broken topic", "Generators"], "level": "Beginner", "count": 3
+    })
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert [item["index"] for item in body["results"]] == [0, 1, 2]
+    assert [item["status"] for item in body["results"]] == ["ok", "error", "ok"]
+    assert body["results"][1]["error"] == quiz_generator.ERROR_MESSAGES["ai_generation_failed"]
+    assert len(body["results"][0]["quiz"]["questions"]) == 3
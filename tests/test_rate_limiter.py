@@ -0,0 +1,35 @@
+import pytest
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+from app.utils.rate_limiter import get_client_ip
+
+def _request(forwarded_for=None, remote_addr='10.0.0.1'):
+    headers = {} if forwarded_for is None else {'X-Forwarded-For': forwarded_for}
+    return Request(EnvironBuilder(headers=headers, environ_base={'REMOTE_ADDR': remote_addr}).get_environ())
+
+def test_single_hop_is_the_client():
+    assert get_client_ip(_request('203.0.113.7'), trusted_proxies=1) == '203.0.113.7'
+
+@pytest.mark.parametrize('trusted_proxies, client', [
+    (1, '198.51.100.2'),
+    (2, '203.0.113.7'),
+    (3, '192.0.2.1'),
+])
+def test_multiple_hops_use_the_trusted_proxy_count(trusted_proxies, client):
+    forwarded_for = '192.0.2.1, 203.0.113.7, 198.51.100.2'
+    assert get_client_ip(_request(forwarded_for), trusted_proxies=trusted_proxies) == client
+
+def test_spoofed_left_most_entries_are_ignored():
+    # The client sent "1.2.3.4, 5.6.7.8" itself; the one proxy appended its real address
+    request = _request('1.2.3.4, 5.6.7.8, 203.0.113.7')
+    assert get_client_ip(request, trusted_proxies=1) == '203.0.113.7'
+
+def test_fewer_hops_than_proxies_use_the_left_most():
+    assert get_client_ip(_request('203.0.113.7'), trusted_proxies=2) == '203.0.113.7'
+
+@pytest.mark.parametrize('forwarded_for', [None, '', ' , '])
+def test_missing_header_falls_back_to_remote_addr(forwarded_for):
+    assert get_client_ip(_request(forwarded_for), trusted_proxies=1) == '10.0.0.1'
+
+def test_no_trusted_proxies_ignores_the_header():
+    assert get_client_ip(_request('203.0.113.7'), trusted_proxies=0) == '10.0.0.1'
@@ -0,0 +1,108 @@
+import threading
+import time
+from app.models import gemini_model
+from app.models.fake_model import behaviour, configure_fake_model
+from app.utils.singleflight import SingleFlight
+
+CALLERS = 8
+
+def _run_concurrently(func, callers=CALLERS):
+    """Call func from `callers` threads released together; returns their results or exceptions."""
+    barrier = threading.Barrier(callers)
+    outcomes = [None] * callers
+
+    def caller(index):
+        barrier.wait()
+        try:
+            outcomes[index] = func()
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return outcomes
+
+class _CountingStub:
+    """Blocks until every caller has joined the flight, then returns (or raises) once per call."""
+
+    def __init__(self, flight, error=None):
+        self.flight = flight
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        deadline = time.monotonic() + 5
+        while self.flight.coalesced < CALLERS - 1 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        if self.error is not None:
+            raise self.error
+        return {"calls": self.calls}
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    stub = _CountingStub(flight)
+
+    outcomes = _run_concurrently(lambda: flight.do('key', stub))
+
+    assert stub.calls == 1
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert (flight.executions, flight.coalesced, flight.in_flight()) == (1, CALLERS - 1, 0)
+
+def test_concurrent_callers_share_the_error():
+    flight = SingleFlight()
+    error = RuntimeError("upstream said no")
+    stub = _CountingStub(flight, error)
+
+    outcomes = _run_concurrently(lambda: flight.do('key', stub))
+
+    assert stub.calls == 1
+    assert all(outcome is error for outcome in outcomes)
+    assert flight.in_flight() == 0
+
+def test_nothing_is_cached_after_the_call():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+
+def test_identical_generations_make_one_upstream_call(breaker):
+    # Slow enough that every caller arrives while the first call is in flight
+    configure_fake_model(latency=('constant', 0.3))
+
+    outcomes = _run_concurrently(lambda: gemini_model.generate_content("A quiz about closures"))
+
+    assert behaviour.calls == 1
+    assert all(outcome == outcomes[0] for outcome in outcomes)
+    assert isinstance(outcomes[0], str)
+
+def test_different_prompts_are_not_coalesced(breaker):
+    configure_fake_model(latency=('constant', 0.05))
+    prompts = iter(f"A quiz about topic {index}" for index in range(CALLERS))
+    lock = threading.Lock()
+
+    def generate():
+        with lock:
+            prompt = next(prompts)
+        return gemini_model.generate_content(prompt)
+
+    _run_concurrently(generate)
+    assert behaviour.calls == CALLERS
+
+def test_identical_generations_share_one_failure(breaker, monkeypatch):
+    calls = []
+
+    def failing_call(*args):
+        calls.append(args)
+        time.sleep(0.3)
+        raise PermissionError("API key not valid")
+
+    monkeypatch.setattr(gemini_model, '_call_with_key', failing_call)
+
+    outcomes = _run_concurrently(lambda: gemini_model.generate_content("A quiz about closures"))
+
+    assert len(calls) == 1
+    assert all(isinstance(outcome, PermissionError) for outcome in outcomes)
+    assert outcomes.count(outcomes[0]) == CALLERS
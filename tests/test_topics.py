@@ -0,0 +1,58 @@
+import pytest
+
+from app.utils import topics
+from app.utils.cache import MemoryBackend, ResponseCache, make_cache_key
+from app.utils.topics import TopicIndex
+
+SAME_SUBJECT = [
+    ("Python decorators", "Python decorator"),
+    ("Javascript Promises", "JavaScript Promise"),
+    ("data structures", "data structure"),
+]
+
+DIFFERENT_SUBJECTS = [
+    ("Unsupervised Learning", "Supervised Learning"),
+    ("Binary Search Tree", "Binary Search"),
+    ("Machine Learning Ops", "Machine Learning"),
+    ("Non-linear Regression", "Linear Regression"),
+    ("Python 2", "Python 3"),
+]
+
+def _matches(stored, query, threshold=0.7):
+    index = TopicIndex(threshold=threshold)
+    index.add(stored)
+    return [candidate for candidate, _ in index.similar(query)]
+
+@pytest.mark.parametrize("stored, query", SAME_SUBJECT)
+def test_near_duplicates_match_both_ways(stored, query):
+    assert _matches(stored, query, topics.TOPIC_SIMILARITY_THRESHOLD) == [topics.canonicalize_topic(stored)]
+    assert _matches(query, stored, topics.TOPIC_SIMILARITY_THRESHOLD) == [topics.canonicalize_topic(query)]
+
+@pytest.mark.parametrize("stored, query", DIFFERENT_SUBJECTS)
+def test_different_subjects_never_match(stored, query):
+    # a threshold low enough that only the subject checks keep these apart
+    assert _matches(stored, query, threshold=0.5) == []
+    assert _matches(query, stored, threshold=0.5) == []
+
+def test_typo_matches_below_default_threshold():
+    assert _matches("Machine Learning", "Machne Learning", threshold=0.7) == ["machine learning"]
+    assert _matches("Machine Learning", "Machne Learning", threshold=0.8) == []
+
+def test_similarity_is_off_by_default():
+    assert topics.TOPIC_SIMILARITY_ENABLED is False
+
+def test_lookup_serves_near_duplicate_only_when_enabled(monkeypatch):
+    cache = ResponseCache('topics-test', MemoryBackend(100), ttl=60)
+    key_for = lambda topic: make_cache_key("topics-test", topics.canonicalize_topic(topic))
+    cache.set(key_for("Python decorators"), {"topic": "Python decorators"})
+    monkeypatch.setattr(topics, 'TOPIC_SIMILARITY_ENABLED', True)
+    topics.remember_topic('topics-test', "Python decorators")
+
+    value, key = topics.lookup_topic(cache, 'topics-test', "Python decorator", key_for)
+    assert value == {"topic": "Python decorators"}
+    assert key == key_for("Python decorators")
+
+    monkeypatch.setattr(topics, 'TOPIC_SIMILARITY_ENABLED', False)
+    value, key = topics.lookup_topic(cache, 'topics-test', "Python decorator", key_for)
+    assert value is None
+    assert key == key_for("Python decorator")
@@ -0,0 +1,73 @@
+import pytest
+from app.utils.cache import MemoryBackend, ResponseCache
+from app.utils.key_pool import KeyPool
+from app.utils.youtube import YouTubeClient
+from benchmarks.bench_youtube import FakeYouTubeHandler, start_server
+
+@pytest.fixture
+def server():
+    server = start_server(latency=0.0, connect_latency=0.0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def client(server):
+    client = YouTubeClient(
+        api_url=f"http://127.0.0.1:{server.server_port}/youtube/v3",
+        keys=KeyPool('youtube-test', ['test-key']),
+        cache=ResponseCache('youtube-test', MemoryBackend(100), ttl=60),
+    )
+    yield client
+    client.session.close()
+
+class Upstream:
+    """Connections opened and searches answered by the fake server since creation."""
+
+    def __init__(self):
+        self._start = (FakeYouTubeHandler.connections, FakeYouTubeHandler.searches)
+
+    @property
+    def connections(self):
+        return FakeYouTubeHandler.connections - self._start[0]
+
+    @property
+    def searches(self):
+        return FakeYouTubeHandler.searches - self._start[1]
+
+def test_repeat_lookup_is_served_from_the_cache(client):
+    upstream = Upstream()
+    videos = client.search('Python decorators')
+    assert [video["title"] for video in videos] == ['Python decorators tutorial part 0', 'Python decorators tutorial part 1']
+    assert upstream.searches == 1
+
+    assert client.search('Python decorators') == videos
+    assert client.search('python   decorators!') == videos
+    assert upstream.searches == 1
+
+def test_lookups_reuse_one_connection(client):
+    upstream = Upstream()
+    for index in range(5):
+        assert client.search(f"topic {index}")
+    assert upstream.searches == 5
+    assert upstream.connections == 1
+
+def test_empty_results_are_cached_too(client):
+    upstream = Upstream()
+    assert client.search('nothing matches this') == []
+    assert client.search('nothing matches this') == []
+    assert upstream.searches == 1
+
+def test_search_many_looks_each_topic_up_once(client):
+    upstream = Upstream()
+    results = client.search_many(['Rust', 'Go', 'rust', 'Rust'])
+    assert results[0] == results[2] == results[3]
+    assert results[0] != results[1]
+    assert upstream.searches == 2
+
+def test_failed_lookups_are_not_cached(client):
+    # Nothing listens on port 1, so every search fails to connect
+    client.api_url = 'http://127.0.0.1:1/youtube/v3'
+    client.retries = 0
+    assert client.search('Python decorators') == []
+    assert client.cache.get(client.cache_key('Python decorators', 2)) is None